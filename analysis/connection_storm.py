@@ -0,0 +1,194 @@
+from pathlib import Path
+import json
+
+import pandas as pd
+import numpy as np
+from matplotlib import pyplot as plt
+
+from analysis.loop_lag import generate_loop_lag_analysis
+from analysis.plotting import plot_series, save_figure
+from analysis.resources import generate_resource_analysis
+from experiments.store import ResultStore
+
+
+class ConnectionStormAnalysis:
+    """Process the results of the ConnectionStormExperiment."""
+
+    STATUSES = ["established", "rejected", "timeout", "failed"]
+
+    def __init__(self, experiment_name):
+        self.experiment_name = experiment_name
+        input_dir = Path(f"data/{self.experiment_name}/")
+
+        if not input_dir.exists():
+            raise ValueError(
+                f"Data directory for the experiment {self.experiment_name}, {input_dir}, does not exist."
+            )
+
+        with ResultStore() as store:
+            results = store.query(
+                run=self.experiment_name, experiment="ConnectionStormExperiment"
+            )
+        self.sessions = {}
+        self.requests = {}
+        for result in results.to_dict("records"):
+            frames = (
+                self.sessions if result["kind"] == "measurements" else self.requests
+            )
+            frames[result["mode"]] = pd.read_csv(result["path"])
+        if len(self.sessions) == 0:
+            raise ValueError(
+                f"No connection storm results in the experiment folder. Make sure to run the experiment first."
+            )
+
+    def __analyze_sessions(self, sessions):
+        """Summarizes the establishment of the sessions of a storm."""
+        established = sessions[sessions["status"] == "established"]
+        latency = established["end_time"] - established["start_time"]
+        storm_duration = sessions["end_time"].max() - sessions["scheduled_time"].min()
+        summary = {
+            "sessions": len(sessions),
+            **{
+                status: int((sessions["status"] == status).sum())
+                for status in ConnectionStormAnalysis.STATUSES
+            },
+            "failure_rate": 1 - len(established) / len(sessions),
+            "errors": sessions["error"].value_counts().to_dict(),
+            "storm_duration": storm_duration,
+            "sessions_per_second": len(established) / storm_duration,
+            # Delay of the harness in starting the connections after their scheduled time
+            "start_delay_max": (
+                sessions["start_time"] - sessions["scheduled_time"]
+            ).max(),
+        }
+        for q in [50, 90, 99]:
+            summary[f"establishment_p{q}"] = (
+                np.percentile(latency, q) if len(latency) > 0 else None
+            )
+        summary["establishment_max"] = latency.max() if len(latency) > 0 else None
+        return summary
+
+    def __analyze_requests(self, requests, storm_start, storm_end):
+        """Summarizes the read latency of the observers before, during and after a storm."""
+        summary = {}
+        phases = {
+            "before": requests["start_time"] < storm_start,
+            "during": (requests["start_time"] >= storm_start)
+            & (requests["start_time"] <= storm_end),
+            "after": requests["start_time"] > storm_end,
+        }
+        for phase, selected in phases.items():
+            frame = requests[selected]
+            successful = frame[frame["success"]]
+            responsiveness = successful["end_time"] - successful["start_time"]
+            summary[phase] = {
+                "requests": len(frame),
+                "failures": int((~frame["success"]).sum()),
+                "responsiveness_mean": responsiveness.mean()
+                if len(responsiveness)
+                else None,
+                "responsiveness_p99": np.percentile(responsiveness, 99)
+                if len(responsiveness)
+                else None,
+                "responsiveness_max": responsiveness.max()
+                if len(responsiveness)
+                else None,
+            }
+        if (
+            summary["before"]["responsiveness_p99"]
+            and summary["during"]["responsiveness_p99"]
+        ):
+            summary["p99_degradation"] = (
+                summary["during"]["responsiveness_p99"]
+                / summary["before"]["responsiveness_p99"]
+            )
+        return summary
+
+    def generate(self):
+        """Generates the analysis results to the result file."""
+        summary = {}
+        modes = sorted(
+            self.sessions.keys(),
+            key=lambda m: (
+                self.sessions[m]["connect_rate"].iloc[0],
+                self.sessions[m]["burst_size"].iloc[0],
+            ),
+        )
+
+        fig, axs = plt.subplots(
+            len(modes), 2, figsize=(12, 3 * len(modes)), squeeze=False
+        )
+        fig.subplots_adjust(hspace=0.6, wspace=0.3)
+        fig.suptitle("Connection Storm Experiment")
+        for row, mode in enumerate(modes):
+            sessions = self.sessions[mode]
+            storm_start = sessions["scheduled_time"].min()
+            storm_end = sessions["end_time"].max()
+            mode_summary = self.__analyze_sessions(sessions)
+            requests = self.requests.get(mode)
+            if requests is not None and len(requests) > 0:
+                mode_summary["observers"] = self.__analyze_requests(
+                    requests, storm_start, storm_end
+                )
+            summary[mode] = mode_summary
+
+            t0 = storm_start
+            for status in ConnectionStormAnalysis.STATUSES:
+                frame = sessions[sessions["status"] == status]
+                if len(frame) > 0:
+                    plot_series(
+                        axs[row, 0],
+                        frame["scheduled_time"] - t0,
+                        frame["end_time"] - frame["start_time"],
+                        label=status,
+                    )
+            axs[row, 0].set(
+                title=f"Sessions, {mode}",
+                xlabel="Scheduled time (s)",
+                ylabel="Establishment time (s)",
+            )
+            axs[row, 0].legend(loc="upper left", markerscale=5, fontsize="x-small")
+
+            if requests is not None and len(requests) > 0:
+                successful = requests[requests["success"]]
+                plot_series(
+                    axs[row, 1],
+                    successful["start_time"] - t0,
+                    successful["end_time"] - successful["start_time"],
+                )
+            axs[row, 1].axvspan(0, storm_end - t0, color="red", alpha=0.1)
+            axs[row, 1].set(
+                title=f"Observer reads, {mode}",
+                xlabel="Time (s)",
+                ylabel="Response time (s)",
+            )
+
+        requests = pd.concat(
+            list(self.sessions.values()) + list(self.requests.values())
+        )
+        resources = generate_resource_analysis(
+            self.experiment_name,
+            requests,
+            "connection_storm",
+            "Connection Storm Experiment",
+        )
+        if resources is not None:
+            summary["resources"] = resources
+        harness = generate_loop_lag_analysis(
+            self.experiment_name,
+            requests,
+            "connection_storm",
+            "Connection Storm Experiment",
+        )
+        if harness is not None:
+            summary["harness"] = harness
+
+        output_dir = Path(f"data/{self.experiment_name}/results")
+        output_file = output_dir / "connection_storm_summary.json"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with open(output_file, "w") as f:
+            json.dump(summary, f, indent=4, default=float)
+        print(f"\t➡️ Analysis written to {str(output_file)}")
+
+        save_figure(fig, output_dir / "connection_storm.png")
+        print(f"\t➡️ Figure saved to {str(output_dir / 'connection_storm.png')}")
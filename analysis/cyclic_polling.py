@@ -0,0 +1,139 @@
+from pathlib import Path
+import json
+
+import pandas as pd
+import numpy as np
+from matplotlib import pyplot as plt
+
+from analysis.loop_lag import generate_loop_lag_analysis
+from analysis.plotting import save_figure
+from analysis.resources import generate_resource_analysis
+from experiments.store import ResultStore
+
+
+class CyclicPollingAnalysis:
+    """Process the results of the CyclicPollingExperiment."""
+
+    def __init__(self, experiment_name):
+        self.experiment_name = experiment_name
+        input_dir = Path(f"data/{self.experiment_name}/")
+
+        if not input_dir.exists():
+            raise ValueError(
+                f"Data directory for the experiment {self.experiment_name}, {input_dir}, does not exist."
+            )
+
+        with ResultStore() as store:
+            results = store.query(
+                run=self.experiment_name, experiment="CyclicPollingExperiment"
+            )
+        self.dataframes = [pd.read_csv(e_path) for e_path in results["path"]]
+        if len(self.dataframes) == 0:
+            raise ValueError(
+                f"No cyclic polling results in the experiment folder. Make sure to run the experiment first."
+            )
+
+    def __analyze_dataframe(self, frame, cycle_time):
+        """Computes the timeliness of the cycles of one cycle time and number of clients.
+
+        A cycle misses its deadline when its read fails or completes after the start of the next cycle, and every
+        cycle skipped because of an overrun counts as a miss.
+
+        Args:
+            frame (pd.DataFrame): executed cycles
+            cycle_time (float): cycle time, in seconds
+
+        Returns:
+            dict: start error, period jitter, completion time, deadline misses and worst-case overrun
+        """
+        frame = frame.sort_values(by=["client_id", "cycle"])
+        start_error = frame["start_time"] - frame["scheduled_time"]
+        completion_time = frame["end_time"] - frame["scheduled_time"]
+        overrun = frame["end_time"] - (frame["scheduled_time"] + cycle_time)
+        # Periods between the starts of consecutive cycles of each client
+        consecutive = frame.groupby("client_id")["cycle"].diff() == 1
+        period = frame.groupby("client_id")["start_time"].diff()[consecutive]
+        missed = (overrun > 0) | ~frame["success"].astype(bool)
+        scheduled = len(frame) + frame["skipped_cycles"].sum()
+
+        return {
+            "cycles": int(scheduled),
+            "skipped_cycles": int(frame["skipped_cycles"].sum()),
+            "start_error_mean": start_error.mean(),
+            "start_error_p99": np.percentile(start_error, 99),
+            "start_error_max": start_error.max(),
+            "period_mean": period.mean() if len(period) > 0 else None,
+            "period_jitter": period.std() if len(period) > 1 else None,
+            "period_error_max": (period - cycle_time).abs().max()
+            if len(period) > 0
+            else None,
+            "completion_time_mean": completion_time.mean(),
+            "completion_time_p99": np.percentile(completion_time, 99),
+            "completion_time_max": completion_time.max(),
+            "deadline_misses": int(missed.sum() + frame["skipped_cycles"].sum()),
+            "deadline_miss_rate": (missed.sum() + frame["skipped_cycles"].sum())
+            / scheduled,
+            "worst_case_overrun": max(0.0, overrun.max()),
+            "worst_case_overrun_cycles": max(0.0, overrun.max()) / cycle_time,
+        }
+
+    def generate(self):
+        """Generates the analysis results to the result file."""
+        summary = {}
+        frame = pd.concat(self.dataframes)
+
+        for cycle_time in sorted(frame["cycle_time"].unique()):
+            cycle_summary = {}
+            cycle_frame = frame[frame["cycle_time"] == cycle_time]
+            for n_clients in sorted(cycle_frame["n_clients"].unique()):
+                cycle_summary[str(n_clients)] = self.__analyze_dataframe(
+                    cycle_frame[cycle_frame["n_clients"] == n_clients], cycle_time
+                )
+            summary[f"{1000 * cycle_time:g}ms"] = cycle_summary
+
+        fig, axs = plt.subplots(1, 3, figsize=(13, 4))
+        fig.subplots_adjust(wspace=0.4)
+        fig.suptitle("Cyclic Polling Experiment")
+        for cycle, cycle_summary in summary.items():
+            levels = [int(n) for n in cycle_summary.keys()]
+            for ax, metric in zip(
+                axs, ["deadline_miss_rate", "worst_case_overrun", "period_jitter"]
+            ):
+                ax.plot(
+                    levels,
+                    [cycle_summary[str(n)][metric] for n in levels],
+                    label=cycle,
+                    marker="o",
+                )
+        axs[0].set(xlabel="Number of clients", ylabel="deadline_miss_rate")
+        axs[1].set(xlabel="Number of clients", ylabel="worst_case_overrun (s)")
+        axs[2].set(xlabel="Number of clients", ylabel="period_jitter (s)")
+        handles, labels = axs[0].get_legend_handles_labels()
+        fig.legend(handles, labels, loc="upper right", ncol=len(summary))
+
+        resources = generate_resource_analysis(
+            self.experiment_name,
+            frame,
+            "cyclic_polling",
+            "Cyclic Polling Experiment",
+        )
+        if resources is not None:
+            summary["resources"] = resources
+        harness = generate_loop_lag_analysis(
+            self.experiment_name,
+            frame,
+            "cyclic_polling",
+            "Cyclic Polling Experiment",
+        )
+        if harness is not None:
+            summary["harness"] = harness
+
+        output_dir = Path(f"data/{self.experiment_name}/results")
+        output_file = output_dir / "cyclic_polling_summary.json"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with open(output_file, "w") as f:
+            json.dump(summary, f, indent=4, default=float)
+        print(f"\t➡️ Analysis written to {str(output_file)}")
+
+        save_figure(fig, output_dir / "cyclic_polling.png")
+        print(f"\t➡️ Figure saved to {str(output_dir / 'cyclic_polling.png')}")
@@ -0,0 +1,82 @@
+from pathlib import Path
+import json
+
+import pandas as pd
+import numpy as np
+from matplotlib import pyplot as plt
+
+from analysis.plotting import save_figure
+
+
+class EncodingAnalysis:
+    """Process the results of the EncodingExperiment."""
+
+    def __init__(self, experiment_name):
+        self.experiment_name = experiment_name
+        input_dir = Path(f"data/{self.experiment_name}")
+        input_file = input_dir / "EncodingExperiment.csv"
+
+        if not input_dir.exists():
+            raise ValueError(
+                f"Data directory for the experiment {self.experiment_name}, {input_dir}, does not exist."
+            )
+        if not input_file.exists():
+            raise ValueError(
+                f"No encoding results in the experiment folder. Make sure to run the experiment first."
+            )
+
+        self.measurements = pd.read_csv(input_file)
+
+    def generate(self):
+        """Generates the analysis results to the result file."""
+        summary = {}
+        for payload, frame in self.measurements.groupby("payload", sort=False):
+            summary[payload] = {"encoded_size": int(frame["encoded_size"].iloc[0])}
+            for _, row in frame.iterrows():
+                summary[payload][row["operation"]] = {
+                    "messages_per_second": row["messages_per_second"],
+                    "bytes_per_second": row["bytes_per_second"],
+                    "cpu_time_per_message": row["cpu_time"] / row["iterations"],
+                    "peak_bytes_per_message": row["peak_bytes_per_message"],
+                    "retained_blocks_per_message": row["retained_blocks_per_message"],
+                }
+
+        payloads = list(summary.keys())
+        x = np.arange(len(payloads))
+        fig, axs = plt.subplots(2, 1, figsize=(11, 8))
+        fig.subplots_adjust(hspace=0.6)
+        fig.suptitle("Encoding Experiment")
+        for i, operation in enumerate(["encode", "decode"]):
+            frame = (
+                self.measurements[self.measurements["operation"] == operation]
+                .set_index("payload")
+                .reindex(payloads)
+            )
+            axs[0].bar(
+                x + (i - 0.5) * 0.4,
+                frame["messages_per_second"],
+                width=0.4,
+                label=operation,
+            )
+            axs[1].bar(
+                x + (i - 0.5) * 0.4,
+                frame["peak_bytes_per_message"],
+                width=0.4,
+                label=operation,
+            )
+        axs[0].set(title="Throughput", ylabel="Messages/s", yscale="log")
+        axs[1].set(title="Memory allocated", ylabel="Peak bytes/message", yscale="log")
+        for ax in axs:
+            ax.set_xticks(x)
+            ax.set_xticklabels(payloads, rotation=45, ha="right", fontsize="x-small")
+            ax.legend(fontsize="x-small")
+
+        output_dir = Path(f"data/{self.experiment_name}/results")
+        output_file = output_dir / "encoding_summary.json"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with open(output_file, "w") as f:
+            json.dump(summary, f, indent=4, default=float)
+        print(f"\t➡️ Analysis written to {str(output_file)}")
+
+        save_figure(fig, output_dir / "encoding.png")
+        print(f"\t➡️ Figure saved to {str(output_dir / 'encoding.png')}")
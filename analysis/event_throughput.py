@@ -0,0 +1,140 @@
+from pathlib import Path
+import json
+
+import pandas as pd
+import numpy as np
+from matplotlib import pyplot as plt
+
+from analysis.loop_lag import generate_loop_lag_analysis
+from analysis.plotting import save_figure
+from analysis.resources import generate_resource_analysis
+from experiments.store import ResultStore
+
+
+class EventThroughputAnalysis:
+    """Process the results of the EventThroughputExperiment."""
+
+    def __init__(self, experiment_name):
+        self.experiment_name = experiment_name
+        input_dir = Path(f"data/{self.experiment_name}/")
+
+        if not input_dir.exists():
+            raise ValueError(
+                f"Data directory for the experiment {self.experiment_name}, {input_dir}, does not exist."
+            )
+
+        with ResultStore() as store:
+            results = store.query(
+                run=self.experiment_name, experiment="EventThroughputExperiment"
+            )
+        self.events = {}
+        self.losses = {}
+        for result in results.to_dict("records"):
+            frames = self.events if result["kind"] == "events" else self.losses
+            frames[result["mode"]] = pd.read_csv(result["path"])
+        if len(self.events) == 0:
+            raise ValueError(
+                f"No event throughput results in the experiment folder. Make sure to run the experiment first."
+            )
+
+    def __analyze_dataframe(self, events, losses):
+        """Computes the delivery of the events to one number of clients.
+
+        Args:
+            events (pd.DataFrame): received events
+            losses (pd.DataFrame): expected, received and lost events of each client and event type
+
+        Returns:
+            dict: delivery latency, events/s per client and overall, and lost events
+        """
+        latency = events["receive_time"] - events["emit_time"]
+        # Rate of each client over the span of the events it received
+        span = losses.groupby("client_id").agg(
+            received=("received", "sum"),
+            first=("first_receive_time", "min"),
+            last=("last_receive_time", "max"),
+        )
+        client_rate = span["received"] / (span["last"] - span["first"])
+        summary = {
+            "events": len(events),
+            "events_per_second": len(events)
+            / (events["receive_time"].max() - events["receive_time"].min()),
+            "events_per_second_per_client_mean": client_rate.mean(),
+            "events_per_second_per_client_min": client_rate.min(),
+            "expected": int(losses["expected"].sum()),
+            "lost": int(losses["lost"].sum()),
+            "loss_rate": losses["lost"].sum() / losses["expected"].sum(),
+            "latency_mean": latency.mean(),
+        }
+        for q in [50, 90, 99]:
+            summary[f"latency_p{q}"] = np.percentile(latency, q)
+        summary["latency_max"] = latency.max()
+        return summary
+
+    def generate(self):
+        """Generates the analysis results to the result file."""
+        summary = {}
+        for event_filter, events in self.events.items():
+            losses = self.losses.get(event_filter)
+            if len(events) == 0 or losses is None:
+                continue
+            summary[event_filter] = {
+                str(n_clients): self.__analyze_dataframe(
+                    events[events["n_clients"] == n_clients],
+                    losses[losses["n_clients"] == n_clients],
+                )
+                for n_clients in sorted(events["n_clients"].unique())
+            }
+
+        fig, axs = plt.subplots(1, 3, figsize=(13, 4))
+        fig.subplots_adjust(wspace=0.4)
+        fig.suptitle("Event Throughput Experiment")
+        for event_filter, filter_summary in summary.items():
+            levels = [int(n) for n in filter_summary.keys()]
+            for ax, metric in zip(
+                axs,
+                ["latency_p99", "events_per_second_per_client_mean", "loss_rate"],
+            ):
+                ax.plot(
+                    levels,
+                    [filter_summary[str(n)][metric] for n in levels],
+                    label=event_filter,
+                    marker="o",
+                )
+        axs[0].set(xlabel="Number of clients", ylabel="latency_p99 (s)")
+        axs[1].set(xlabel="Number of clients", ylabel="events/s per client")
+        axs[2].set(xlabel="Number of clients", ylabel="loss_rate")
+        handles, labels = axs[0].get_legend_handles_labels()
+        fig.legend(handles, labels, loc="upper right", ncol=max(1, len(summary)))
+
+        # The delivery of an event spans from its emission to its reception
+        requests = pd.concat(self.events.values()).rename(
+            columns={"emit_time": "start_time", "receive_time": "end_time"}
+        )
+        if len(requests) > 0:
+            resources = generate_resource_analysis(
+                self.experiment_name,
+                requests,
+                "event_throughput",
+                "Event Throughput Experiment",
+            )
+            if resources is not None:
+                summary["resources"] = resources
+            harness = generate_loop_lag_analysis(
+                self.experiment_name,
+                requests,
+                "event_throughput",
+                "Event Throughput Experiment",
+            )
+            if harness is not None:
+                summary["harness"] = harness
+
+        output_dir = Path(f"data/{self.experiment_name}/results")
+        output_file = output_dir / "event_throughput_summary.json"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with open(output_file, "w") as f:
+            json.dump(summary, f, indent=4, default=float)
+        print(f"\t➡️ Analysis written to {str(output_file)}")
+
+        save_figure(fig, output_dir / "event_throughput.png")
+        print(f"\t➡️ Figure saved to {str(output_dir / 'event_throughput.png')}")
@@ -0,0 +1,129 @@
+from pathlib import Path
+import json
+
+import pandas as pd
+import numpy as np
+from matplotlib import pyplot as plt
+
+from analysis.loop_lag import generate_loop_lag_analysis
+from analysis.plotting import save_figure
+from analysis.resources import generate_resource_analysis
+
+
+class HistoryReadAnalysis:
+    """Process the results of the HistoryReadExperiment."""
+
+    def __init__(self, experiment_name):
+        self.experiment_name = experiment_name
+        input_dir = Path(f"data/{self.experiment_name}")
+        input_file = input_dir / "HistoryReadExperiment.csv"
+
+        if not input_dir.exists():
+            raise ValueError(
+                f"Data directory for the experiment {self.experiment_name}, {input_dir}, does not exist."
+            )
+        if not input_file.exists():
+            raise ValueError(
+                f"No history read results in the experiment folder. Make sure to run the experiment first."
+            )
+
+        self.pages = pd.read_csv(input_file)
+
+    def __analyze_dataframe(self, frame):
+        """Analyzes the pages of the reads for one time range and page size.
+
+        Returns:
+            dict: result summary
+        """
+        frame["responsiveness"] = frame["end_time"] - frame["start_time"]  # in seconds
+        reads = frame.groupby("read_id").agg(
+            start_time=("start_time", "min"),
+            end_time=("end_time", "max"),
+            n_values=("n_values", "sum"),
+            n_pages=("page_index", "count"),
+        )
+        reads["responsiveness"] = reads["end_time"] - reads["start_time"]
+
+        # Growth of the page latency with the position of the page in the history
+        page_latency = frame.groupby("page_index").responsiveness.mean()
+        page_latency_slope = (
+            np.polyfit(page_latency.index, page_latency.values, 1)[0]
+            if len(page_latency) > 1
+            else None
+        )
+
+        return {
+            "history_depth_mean": reads.n_values.mean(),
+            "pages_mean": reads.n_pages.mean(),
+            "read_responsiveness_mean": reads.responsiveness.mean(),
+            "read_jitter": reads.responsiveness.std(),
+            "samples_per_second": reads.n_values.sum() / reads.responsiveness.sum(),
+            "page_responsiveness_mean": frame.responsiveness.mean(),
+            "page_responsiveness_p99": np.percentile(frame.responsiveness, 99),
+            "page_responsiveness_slope": page_latency_slope,
+            "paging": frame["paging"].dropna().unique().tolist(),
+        }
+
+    def generate(self):
+        """Generates the analysis results to the result file."""
+        summary = {}
+        for (time_range, page_size), frame in self.pages.groupby(
+            ["time_range", "page_size"]
+        ):
+            summary[f"range_{time_range}_page_{page_size}"] = self.__analyze_dataframe(
+                frame.copy()
+            )
+            summary[f"range_{time_range}_page_{page_size}"]["time_range"] = time_range
+            summary[f"range_{time_range}_page_{page_size}"]["page_size"] = page_size
+
+        summary_df = pd.DataFrame.from_dict(summary, orient="index")
+        fig, axs = plt.subplots(1, 2, figsize=(9, 4))
+        fig.subplots_adjust(wspace=0.4)
+        fig.suptitle("History Read Experiment")
+        for page_size, frame in summary_df.groupby("page_size"):
+            label = "raw" if page_size == 0 else f"page size {page_size}"
+            axs[0].plot(
+                frame["history_depth_mean"],
+                frame["samples_per_second"],
+                label=label,
+                marker="o",
+            )
+            axs[1].plot(
+                frame["history_depth_mean"],
+                frame["page_responsiveness_mean"],
+                label=label,
+                marker="o",
+            )
+        axs[0].set(xlabel="History depth (values)", ylabel="samples_per_second")
+        axs[1].set(
+            xlabel="History depth (values)", ylabel="page_responsiveness_mean (s)"
+        )
+        handles, labels = axs[0].get_legend_handles_labels()
+        fig.legend(handles, labels, loc="upper right", ncol=2)
+
+        resources = generate_resource_analysis(
+            self.experiment_name,
+            self.pages,
+            "history_read",
+            "History Read Experiment",
+        )
+        if resources is not None:
+            summary["resources"] = resources
+        harness = generate_loop_lag_analysis(
+            self.experiment_name,
+            self.pages,
+            "history_read",
+            "History Read Experiment",
+        )
+        if harness is not None:
+            summary["harness"] = harness
+
+        output_dir = Path(f"data/{self.experiment_name}/results")
+        output_file = output_dir / "history_read_summary.json"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with open(output_file, "w") as f:
+            json.dump(summary, f, indent=4, default=int)
+        print(f"\t➡️ Analysis written to {str(output_file)}")
+
+        save_figure(fig, output_dir / "history_read.png")
+        print(f"\t➡️ Figure saved to {str(output_dir / 'history_read.png')}")
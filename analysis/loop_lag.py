@@ -0,0 +1,126 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from matplotlib import pyplot as plt
+
+from analysis.plotting import plot_series, save_figure
+
+# Share of the measured response times due to the harness event loop lag above which a run is flagged
+LAG_SHARE_WARNING = 0.1
+LAG_SHARE_INVALID = 0.5
+# Loop CPU utilisation above which the loop is considered saturated, in %
+LOOP_SATURATION_PERCENT = 90
+
+
+def load_loop_lag(experiment_name):
+    """Loads the event loop lag samples of a session (see experiments/loop_monitor.py).
+
+    Returns:
+        pd.DataFrame: the samples, None if the loop was not monitored
+    """
+    input_file = Path(f"data/{experiment_name}/loop_lag.csv")
+    if not input_file.exists():
+        return None
+    return pd.read_csv(input_file)
+
+
+def summarize_loop_lag(loop_lag, requests):
+    """Summarizes the event loop lag during requests, and its share of their response times.
+
+    The lag delays the processing of every response by the clients: when it is a large part of the response times,
+    they measure the harness rather than the server. The run is then flagged with a "warning" or "invalid" status.
+
+    Args:
+        loop_lag (pd.DataFrame): loop lag samples
+        requests (pd.DataFrame): requests, with start_time and end_time columns
+
+    Returns:
+        dict: lag and loop utilisation statistics, lag shares of the response times and status of the run
+    """
+    window = loop_lag[
+        (loop_lag["timestamp"] >= requests["start_time"].min())
+        & (loop_lag["timestamp"] <= requests["end_time"].max())
+    ]
+    if len(window) == 0:
+        return None
+    responsiveness = requests["end_time"] - requests["start_time"]
+    summary = {
+        "loop": str(window["loop"].iloc[0]),
+        "lag_mean": float(window.lag.mean()),
+        "lag_p99": float(np.percentile(window.lag, 99)),
+        "lag_max": float(window.lag.max()),
+        "loop_cpu_percent_mean": float(window.loop_cpu_percent.mean()),
+        "loop_cpu_percent_max": float(window.loop_cpu_percent.max()),
+        "loop_saturated_fraction": float(
+            (window.loop_cpu_percent >= LOOP_SATURATION_PERCENT).mean()
+        ),
+        "lag_share_mean": float(window.lag.mean() / responsiveness.mean()),
+        "lag_share_p99": float(
+            np.percentile(window.lag, 99) / np.percentile(responsiveness, 99)
+        ),
+    }
+    lag_share = max(summary["lag_share_mean"], summary["lag_share_p99"])
+    if lag_share >= LAG_SHARE_INVALID:
+        summary["status"] = "invalid"
+    elif lag_share >= LAG_SHARE_WARNING:
+        summary["status"] = "warning"
+    else:
+        summary["status"] = "valid"
+    return summary
+
+
+def plot_loop_lag_timeline(requests, loop_lag, output_file, title):
+    """Plots the response times of requests over time, above the lag and CPU utilisation of the harness event loop."""
+    t0 = requests["start_time"].min()
+    t1 = requests["end_time"].max()
+    window = loop_lag[(loop_lag["timestamp"] >= t0) & (loop_lag["timestamp"] <= t1)]
+
+    fig, axs = plt.subplots(3, 1, figsize=(9, 8), sharex=True)
+    fig.subplots_adjust(hspace=0.3)
+    fig.suptitle(title)
+    plot_series(
+        axs[0],
+        requests["start_time"] - t0,
+        requests["end_time"] - requests["start_time"],
+    )
+    axs[0].set(ylabel="Response time (s)")
+    axs[1].plot(window["timestamp"] - t0, window["lag"], linewidth=0.8)
+    axs[1].set(ylabel="Loop lag (s)")
+    axs[2].plot(window["timestamp"] - t0, window["loop_cpu_percent"], linewidth=0.8)
+    axs[2].axhline(LOOP_SATURATION_PERCENT, color="red", linestyle="--", linewidth=0.8)
+    axs[2].set(ylabel="Loop CPU (%)", xlabel="Time (s)")
+
+    save_figure(fig, output_file)
+    print(f"\t➡️ Figure saved to {str(output_file)}")
+
+
+def generate_loop_lag_analysis(experiment_name, requests, name, title):
+    """Summarizes and plots the event loop lag of the harness during the requests of an experiment, if the loop of
+    the session was monitored, and warns when the lag is a large part of the response times.
+
+    Args:
+        experiment_name (str): name of the session
+        requests (pd.DataFrame): requests of the experiment, with start_time and end_time columns
+        name (str): prefix of the figure file, e.g. "method_call" for results/method_call_loop_lag.png
+        title (str): title of the figure
+
+    Returns:
+        dict: summary of the loop lag (see summarize_loop_lag), None if the loop was not monitored
+    """
+    loop_lag = load_loop_lag(experiment_name)
+    if loop_lag is None:
+        return None
+    summary = summarize_loop_lag(loop_lag, requests)
+    if summary is None:
+        return None
+    if summary["status"] != "valid":
+        print(
+            f'\t⚠️ Harness event loop lag is {100 * max(summary["lag_share_mean"], summary["lag_share_p99"]):.0f}% of the response times of {title}: the run is {summary["status"]}, use fewer clients per process.'
+        )
+    output_dir = Path(f"data/{experiment_name}/results")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    plot_loop_lag_timeline(
+        requests, loop_lag, output_dir / f"{name}_loop_lag.png", title
+    )
+    return summary
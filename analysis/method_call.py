@@ -0,0 +1,163 @@
+from pathlib import Path
+import json
+
+import pandas as pd
+import numpy as np
+from matplotlib import pyplot as plt
+
+from analysis.loop_lag import generate_loop_lag_analysis
+from analysis.plotting import save_figure
+from analysis.resources import generate_resource_analysis
+from experiments.sampling import sampling_summary
+from experiments.store import ResultStore
+
+
+class MethodCallAnalysis:
+    """Process the results of the MethodCallExperiment."""
+
+    def __init__(self, experiment_name):
+        self.experiment_name = experiment_name
+        input_dir = Path(f"data/{self.experiment_name}/")
+
+        if not input_dir.exists():
+            raise ValueError(
+                f"Data directory for the experiment {self.experiment_name}, {input_dir}, does not exist."
+            )
+
+        with ResultStore() as store:
+            results = store.query(
+                run=self.experiment_name, experiment="MethodCallExperiment"
+            )
+        self.dataframes = [pd.read_csv(e_path) for e_path in results["path"]]
+        if len(self.dataframes) == 0:
+            raise ValueError(
+                f"No method call results in the experiment folder. Make sure to run the experiment first."
+            )
+
+    def __max_server_overlap(self, frame):
+        """Computes the maximum number of method executions running at the same time on the server.
+
+        Args:
+            frame (pd.DataFrame): measurements of one number of concurrent clients
+
+        Returns:
+            int: maximum number of overlapping executions, None if the server times were not returned
+        """
+        if frame["server_start_time"].isna().all():
+            return None
+        events = pd.concat(
+            [
+                pd.DataFrame({"time": frame["server_start_time"], "delta": 1}),
+                pd.DataFrame({"time": frame["server_end_time"], "delta": -1}),
+            ]
+        ).sort_values(
+            by=["time", "delta"]
+        )  # ends before starts at equal times
+        return int(events["delta"].cumsum().max())
+
+    def __analyze_dataframe(self, frame):
+        frame["responsiveness"] = frame["end_time"] - frame["start_time"]  # in seconds
+        duration = frame["end_time"].max() - frame["start_time"].min()
+
+        return {
+            "responsiveness_mean": frame.responsiveness.mean(),
+            "jitter": frame.responsiveness.std(),
+            "responsiveness_p99": np.percentile(frame.responsiveness, 99),
+            "calls_per_second": len(frame) / duration,
+            "max_server_overlap": self.__max_server_overlap(frame),
+            # Sample size reached and precision of the response times
+            "sampling": sampling_summary(frame.responsiveness),
+        }
+
+    def __execution_model(self, speedup, n_clients):
+        """Classifies how the server executes concurrent method calls, from the throughput speedup.
+
+        Args:
+            speedup (float): throughput with n_clients relative to the throughput with the fewest clients
+            n_clients (int): relative number of concurrent clients
+
+        Returns:
+            str: "serial", "concurrent" or "partially concurrent"
+        """
+        if n_clients <= 1:
+            return None
+        if speedup < 1.5:
+            return "serial"
+        if speedup >= 0.5 * n_clients:
+            return "concurrent"
+        return "partially concurrent"
+
+    def generate(self):
+        """Generates the analysis results to the result file."""
+        summary = {}
+        frame = pd.concat(self.dataframes)
+
+        for work in frame["mode"].unique():
+            work_summary = {}
+            work_frame = frame[frame["mode"] == work]
+            for n_clients in sorted(work_frame["n_clients"].unique()):
+                work_summary[str(n_clients)] = self.__analyze_dataframe(
+                    work_frame[work_frame["n_clients"] == n_clients].copy()
+                )
+
+            levels = sorted(int(n) for n in work_summary.keys())
+            base = work_summary[str(levels[0])]["calls_per_second"]
+            for n_clients in levels:
+                speedup = work_summary[str(n_clients)]["calls_per_second"] / base
+                work_summary[str(n_clients)]["speedup"] = speedup
+                work_summary[str(n_clients)]["parallel_efficiency"] = speedup / (
+                    n_clients / levels[0]
+                )
+            work_summary["execution_model"] = self.__execution_model(
+                work_summary[str(levels[-1])]["speedup"], levels[-1] / levels[0]
+            )
+            summary[f"{work}_mode"] = work_summary
+
+        fig, axs = plt.subplots(1, 2, figsize=(9, 4))
+        fig.subplots_adjust(wspace=0.4)
+        fig.suptitle("Method Call Experiment")
+        for work, work_summary in summary.items():
+            levels = [int(n) for n in work_summary.keys() if n != "execution_model"]
+            axs[0].plot(
+                levels,
+                [work_summary[str(n)]["responsiveness_mean"] for n in levels],
+                label=work.removesuffix("_mode"),
+                marker="o",
+            )
+            axs[1].plot(
+                levels,
+                [work_summary[str(n)]["calls_per_second"] for n in levels],
+                label=work.removesuffix("_mode"),
+                marker="o",
+            )
+        axs[0].set(xlabel="Number of clients", ylabel="responsiveness_mean (s)")
+        axs[1].set(xlabel="Number of clients", ylabel="calls_per_second")
+        handles, labels = axs[0].get_legend_handles_labels()
+        fig.legend(handles, labels, loc="upper right", ncol=2)
+
+        resources = generate_resource_analysis(
+            self.experiment_name,
+            frame,
+            "method_call",
+            "Method Call Experiment",
+        )
+        if resources is not None:
+            summary["resources"] = resources
+        harness = generate_loop_lag_analysis(
+            self.experiment_name,
+            frame,
+            "method_call",
+            "Method Call Experiment",
+        )
+        if harness is not None:
+            summary["harness"] = harness
+
+        output_dir = Path(f"data/{self.experiment_name}/results")
+        output_file = output_dir / "method_call_summary.json"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with open(output_file, "w") as f:
+            json.dump(summary, f, indent=4)
+        print(f"\t➡️ Analysis written to {str(output_file)}")
+
+        save_figure(fig, output_dir / "method_call.png")
+        print(f"\t➡️ Figure saved to {str(output_dir / 'method_call.png')}")
@@ -0,0 +1,146 @@
+from pathlib import Path
+import json
+
+import pandas as pd
+import numpy as np
+from matplotlib import pyplot as plt
+
+from analysis.loop_lag import generate_loop_lag_analysis
+from analysis.plotting import save_figure
+from analysis.resources import generate_resource_analysis
+from analysis.traffic import summarize_traffic
+from experiments.sampling import sampling_summary
+from experiments.store import ResultStore
+
+
+class NodeIdFormsAnalysis:
+    """Process the results of the NodeIdFormsExperiment."""
+
+    FORMS = ["string", "numeric", "registered"]
+
+    def __init__(self, experiment_name):
+        self.experiment_name = experiment_name
+        input_dir = Path(f"data/{self.experiment_name}/")
+
+        if not input_dir.exists():
+            raise ValueError(
+                f"Data directory for the experiment {self.experiment_name}, {input_dir}, does not exist."
+            )
+
+        with ResultStore() as store:
+            results = store.query(
+                run=self.experiment_name, experiment="NodeIdFormsExperiment"
+            )
+        self.requests = pd.concat(
+            [pd.read_csv(path) for path in results["path"]]
+            if len(results) > 0
+            else [pd.DataFrame()]
+        )
+        if len(self.requests) == 0:
+            raise ValueError(
+                f"No node ID form results in the experiment folder. Make sure to run the experiment first."
+            )
+
+    def __analyze_dataframe(self, requests):
+        """Computes the latency, traffic and resolution time of the requests of one form.
+
+        Returns:
+            dict: latency percentiles, wire traffic, encoded size of the node IDs and resolution time per request
+        """
+        latency = requests["end_time"] - requests["start_time"]
+        summary = {
+            "requests": len(requests),
+            "n_nodes": int(requests["n_nodes"].iloc[0]),
+            "node_id_bytes_per_request": int(requests["node_id_bytes"].iloc[0]),
+            "resolve_time_mean": requests["resolve_time"].mean(),
+            "latency_mean": latency.mean(),
+        }
+        for q in [50, 90, 99]:
+            summary[f"latency_p{q}"] = np.percentile(latency, q)
+        summary.update(summarize_traffic(requests))
+        # Sample size reached and precision of the response times
+        summary["sampling"] = sampling_summary(latency)
+        return summary
+
+    def generate(self):
+        """Generates the analysis results to the result file."""
+        summary = {}
+        services = sorted(self.requests["mode"].unique())
+        for service in services:
+            requests = self.requests[self.requests["mode"] == service]
+            forms = [f for f in NodeIdFormsAnalysis.FORMS if f in set(requests["form"])]
+            summary[service] = {
+                form: self.__analyze_dataframe(requests[requests["form"] == form])
+                for form in forms
+            }
+            # Numeric node IDs are the cheapest to look up: the difference in median latency with the other forms
+            # estimates the overhead of their lookup on the server, per node
+            if "numeric" in summary[service]:
+                reference = summary[service]["numeric"]
+                for form, form_summary in summary[service].items():
+                    form_summary["lookup_overhead_per_node"] = (
+                        form_summary["latency_p50"] - reference["latency_p50"]
+                    ) / form_summary["n_nodes"]
+
+        fig, axs = plt.subplots(
+            len(services), 2, figsize=(11, 3.5 * len(services)), squeeze=False
+        )
+        fig.subplots_adjust(hspace=0.5, wspace=0.3)
+        fig.suptitle("Node ID Forms Experiment")
+        for row, service in enumerate(services):
+            requests = self.requests[self.requests["mode"] == service]
+            forms = list(summary[service].keys())
+            axs[row, 0].boxplot(
+                [
+                    (r["end_time"] - r["start_time"]) * 1000
+                    for r in [requests[requests["form"] == form] for form in forms]
+                ],
+                showfliers=False,
+            )
+            axs[row, 0].set_xticklabels(forms)
+            axs[row, 0].set(title=f"{service} latency", ylabel="Response time (ms)")
+            axs[row, 1].bar(
+                forms,
+                [summary[service][form]["node_id_bytes_per_request"] for form in forms],
+                label="node IDs",
+            )
+            if "wire_bytes_sent_per_request" in summary[service][forms[0]]:
+                axs[row, 1].plot(
+                    forms,
+                    [
+                        summary[service][form]["wire_bytes_sent_per_request"]
+                        for form in forms
+                    ],
+                    color="black",
+                    marker="o",
+                    label="request on the wire",
+                )
+            axs[row, 1].set(title=f"{service} request size", ylabel="Bytes")
+            axs[row, 1].legend(loc="lower right", fontsize="x-small")
+
+        resources = generate_resource_analysis(
+            self.experiment_name,
+            self.requests,
+            "node_id_forms",
+            "Node ID Forms Experiment",
+        )
+        if resources is not None:
+            summary["resources"] = resources
+        harness = generate_loop_lag_analysis(
+            self.experiment_name,
+            self.requests,
+            "node_id_forms",
+            "Node ID Forms Experiment",
+        )
+        if harness is not None:
+            summary["harness"] = harness
+
+        output_dir = Path(f"data/{self.experiment_name}/results")
+        output_file = output_dir / "node_id_forms_summary.json"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with open(output_file, "w") as f:
+            json.dump(summary, f, indent=4, default=float)
+        print(f"\t➡️ Analysis written to {str(output_file)}")
+
+        save_figure(fig, output_dir / "node_id_forms.png")
+        print(f"\t➡️ Figure saved to {str(output_dir / 'node_id_forms.png')}")
@@ -4,8 +4,11 @@ import matplotlib
 import matplotlib.pyplot as plt
 import matplotlib.style as style
 import matplotlib.gridspec as gridspec
-import seaborn as sns
-import json, glob, os
+import json, os
+from pathlib import Path
+
+from analysis.plotting import LogHistogram, save_figure
+from experiments.store import ResultStore
 
 
 def __parse_node_nb(string):
@@ -16,64 +19,81 @@ def __parse_node_nb(string):
         return 63 if string == "ALL" else int(string)
 
 
-def __load_session_data(experiment_prefix):
-    data_files = glob.glob(
-        f"{experiment_prefix}*/results/response_times_summary.json", recursive=True
-    )
-    experiment_summaries = {}
-    for file in data_files:
-        with open(file, "r") as f:
-            content = json.load(f)
-            content = content["read_mode"]
-        experiment_name = file.split("/")[1]
-        content["movement"] = experiment_name.split("_")[-1] == "movementon"
-        content["nodes_read"] = __parse_node_nb(experiment_name.split("_")[3])
-        experiment_summaries[file.split("/")[1]] = content
-    summary_data = pd.DataFrame(experiment_summaries.values()).sort_values(
-        by=["movement", "nodes_read"]
-    )
-
-    data_files = glob.glob(
-        f"{experiment_prefix}*/ResponsivenessJitterThroughputExperiment_read.csv",
-        recursive=True,
-    )
-    experiment_details = {}
-    for file in data_files:
-        experiment_name = file.split("/")[1]
-        experiment_details[experiment_name] = pd.read_csv(file)
-        experiment_details[experiment_name]["movement"] = (
-            experiment_name.split("_")[-1] == "movementon"
+def __index_legacy_sessions(store, experiment_prefix):
+    # Sessions recorded before the result store encode the node count and movement in their names
+    prefix = Path(experiment_prefix)
+    for session_dir in prefix.parent.glob(f"{prefix.name}*"):
+        results = store.query(
+            run=session_dir.name,
+            experiment="ResponsivenessJitterThroughputExperiment",
         )
-        experiment_details[experiment_name]["nodes_read"] = __parse_node_nb(
-            experiment_name.split("_")[3]
+        if len(results) == 0 or "movement" in results.columns:
+            continue
+        store.tag(
+            session_dir.name,
+            parameters={
+                "movement": session_dir.name.split("_")[-1] == "movementon",
+                "nodes_read": __parse_node_nb(session_dir.name.split("_")[3]),
+            },
         )
-        experiment_details[experiment_name]["responsiveness"] = (
-            experiment_details[experiment_name]["end_time"]
-            - experiment_details[experiment_name]["start_time"]
-        )  # in seconds
-        experiment_details[experiment_name]["throughput"] = (
-            experiment_details[experiment_name]["data_size"]
-            / experiment_details[experiment_name]["responsiveness"]
-        )  # in bytes/s
-        experiment_details[experiment_name].drop(
-            ["start_time", "end_time", "mode"], axis=1, inplace=True
+
+
+def __load_session_data(experiment_prefix):
+    """Loads the read response times of the sessions of the experiment prefix tagged with a movement parameter (see
+    the --tag option of the controller), for each number of nodes read."""
+    with ResultStore() as store:
+        __index_legacy_sessions(store, experiment_prefix)
+        results = store.query(
+            experiment="ResponsivenessJitterThroughputExperiment",
+            mode="read",
+            parameters={"movement": [True, False]},
+            run_prefix=Path(experiment_prefix).name,
         )
-    detailed_data = pd.concat(experiment_details.values()).sort_values(
-        by=["movement", "nodes_read"]
-    )
 
-    return (experiment_summaries, summary_data, experiment_details, detailed_data)
+    # Response time and throughput histograms of each movement and number of nodes, built one file at a time
+    histograms = {"responsiveness": {}, "throughput": {}}
+    for result in results.to_dict("records"):
+        frame = pd.read_csv(result["path"])
+        movement = bool(result["movement"])
+        nodes_read = int(
+            result["nodes_read"]
+            if not pd.isna(result.get("nodes_read"))
+            else len(json.loads(result["node_ids"]))
+        )
+        responsiveness = frame["end_time"] - frame["start_time"]  # in seconds
+        throughput = frame["data_size"] / responsiveness  # in bytes/s
+        histograms["responsiveness"].setdefault(
+            (movement, nodes_read), LogHistogram()
+        ).add(responsiveness)
+        histograms["throughput"].setdefault(
+            (movement, nodes_read), LogHistogram(min_value=1, max_value=1e12)
+        ).add(throughput)
+
+    summary_data = pd.DataFrame(
+        [
+            {
+                "movement": movement,
+                "nodes_read": nodes_read,
+                "responsiveness_mean": histogram.mean,
+                "jitter": histogram.std,
+                "throughput_mean": histograms["throughput"][
+                    (movement, nodes_read)
+                ].mean,
+                "throughput_std": histograms["throughput"][(movement, nodes_read)].std,
+            }
+            for (movement, nodes_read), histogram in histograms[
+                "responsiveness"
+            ].items()
+        ]
+    ).sort_values(by=["movement", "nodes_read"])
+
+    return (summary_data, histograms)
 
 
 if __name__ == "__main__":
     # Read in data
     EXPERIMENT_PREFIX = "data/wfl_21_june_"
-    (
-        experiment_summaries,
-        summary_data,
-        experiment_details,
-        detailed_data,
-    ) = __load_session_data(EXPERIMENT_PREFIX)
+    (summary_data, histograms) = __load_session_data(EXPERIMENT_PREFIX)
 
     # Report on data
     style.use("ggplot")
@@ -142,24 +162,38 @@ if __name__ == "__main__":
                     metric = "responsiveness"
                 else:
                     metric = "throughput"
-                p = sns.boxplot(
-                    data=detailed_data,
-                    y=metric,
-                    x="nodes_read",
-                    hue="movement",
-                    ax=ax,
-                    hue_order=[True, False],
-                    showfliers=True,
-                    flierprops={"marker": "o", "markersize": 1},
-                    palette={False: "#1f77b490", True: (0.82, 0.33, 0.24)},
-                    linewidth=1,
-                )
-                p.set(xlabel="Number of nodes", ylabel=f"{metric.capitalize()}")
-                if innerind == 0:
-                    p.get_legend().remove()
-                for patch in ax.artists:
-                    fc = patch.get_facecolor()
-                    patch.set_facecolor(matplotlib.colors.to_rgba(fc, 0.3))
+                # Box plots drawn from the histograms, in a time independent of the number of samples
+                node_counts = sorted(summary_data["nodes_read"].unique())
+                palette = {False: "#1f77b490", True: (0.82, 0.33, 0.24)}
+                for k, movement in enumerate([True, False]):
+                    positions = [
+                        i + (k - 0.5) * 0.4
+                        for i, nodes_read in enumerate(node_counts)
+                        if (movement, nodes_read) in histograms[metric]
+                    ]
+                    if len(positions) == 0:
+                        continue
+                    boxes = ax.bxp(
+                        [
+                            histograms[metric][(movement, nodes_read)].box_stats()
+                            for nodes_read in node_counts
+                            if (movement, nodes_read) in histograms[metric]
+                        ],
+                        positions=positions,
+                        widths=0.35,
+                        patch_artist=True,
+                        showfliers=True,
+                        flierprops={"marker": "o", "markersize": 1},
+                        boxprops={
+                            "facecolor": matplotlib.colors.to_rgba(
+                                palette[movement], 0.3
+                            ),
+                            "linewidth": 1,
+                        },
+                    )
+                    boxes["boxes"][0].set_label(str(movement))
+                ax.set_xticks(range(len(node_counts)), node_counts)
+                ax.set(xlabel="Number of nodes", ylabel=f"{metric.capitalize()}")
 
                 ax.set_title(
                     f"{metric.capitalize()} distributions for different amounts of nodes being read",
@@ -196,6 +230,4 @@ if __name__ == "__main__":
 
     # plt.show()
     os.mkdir(f"{EXPERIMENT_PREFIX}NODE_SCALING_RESULT")
-    plt.savefig(
-        f"{EXPERIMENT_PREFIX}NODE_SCALING_RESULT/node_scaling_summary.png", dpi=350
-    )
+    save_figure(fig, f"{EXPERIMENT_PREFIX}NODE_SCALING_RESULT/node_scaling_summary.png")
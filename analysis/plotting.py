@@ -0,0 +1,198 @@
+import numpy as np
+from matplotlib import pyplot as plt
+
+# Series longer than this are drawn as a min/median/max envelope over MAX_POINTS time buckets
+MAX_POINTS = 5000
+# Resolution of the figures, and in compact mode (see set_compact_figures)
+FIGURE_DPI = 250
+COMPACT_FIGURE_DPI = 100
+
+_compact_figures = False
+
+
+def set_compact_figures(compact):
+    """Saves the next figures as compact raster images: lower resolution, every artist rasterized (also in vector
+    formats such as PDF or SVG) and optimized PNG encoding."""
+    global _compact_figures
+    _compact_figures = bool(compact)
+
+
+def save_figure(fig, output_file):
+    """Saves a figure with the resolution of the current mode (see set_compact_figures), and closes it."""
+    if _compact_figures:
+        for ax in fig.get_axes():
+            ax.set_rasterized(True)
+        fig.savefig(
+            output_file,
+            dpi=COMPACT_FIGURE_DPI,
+            **(
+                {"pil_kwargs": {"optimize": True}}
+                if str(output_file).endswith(".png")
+                else {}
+            ),
+        )
+    else:
+        fig.savefig(output_file, dpi=FIGURE_DPI)
+    plt.close(fig)
+
+
+class LogHistogram:
+    """Histogram over fixed logarithmic bins, to summarize millions of samples (response times, throughputs) in a
+    constant size while aggregating them.
+
+    Histograms with the same bins are merged by adding their counts, so the histogram of a group of runs is built
+    from the histograms of each run. Quantiles are interpolated within a bin, with a relative error below the bin
+    width (about 5% with 50 bins per decade).
+    """
+
+    def __init__(self, min_value=1e-6, max_value=1e3, bins_per_decade=50):
+        """
+        Args:
+            min_value: lower bound of the first bin, smaller values are counted in the first bin
+            max_value: upper bound of the last bin, larger values are counted in the last bin
+            bins_per_decade: number of bins per power of 10
+        """
+        self.edges = np.logspace(
+            np.log10(min_value),
+            np.log10(max_value),
+            int(round(np.log10(max_value / min_value) * bins_per_decade)) + 1,
+        )
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.total = 0.0
+        self.total_squares = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def add(self, values):
+        """Counts samples, ignoring NaN values."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        clipped = np.clip(values, self.edges[0], self.edges[-1])
+        indices = np.searchsorted(self.edges, clipped, side="right") - 1
+        self.counts += np.bincount(
+            np.clip(indices, 0, len(self.counts) - 1), minlength=len(self.counts)
+        )
+        self.total += values.sum()
+        self.total_squares += np.square(values).sum()
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        return self
+
+    def merge(self, other):
+        """Adds the counts of a histogram with the same bins."""
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Cannot merge histograms with different bins")
+        self.counts += other.counts
+        self.total += other.total
+        self.total_squares += other.total_squares
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def count(self):
+        return int(self.counts.sum())
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count > 0 else np.nan
+
+    @property
+    def std(self):
+        """Sample standard deviation, as pandas computes it."""
+        if self.count < 2:
+            return np.nan
+        variance = (self.total_squares - self.total**2 / self.count) / (
+            self.count - 1
+        )
+        return np.sqrt(max(0.0, variance))
+
+    def quantile(self, q):
+        """Quantile interpolated within its bin (log-linearly), exact for the minimum and maximum."""
+        if self.count == 0:
+            return np.nan
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        cumulative = np.cumsum(self.counts)
+        rank = q * self.count
+        i = int(np.searchsorted(cumulative, rank))
+        below = cumulative[i - 1] if i > 0 else 0
+        fraction = (rank - below) / self.counts[i]
+        low, high = np.log10(self.edges[i]), np.log10(self.edges[i + 1])
+        return float(np.clip(10 ** (low + fraction * (high - low)), self.min, self.max))
+
+    def density(self):
+        """Probability density of each bin.
+
+        Returns:
+            np.ndarray: centers of the non-empty range of bins
+            np.ndarray: density of each of these bins
+        """
+        nonzero = np.flatnonzero(self.counts)
+        if len(nonzero) == 0:
+            return np.array([]), np.array([])
+        window = slice(nonzero[0], nonzero[-1] + 1)
+        widths = np.diff(self.edges)[window]
+        centers = np.sqrt(self.edges[:-1] * self.edges[1:])[window]
+        return centers, self.counts[window] / (self.count * widths)
+
+    def plot_density(self, ax, label=None, color=None, alpha=0.5):
+        """Draws the probability density as a filled step curve, in a time independent of the number of samples."""
+        centers, density = self.density()
+        ax.fill_between(
+            centers, density, step="mid", alpha=alpha, color=color, label=label
+        )
+        ax.step(centers, density, where="mid", color=color, linewidth=0.8)
+
+    def box_stats(self, label=None):
+        """Box plot statistics for Axes.bxp: quartiles and whiskers at 1.5 IQR, the extreme values standing for the
+        outliers when they are beyond the whiskers."""
+        q1, median, q3 = self.quantile(0.25), self.quantile(0.5), self.quantile(0.75)
+        iqr = q3 - q1
+        whislo = max(self.min, q1 - 1.5 * iqr)
+        whishi = min(self.max, q3 + 1.5 * iqr)
+        return {
+            "label": label,
+            "med": median,
+            "q1": q1,
+            "q3": q3,
+            "whislo": whislo,
+            "whishi": whishi,
+            "fliers": [v for v in [self.min, self.max] if v < whislo or v > whishi],
+        }
+
+
+def downsample_series(x, y, max_points=MAX_POINTS):
+    """Reduces a series to max_points buckets of equal x range, keeping the minimum, median and maximum of each.
+
+    Returns:
+        np.ndarray: center of each non-empty bucket
+        np.ndarray: minimum of each bucket
+        np.ndarray: median of each bucket
+        np.ndarray: maximum of each bucket
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(x.min(), x.max(), max_points + 1)
+    buckets = np.clip(np.searchsorted(edges, x, side="right") - 1, 0, max_points - 1)
+    order = np.lexsort((y, buckets))
+    buckets, y = buckets[order], y[order]
+    starts = np.flatnonzero(np.r_[True, np.diff(buckets) != 0])
+    ends = np.r_[starts[1:], len(y)]
+    centers = (edges[buckets[starts]] + edges[buckets[starts] + 1]) / 2
+    return centers, y[starts], y[(starts + ends - 1) // 2], y[ends - 1]
+
+
+def plot_series(ax, x, y, label=None, max_points=MAX_POINTS):
+    """Scatters a series, or draws its min/max envelope and median over max_points buckets when it is longer, so
+    that the rendering time does not depend on the number of samples."""
+    if len(x) <= max_points:
+        ax.scatter(x, y, s=1, label=label)
+        return
+    centers, low, median, high = downsample_series(x, y, max_points)
+    (line,) = ax.plot(centers, median, linewidth=0.6, label=label)
+    ax.fill_between(centers, low, high, color=line.get_color(), alpha=0.3, linewidth=0)
@@ -0,0 +1,118 @@
+from pathlib import Path
+import json
+
+import pandas as pd
+from matplotlib import pyplot as plt
+
+from analysis.loop_lag import generate_loop_lag_analysis
+from analysis.plotting import save_figure
+from analysis.resources import generate_resource_analysis
+
+
+class RecoveryAnalysis:
+    """Process the results of the RecoveryExperiment."""
+
+    FAULTS = ["kill", "restart", "drop"]
+
+    def __init__(self, experiment_name):
+        self.experiment_name = experiment_name
+        input_dir = Path(f"data/{self.experiment_name}")
+
+        if not input_dir.exists():
+            raise ValueError(
+                f"Data directory for the experiment {self.experiment_name}, {input_dir}, does not exist."
+            )
+
+        self.faults = {}
+        self.requests = {}
+        for fault in RecoveryAnalysis.FAULTS:
+            input_file = input_dir / f"RecoveryExperiment_{fault}.csv"
+            if input_file.exists():
+                self.faults[fault] = pd.read_csv(input_file)
+                self.requests[fault] = pd.read_csv(
+                    input_dir / f"RecoveryExperiment_{fault}_requests.csv"
+                )
+        if len(self.faults) == 0:
+            raise ValueError(
+                f"No recovery results in the experiment folder. Make sure to run the experiment first."
+            )
+
+    def __analyze_dataframe(self, frame):
+        frame["detection_time"] = (
+            frame["detect_time"] - frame["fault_time"]
+        )  # in seconds
+        frame["server_restart_time"] = frame["server_up_time"] - frame["fault_time"]
+        frame["reconnection_time"] = frame["connected_time"] - frame["detect_time"]
+        frame["subscription_restore_time"] = (
+            frame["restored_time"] - frame["connected_time"]
+        )
+        frame["recovery_time"] = frame["restored_time"] - frame["fault_time"]
+
+        summary = {"faults": len(frame)}
+        for metric in [
+            "detection_time",
+            "server_restart_time",
+            "reconnection_time",
+            "subscription_restore_time",
+            "recovery_time",
+        ]:
+            summary[f"{metric}_mean"] = frame[metric].mean()
+            summary[f"{metric}_max"] = frame[metric].max()
+        summary["connection_attempts_mean"] = frame.connection_attempts.mean()
+        summary["requests_lost_mean"] = frame.requests_lost.mean()
+        summary["requests_lost_total"] = int(frame.requests_lost.sum())
+        return summary
+
+    def generate(self):
+        """Generates the analysis results to the result file."""
+        summary = {}
+        for fault, frame in self.faults.items():
+            summary[f"{fault}_fault"] = self.__analyze_dataframe(frame)
+
+        fig, axs = plt.subplots(
+            len(self.faults), 1, figsize=(9, 3 * len(self.faults)), squeeze=False
+        )
+        fig.subplots_adjust(hspace=0.6)
+        fig.suptitle("Recovery Experiment")
+        for ax, (fault, requests) in zip(axs[:, 0], self.requests.items()):
+            t0 = requests["start_time"].min()
+            ok = requests[requests["success"]]
+            ax.plot(
+                ok["start_time"] - t0,
+                ok["end_time"] - ok["start_time"],
+                linewidth=0.5,
+            )
+            for fault_time in self.faults[fault]["fault_time"]:
+                ax.axvline(fault_time - t0, color="red", linestyle="--", linewidth=0.8)
+            ax.set(
+                title=f"{fault} faults",
+                xlabel="Time (s)",
+                ylabel="Response time (s)",
+            )
+
+        resources = generate_resource_analysis(
+            self.experiment_name,
+            pd.concat(self.requests.values()),
+            "recovery",
+            "Recovery Experiment",
+        )
+        if resources is not None:
+            summary["resources"] = resources
+        harness = generate_loop_lag_analysis(
+            self.experiment_name,
+            pd.concat(self.requests.values()),
+            "recovery",
+            "Recovery Experiment",
+        )
+        if harness is not None:
+            summary["harness"] = harness
+
+        output_dir = Path(f"data/{self.experiment_name}/results")
+        output_file = output_dir / "recovery_summary.json"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with open(output_file, "w") as f:
+            json.dump(summary, f, indent=4)
+        print(f"\t➡️ Analysis written to {str(output_file)}")
+
+        save_figure(fig, output_dir / "recovery.png")
+        print(f"\t➡️ Figure saved to {str(output_dir / 'recovery.png')}")
@@ -0,0 +1,78 @@
+from pathlib import Path
+import json
+
+import pandas as pd
+import numpy as np
+
+from analysis.loop_lag import generate_loop_lag_analysis
+from analysis.resources import generate_resource_analysis
+
+
+class ReplayAnalysis:
+    """Process the results of the ReplayExperiment."""
+
+    def __init__(self, experiment_name):
+        self.experiment_name = experiment_name
+        input_dir = Path(f"data/{self.experiment_name}")
+        input_file = input_dir / "ReplayExperiment.csv"
+
+        if not input_dir.exists():
+            raise ValueError(
+                f"Data directory for the experiment {self.experiment_name}, {input_dir}, does not exist."
+            )
+        if not input_file.exists():
+            raise ValueError(
+                f"No replay results in the experiment folder. Make sure to run the experiment first."
+            )
+
+        self.operations = pd.read_csv(input_file)
+
+    def __analyze_dataframe(self, frame):
+        frame["responsiveness"] = frame["end_time"] - frame["start_time"]  # in seconds
+        # Delay between the traced time of the operation and the time it was sent
+        frame["schedule_lag"] = frame["start_time"] - frame["scheduled_time"]
+        duration = frame["end_time"].max() - frame["start_time"].min()
+        successful = frame[frame["success"]]
+
+        return {
+            "operations": len(frame),
+            "failures": int((~frame["success"]).sum()),
+            "responsiveness_mean": successful.responsiveness.mean(),
+            "jitter": successful.responsiveness.std(),
+            "responsiveness_p99": np.percentile(successful.responsiveness, 99)
+            if len(successful)
+            else None,
+            "operations_per_second": len(frame) / duration if duration > 0 else None,
+            "schedule_lag_mean": frame.schedule_lag.mean(),
+            "schedule_lag_p99": np.percentile(frame.schedule_lag, 99),
+        }
+
+    def generate(self):
+        """Generates the analysis results to the result file."""
+        summary = {"all": self.__analyze_dataframe(self.operations.copy())}
+        for service, frame in self.operations.groupby("mode"):
+            summary[f"{service}_mode"] = self.__analyze_dataframe(frame.copy())
+
+        resources = generate_resource_analysis(
+            self.experiment_name,
+            self.operations,
+            "replay",
+            "Replay Experiment",
+        )
+        if resources is not None:
+            summary["resources"] = resources
+        harness = generate_loop_lag_analysis(
+            self.experiment_name,
+            self.operations,
+            "replay",
+            "Replay Experiment",
+        )
+        if harness is not None:
+            summary["harness"] = harness
+
+        output_dir = Path(f"data/{self.experiment_name}/results")
+        output_file = output_dir / "replay_summary.json"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with open(output_file, "w") as f:
+            json.dump(summary, f, indent=4)
+        print(f"\t➡️ Analysis written to {str(output_file)}")
@@ -0,0 +1,126 @@
+from pathlib import Path
+
+import pandas as pd
+from matplotlib import pyplot as plt
+
+from analysis.plotting import plot_series, save_figure
+
+# Resource metrics summarized and plotted for each process, with their plot label
+RESOURCE_METRICS = {
+    "cpu_percent": "CPU (%)",
+    "rss_bytes": "RSS (MB)",
+    "threads": "Threads",
+    "open_sockets": "Open sockets",
+    "voluntary_switches_per_second": "Voluntary switches/s",
+    "involuntary_switches_per_second": "Involuntary switches/s",
+}
+
+
+def load_resources(experiment_name):
+    """Loads the resource samples of a session (see experiments/resources.py).
+
+    Returns:
+        pd.DataFrame: the samples, None if the resources were not sampled
+    """
+    input_file = Path(f"data/{experiment_name}/resources.csv")
+    if not input_file.exists():
+        return None
+    return pd.read_csv(input_file)
+
+
+def summarize_resources(resources, start_time, end_time):
+    """Summarizes the resource usage of each process between two times.
+
+    Args:
+        resources (pd.DataFrame): resource samples
+        start_time (float): start of the time window, e.g. of the first request of an experiment
+        end_time (float): end of the time window
+
+    Returns:
+        dict: mean and max of each metric, per process
+    """
+    window = resources[
+        (resources["timestamp"] >= start_time) & (resources["timestamp"] <= end_time)
+    ]
+    summary = {}
+    for process, samples in window.groupby("process"):
+        process_summary = {"samples": len(samples)}
+        for metric in RESOURCE_METRICS:
+            process_summary[f"{metric}_mean"] = float(samples[metric].mean())
+            process_summary[f"{metric}_max"] = float(samples[metric].max())
+        summary[process] = process_summary
+    return summary
+
+
+def plot_resource_timeline(requests, resources, output_file, title):
+    """Plots the response times of requests over time, above the CPU usage, memory and context switches of the
+    processes over the same time window, to relate latency spikes to the resource usage of either side.
+
+    Args:
+        requests (pd.DataFrame): requests, with start_time, end_time and optionally mode columns
+        resources (pd.DataFrame): resource samples
+        output_file (Path): path of the figure
+        title (str): title of the figure
+    """
+    t0 = requests["start_time"].min()
+    t1 = requests["end_time"].max()
+    window = resources[(resources["timestamp"] >= t0) & (resources["timestamp"] <= t1)]
+
+    fig, axs = plt.subplots(4, 1, figsize=(9, 10), sharex=True)
+    fig.subplots_adjust(hspace=0.3)
+    fig.suptitle(title)
+    groups = requests.groupby("mode") if "mode" in requests else [("", requests)]
+    for mode, frame in groups:
+        plot_series(
+            axs[0],
+            frame["start_time"] - t0,
+            frame["end_time"] - frame["start_time"],
+            label=mode,
+        )
+    axs[0].set(ylabel="Response time (s)")
+    if "mode" in requests:
+        axs[0].legend(loc="upper right", markerscale=5)
+    for process, samples in window.groupby("process"):
+        time = samples["timestamp"] - t0
+        axs[1].plot(time, samples["cpu_percent"], label=process, linewidth=0.8)
+        axs[2].plot(time, samples["rss_bytes"] / 1e6, label=process, linewidth=0.8)
+        axs[3].plot(
+            time,
+            samples["voluntary_switches_per_second"]
+            + samples["involuntary_switches_per_second"],
+            label=process,
+            linewidth=0.8,
+        )
+    axs[1].set(ylabel=RESOURCE_METRICS["cpu_percent"])
+    axs[2].set(ylabel=RESOURCE_METRICS["rss_bytes"])
+    axs[3].set(ylabel="Context switches/s", xlabel="Time (s)")
+    axs[1].legend(loc="upper right")
+
+    save_figure(fig, output_file)
+    print(f"\t➡️ Figure saved to {str(output_file)}")
+
+
+def generate_resource_analysis(experiment_name, requests, name, title):
+    """Summarizes and plots the resource usage of the processes during the requests of an experiment, if the
+    resources of the session were sampled.
+
+    Args:
+        experiment_name (str): name of the session
+        requests (pd.DataFrame): requests of the experiment, with start_time and end_time columns
+        name (str): prefix of the figure file, e.g. "method_call" for results/method_call_resources.png
+        title (str): title of the figure
+
+    Returns:
+        dict: summary of the resource usage per process, None if the resources were not sampled
+    """
+    resources = load_resources(experiment_name)
+    if resources is None:
+        return None
+    output_dir = Path(f"data/{experiment_name}/results")
+    output_dir.mkdir(parents=True, exist_ok=True)
+    plot_resource_timeline(
+        requests, resources, output_dir / f"{name}_resources.png", title
+    )
+    return summarize_resources(
+        resources, requests["start_time"].min(), requests["end_time"].max()
+    )
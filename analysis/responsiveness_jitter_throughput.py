@@ -1,14 +1,23 @@
 from pathlib import Path
 import json
 
+import numpy as np
 import pandas as pd
 
+from analysis.loop_lag import generate_loop_lag_analysis
+from analysis.resources import generate_resource_analysis
+from analysis.traffic import has_wire_counts, summarize_traffic
+from experiments.sampling import sampling_summary
+
 
 class ResponsivenessJitterThroughputAnalysis:
     """Process the results of the ResponsivenessJitterThroughputExperiment."""
 
     MODE_READ = "read"
     MODE_WRITE = "write"
+    MODE_TIMESTAMPS = "timestamps"
+    # Fraction of the requests with the lowest round-trip delay used to estimate the clock offset
+    CLOCK_OFFSET_QUANTILE = 0.1
 
     def __init__(self, experiment_name):
         self.experiment_name = experiment_name
@@ -19,14 +28,21 @@ class ResponsivenessJitterThroughputAnalysis:
         input_file_write = (
             input_dir / "ResponsivenessJitterThroughputExperiment_write.csv"
         )
+        input_file_timestamps = (
+            input_dir / "ResponsivenessJitterThroughputExperiment_timestamps.csv"
+        )
 
         if not input_dir.exists():
             raise ValueError(
                 f"Data directory for the experiment {self.experiment_name}, {input_dir}, does not exist."
             )
-        if not input_file_read.exists() and not input_file_write.exists():
+        if (
+            not input_file_read.exists()
+            and not input_file_write.exists()
+            and not input_file_timestamps.exists()
+        ):
             raise ValueError(
-                f"No response time results (neither read nor write) in the experiment folder. Make sure to run the experiment first."
+                f"No response time results (neither read, write nor timestamps) in the experiment folder. Make sure to run the experiment first."
             )
 
         self.response_times_read = (
@@ -35,6 +51,11 @@ class ResponsivenessJitterThroughputAnalysis:
         self.response_times_write = (
             pd.read_csv(input_file_write) if input_file_write.exists() else None
         )
+        self.response_times_timestamps = (
+            pd.read_csv(input_file_timestamps)
+            if input_file_timestamps.exists()
+            else None
+        )
 
     def __generate_response_times(self, mode):
         """Generate the response time analysis for a given mode.
@@ -58,12 +79,112 @@ class ResponsivenessJitterThroughputAnalysis:
         throughput_mean = data.throughput.mean()
         throughput_std = data.throughput.std()
 
-        return {
+        summary = {
             "responsiveness_mean": responsiveness_mean,
             "jitter": jitter,
             "throughput_mean": throughput_mean,
             "throughput_std": throughput_std,
         }
+        if has_wire_counts(data):
+            wire_throughput = (
+                data["wire_bytes_sent"] + data["wire_bytes_received"]
+            ) / data[
+                "responsiveness"
+            ]  # in bytes/s
+            summary["wire_throughput_mean"] = wire_throughput.mean()
+            summary["wire_throughput_std"] = wire_throughput.std()
+        summary.update(summarize_traffic(data))
+        # Sample size reached and precision of the response times
+        summary["sampling"] = sampling_summary(data.responsiveness)
+        return summary
+
+    def __estimate_clock_offset(self, data):
+        """Estimates the offset of the server clock relative to the client clock, NTP-style.
+
+        Each request gives an offset ((T2 - T1) + (T3 - T4)) / 2 and a round-trip delay
+        (T4 - T1) - (T3 - T2), with T1/T4 the client send/receive times and T2/T3 the server
+        receive/send times. As in NTP, only the requests with the lowest delay are kept, since
+        their offsets are the least affected by asymmetric queuing.
+
+        Args:
+            data (pd.DataFrame): timestamps mode measurements
+
+        Returns:
+            float: offset of the server clock (server - client), in seconds
+            float: round-trip delay of the retained requests, in seconds
+        """
+        offset = (
+            (data["server_timestamp"] - data["start_time"])
+            + (data["response_timestamp"] - data["end_time"])
+        ) / 2
+        delay = (data["end_time"] - data["start_time"]) - (
+            data["response_timestamp"] - data["server_timestamp"]
+        )
+        best = delay <= delay.quantile(
+            ResponsivenessJitterThroughputAnalysis.CLOCK_OFFSET_QUANTILE
+        )
+        return offset[best].median(), delay[best].median()
+
+    def __generate_latency_decomposition(self):
+        """Splits the response times of the timestamps mode into request transit, server processing and response transit.
+
+        Returns:
+            dict: result summary
+        """
+        data = self.response_times_timestamps.copy()
+        data["responsiveness"] = data["end_time"] - data["start_time"]  # in seconds
+
+        # The ServerTimestamp is only a receive time if the server stamps values when they are read,
+        # otherwise (e.g. cached values) it falls outside of the request and processing is not observable.
+        processing = data["response_timestamp"] - data["server_timestamp"]
+        observable = (
+            data["server_timestamp"].notna()
+            & (processing >= 0)
+            & (processing <= data["responsiveness"])
+        )
+        data.loc[~observable, "server_timestamp"] = data.loc[
+            ~observable, "response_timestamp"
+        ]
+        data["server_processing"] = (
+            data["response_timestamp"] - data["server_timestamp"]
+        )
+
+        clock_offset, path_delay = self.__estimate_clock_offset(data)
+        data["request_transit"] = (
+            data["server_timestamp"] - clock_offset - data["start_time"]
+        )
+        data["response_transit"] = data["end_time"] - (
+            data["response_timestamp"] - clock_offset
+        )
+        # Age of the value when it reaches the client, and when the server read it
+        data["source_age"] = data["end_time"] - (
+            data["source_timestamp"] - clock_offset
+        )
+        data["source_age_at_server"] = (
+            data["server_timestamp"] - data["source_timestamp"]
+        )
+
+        summary = {
+            "responsiveness_mean": data.responsiveness.mean(),
+            "jitter": data.responsiveness.std(),
+            "clock_offset": clock_offset,
+            "clock_offset_path_delay": path_delay,
+            "server_processing_observable_ratio": observable.mean(),
+        }
+        for component in [
+            "request_transit",
+            "server_processing",
+            "response_transit",
+            "source_age",
+            "source_age_at_server",
+        ]:
+            values = data[component].dropna()
+            summary[f"{component}_mean"] = values.mean() if len(values) else None
+            summary[f"{component}_std"] = values.std() if len(values) else None
+            summary[f"{component}_p99"] = (
+                np.percentile(values, 99) if len(values) else None
+            )
+        return summary
 
     def generate(self):
         """Generates the analysis results to the result file."""
@@ -78,6 +199,36 @@ class ResponsivenessJitterThroughputAnalysis:
                 ResponsivenessJitterThroughputAnalysis.MODE_WRITE
             )
             summary["write_mode"] = write_summary
+        if self.response_times_timestamps is not None:
+            summary["timestamps_mode"] = self.__generate_latency_decomposition()
+
+        requests = pd.concat(
+            [
+                frame
+                for frame in [
+                    self.response_times_read,
+                    self.response_times_write,
+                    self.response_times_timestamps,
+                ]
+                if frame is not None
+            ]
+        )
+        resources = generate_resource_analysis(
+            self.experiment_name,
+            requests,
+            "response_times",
+            "Responsiveness Jitter Throughput Experiment",
+        )
+        if resources is not None:
+            summary["resources"] = resources
+        harness = generate_loop_lag_analysis(
+            self.experiment_name,
+            requests,
+            "response_times",
+            "Responsiveness Jitter Throughput Experiment",
+        )
+        if harness is not None:
+            summary["harness"] = harness
 
         output_dir = Path(f"data/{self.experiment_name}/results")
         output_file = output_dir / "response_times_summary.json"
@@ -4,6 +4,11 @@ import json
 import pandas as pd
 import numpy as np
 
+from analysis.loop_lag import generate_loop_lag_analysis
+from analysis.resources import generate_resource_analysis
+from analysis.traffic import server_throughput, summarize_traffic
+from experiments.store import ResultStore
+
 
 class ScalabilityAnalysis:
     """_summary_"""
@@ -11,23 +16,22 @@ class ScalabilityAnalysis:
     def __init__(self, experiment_name):
         self.experiment_name = experiment_name
         input_dir = Path(f"data/{self.experiment_name}/")
-        input_files_read = Path(input_dir).glob(
-            "ScalabilityExperiment_*_ResponsivenessJitterThroughputExperiment_read.csv"
-        )
-        input_files_write = Path(input_dir).glob(
-            "ScalabilityExperiment_*_ResponsivenessJitterThroughputExperiment_write.csv"
-        )
 
         if not input_dir.exists():
             raise ValueError(
                 f"Data directory for the experiment {self.experiment_name}, {input_dir}, does not exist."
             )
 
+        with ResultStore() as store:
+            results = store.query(
+                run=self.experiment_name, experiment="ScalabilityExperiment"
+            )
         self.read_dataframes = [
-            pd.read_csv(e_path) for e_path in input_files_read if e_path.is_file()
+            pd.read_csv(e_path) for e_path in results[results["mode"] == "read"]["path"]
         ]
         self.write_dataframes = [
-            pd.read_csv(e_path) for e_path in input_files_write if e_path.is_file()
+            pd.read_csv(e_path)
+            for e_path in results[results["mode"] == "write"]["path"]
         ]
         if len(self.read_dataframes) == 0 and len(self.write_dataframes) == 0:
             raise ValueError(
@@ -72,11 +76,18 @@ class ScalabilityAnalysis:
                 read_throughput_means.append(through_mean)
                 read_throughput_stds.append(through_std)
 
+            read_throughput = server_throughput(self.read_dataframes) or {}
             read_summary = {
+                # Throughput the server delivered to all the clients together, while they all ran
+                "server_ops_per_second": read_throughput.get("ops_per_second"),
+                "server_bytes_per_second": read_throughput.get("bytes_per_second"),
                 "responsiveness_mean": np.mean(read_responsivenesses),
                 "jitter_mean": np.mean(read_jitters),
                 "throughput_mean": np.mean(read_throughput_means),
                 "throughput_mean_std": np.mean(read_throughput_stds),
+                # Traffic of all the clients together
+                **summarize_traffic(pd.concat(self.read_dataframes)),
+                "server_throughput": read_throughput,
             }
             summary["read_mode"] = read_summary
 
@@ -93,14 +104,38 @@ class ScalabilityAnalysis:
                 write_throughput_means.append(through_mean)
                 write_throughput_stds.append(through_std)
 
+            write_throughput = server_throughput(self.write_dataframes) or {}
             write_summary = {
+                # Throughput the server delivered to all the clients together, while they all ran
+                "server_ops_per_second": write_throughput.get("ops_per_second"),
+                "server_bytes_per_second": write_throughput.get("bytes_per_second"),
                 "responsiveness_mean": np.mean(write_responsivenesses),
                 "jitter_mean": np.mean(write_jitters),
                 "throughput_mean": np.mean(write_throughput_means),
                 "throughput_mean_std": np.mean(write_throughput_stds),
+                # Traffic of all the clients together
+                **summarize_traffic(pd.concat(self.write_dataframes)),
+                "server_throughput": write_throughput,
             }
             summary["write_mode"] = write_summary
 
+        resources = generate_resource_analysis(
+            self.experiment_name,
+            pd.concat(self.read_dataframes + self.write_dataframes),
+            "scalability",
+            "Scalability Experiment",
+        )
+        if resources is not None:
+            summary["resources"] = resources
+        harness = generate_loop_lag_analysis(
+            self.experiment_name,
+            pd.concat(self.read_dataframes + self.write_dataframes),
+            "scalability",
+            "Scalability Experiment",
+        )
+        if harness is not None:
+            summary["harness"] = harness
+
         output_dir = Path(f"data/{self.experiment_name}/results")
         output_file = output_dir / "scalability_summary.json"
         output_dir.mkdir(parents=True, exist_ok=True)
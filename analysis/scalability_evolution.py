@@ -1,12 +1,17 @@
 from pathlib import Path
 import json
-import os
 import seaborn as sns
 
 import pandas as pd
 import numpy as np
 from matplotlib import pyplot as plt
 
+from analysis.loop_lag import generate_loop_lag_analysis
+from analysis.plotting import LogHistogram, save_figure
+from analysis.resources import generate_resource_analysis
+from analysis.traffic import server_throughput, summarize_traffic
+from experiments.store import ResultStore
+
 
 class ScalabilityEvolutionAnalysis:
     """_summary_"""
@@ -18,36 +23,26 @@ class ScalabilityEvolutionAnalysis:
         self.evolutions_write = []
         self.write_dataframes = []
         input_dir = Path(f"data/{self.experiment_name}/")
-        input_files_read = Path(input_dir).glob(
-            "ScalabilityEvolutionExperiment_*_ScalabilityExperiment_*_ResponsivenessJitterThroughputExperiment_read.csv"
-        )
-        input_files_write = Path(input_dir).glob(
-            "ScalabilityEvolutionExperiment_*_ScalabilityExperiment_*_ResponsivenessJitterThroughputExperiment_write.csv"
-        )
 
         if not input_dir.exists():
             raise ValueError(
                 f"Data directory for the experiment {self.experiment_name}, {input_dir}, does not exist."
             )
 
-        for filname in input_files_read:
-            self.evolutions_read.append(os.path.basename(filname).split("_")[1])
-        self.evolutions_read = set(self.evolutions_read)
+        with ResultStore() as store:
+            results = store.query(
+                run=self.experiment_name, experiment="ScalabilityEvolutionExperiment"
+            )
+        results_read = results[results["mode"] == "read"]
+        results_write = results[results["mode"] == "write"]
 
-        for filname in input_files_write:
-            self.evolutions_write.append(os.path.basename(filname).split("_")[1])
-        self.evolutions_write = set(self.evolutions_write)
+        self.evolutions_read = sorted(set(results_read["n_clients"]))
+        self.evolutions_write = sorted(set(results_write["n_clients"]))
 
         for evolution in self.evolutions_read:
-            input_files_read_evo = Path(input_dir).glob(
-                "ScalabilityEvolutionExperiment_"
-                + str(evolution)
-                + "_ScalabilityExperiment_*_ResponsivenessJitterThroughputExperiment_read.csv"
-            )
             read_dataframes_evo = [
                 pd.read_csv(e_path)
-                for e_path in input_files_read_evo
-                if e_path.is_file()
+                for e_path in results_read[results_read["n_clients"] == evolution]["path"]
             ]
             if len(read_dataframes_evo) != int(evolution):
                 raise ValueError(
@@ -56,15 +51,9 @@ class ScalabilityEvolutionAnalysis:
             self.read_dataframes.append(read_dataframes_evo)
 
         for evolution in self.evolutions_write:
-            input_files_write_evo = Path(input_dir).glob(
-                "ScalabilityEvolutionExperiment_"
-                + str(evolution)
-                + "_ScalabilityExperiment_*_ResponsivenessJitterThroughputExperiment_write.csv"
-            )
             write_dataframes_evo = [
                 pd.read_csv(e_path)
-                for e_path in input_files_write_evo
-                if e_path.is_file()
+                for e_path in results_write[results_write["n_clients"] == evolution]["path"]
             ]
             if len(write_dataframes_evo) != int(evolution):
                 raise ValueError(
@@ -92,6 +81,8 @@ class ScalabilityEvolutionAnalysis:
     def generate(self):
         """ """
         summary = {}
+        # Response time histograms of each mode and number of clients, merged over the clients
+        histograms = {}
 
         for evolution in range(
                 len(self.evolutions_read)
@@ -100,13 +91,13 @@ class ScalabilityEvolutionAnalysis:
             read_jitters = []
             read_throughput_means = []
             read_throughput_stds = []
-            read_responsiveness = []
+            read_histogram = LogHistogram()
 
             write_responsivenesses = []
             write_jitters = []
             write_throughput_means = []
             write_throughput_stds = []
-            write_responsiveness = []
+            write_histogram = LogHistogram()
 
             if len(self.read_dataframes) != 0:
                 for read_dataframe in self.read_dataframes[evolution]:
@@ -121,17 +112,26 @@ class ScalabilityEvolutionAnalysis:
                     read_jitters.append(jitter_mean)
                     read_throughput_means.append(through_mean)
                     read_throughput_stds.append(through_std)
-                    read_responsiveness.append(list(responsiveness))
+                    read_histogram.add(responsiveness)
 
+                read_throughput = server_throughput(self.read_dataframes[evolution]) or {}
                 read_summary = {
+                    # Throughput the server delivered to all the clients together, while they all ran
+                    "server_ops_per_second": read_throughput.get("ops_per_second"),
+                    "server_bytes_per_second": read_throughput.get("bytes_per_second"),
                     "responsiveness_mean": np.mean(read_responsivenesses),
                     "jitter_mean": np.mean(read_jitters),
                     "throughput_mean": np.mean(read_throughput_means),
                     "throughput_mean_std": np.mean(read_throughput_stds),
-                    "responsiveness": list(read_responsiveness),
+                    "responsiveness_p50": read_histogram.quantile(0.5),
+                    "responsiveness_p99": read_histogram.quantile(0.99),
+                    # Traffic of all the clients together
+                    **summarize_traffic(pd.concat(self.read_dataframes[evolution])),
+                    "server_throughput": read_throughput,
                 }
                 clients = len(self.read_dataframes[evolution])
                 summary[str("read_mode_" + str(clients))] = read_summary
+                histograms[("read", clients)] = read_histogram
 
                 if len(self.write_dataframes) != 0:
                     for write_dataframe in self.write_dataframes[evolution]:
@@ -146,17 +146,26 @@ class ScalabilityEvolutionAnalysis:
                         write_jitters.append(jitter_mean)
                         write_throughput_means.append(through_mean)
                         write_throughput_stds.append(through_std)
-                        write_responsiveness.append(list(responsiveness))
+                        write_histogram.add(responsiveness)
 
+                    write_throughput = server_throughput(self.write_dataframes[evolution]) or {}
                     write_summary = {
+                        # Throughput the server delivered to all the clients together, while they all ran
+                        "server_ops_per_second": write_throughput.get("ops_per_second"),
+                        "server_bytes_per_second": write_throughput.get("bytes_per_second"),
                         "responsiveness_mean": np.mean(write_responsivenesses),
                         "jitter_mean": np.mean(write_jitters),
                         "throughput_mean": np.mean(write_throughput_means),
                         "throughput_mean_std": np.mean(write_throughput_stds),
-                        "responsiveness": list(write_responsiveness),
+                        "responsiveness_p50": write_histogram.quantile(0.5),
+                        "responsiveness_p99": write_histogram.quantile(0.99),
+                        # Traffic of all the clients together
+                        **summarize_traffic(pd.concat(self.write_dataframes[evolution])),
+                        "server_throughput": write_throughput,
                     }
                     clients = len(self.write_dataframes[evolution])
                     summary[str("write_mode_" + str(clients))] = write_summary
+                    histograms[("write", clients)] = write_histogram
 
         # Create a dataframe with the summary
         summary_df = pd.DataFrame.from_dict(summary, orient="index")
@@ -168,7 +177,13 @@ class ScalabilityEvolutionAnalysis:
         summary_df = summary_df.sort_index(level=[0, 1])
 
         modes = summary_df.index.get_level_values(0).unique()
-        metrics = summary_df.columns
+        # Metrics plotted against the number of clients
+        metrics = [
+            "responsiveness_mean",
+            "jitter_mean",
+            "server_ops_per_second",
+            "server_bytes_per_second",
+        ]
 
         fig, axs = plt.subplots(2, 3, figsize=(9, 5))
         fig.subplots_adjust(hspace=0.5, wspace=0.5)
@@ -177,7 +192,7 @@ class ScalabilityEvolutionAnalysis:
             for j in [0, 1]:
                 for m in modes:
                     idx_vals = summary_df.loc[m, metrics[i + 2 * j]].index.values
-                    vals = summary_df.loc[m, metrics[i + 2 * j]].values
+                    vals = summary_df.loc[m, metrics[i + 2 * j]].astype(float).values
                     axs[i, j].plot(
                         idx_vals,
                         vals,
@@ -190,7 +205,7 @@ class ScalabilityEvolutionAnalysis:
                         ylabel=str(metrics[i + 2 * j])
                                + (
                                    " (bytes/s)"
-                                   if metrics[i + 2 * j] == "throughput_mean"
+                                   if metrics[i + 2 * j] == "server_bytes_per_second"
                                    else ""
                                )
                                + (
@@ -203,39 +218,16 @@ class ScalabilityEvolutionAnalysis:
         handles, labels = axs[0, 0].get_legend_handles_labels()
         fig.legend(handles, labels, loc="upper right", ncol=2)
 
+        # Densities drawn from the histograms, in a time independent of the number of samples
         for m in range(0, len(modes)):
-            vals = summary_df.loc[modes[m], "responsiveness"].values
-            n_client = summary_df.loc[modes[m], "responsiveness"].index.values
-
-            # create a dtaframe with "n_client", "responsiveness" as columns
-            df = pd.DataFrame(columns=["responsiveness"])
-            df.index.name = 'n_client'
-
-            for i in range(len(vals)):
-                for _ in range(len(vals[i])):
-                    if n_client[i] in df.index:
-                        df.loc[n_client[i], 'responsiveness'] = np.append(
-                            np.asarray(df.loc[n_client[i], 'responsiveness']), (vals[i][0]))
-                    else:
-                        df.loc[n_client[i], 'responsiveness'] = vals[i][0]
-
-            df_exploded = df.explode('responsiveness')
-            df_exploded = df_exploded.reset_index()
-
-            unique_clients = list(pd.unique(df_exploded.n_client))
-
-            for nc in unique_clients:
-                sns.kdeplot(
-                        x=df_exploded.loc[df_exploded.n_client == nc, 'responsiveness'],
-                        fill=True,
-                        hue=df_exploded.n_client,
-                        palette="crest",
-                        alpha=.5,
-                        label=nc,
-                        ax=axs[m, 2])
-
-            axs[m, 2].set_xlim(right=max(df_exploded.responsiveness)*0.8)
-            axs[m, 2].legend().set_title('n client')
+            unique_clients = list(summary_df.loc[modes[m]].index.values)
+            colors = sns.color_palette("crest", len(unique_clients))
+
+            for nc, color in zip(unique_clients, colors):
+                histograms[(modes[m], nc)].plot_density(axs[m, 2], label=nc, color=color)
+
+            axs[m, 2].set_xlim(right=max(histograms[(modes[m], nc)].max for nc in unique_clients)*0.8)
+            axs[m, 2].legend(title='n client')
             axs[m, 2].set_ylabel('Probability density estimate')
             axs[m, 2].set_xlabel(f'response time {modes[m]}')
 
@@ -243,6 +235,30 @@ class ScalabilityEvolutionAnalysis:
         if len(modes) == 1:
             axs[1, 2].remove()
 
+        requests = pd.concat(
+            [
+                frame
+                for frames in self.read_dataframes + self.write_dataframes
+                for frame in frames
+            ]
+        )
+        resources = generate_resource_analysis(
+            self.experiment_name,
+            requests,
+            "scalability_Evolution",
+            "Scalability Evolution Experiment",
+        )
+        if resources is not None:
+            summary["resources"] = resources
+        harness = generate_loop_lag_analysis(
+            self.experiment_name,
+            requests,
+            "scalability_Evolution",
+            "Scalability Evolution Experiment",
+        )
+        if harness is not None:
+            summary["harness"] = harness
+
         output_dir = Path(f"data/{self.experiment_name}/results")
         output_file = output_dir / "scalability_Evolution_summary.json"
         output_dir.mkdir(parents=True, exist_ok=True)
@@ -250,5 +266,5 @@ class ScalabilityEvolutionAnalysis:
             json.dump(summary, f, indent=4)
         print(f"\t➡️ Analysis written to {str(output_file)}")
 
-        fig.savefig(output_dir / "scalability_Evolution.png", dpi=250)
+        save_figure(fig, output_dir / "scalability_Evolution.png")
         print(f"\t➡️ Figure saved to {str(output_dir / 'scalability_Evolution.png')}")
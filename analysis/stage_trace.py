@@ -0,0 +1,99 @@
+from pathlib import Path
+import json
+
+import pandas as pd
+import numpy as np
+from matplotlib import pyplot as plt
+
+from analysis.plotting import save_figure
+from experiments.stage_trace import STAGES, STAMPS
+
+
+class StageTraceAnalysis:
+    """Breaks the response times of the requests traced in a session (see experiments/stage_trace.py) down into the
+    stages of the asyncua client stack, for each experiment and service."""
+
+    def __init__(self, experiment_name):
+        self.experiment_name = experiment_name
+        input_file = Path(f"data/{self.experiment_name}/stage_trace.csv")
+
+        if not input_file.exists():
+            raise ValueError(
+                f"No stage trace in the experiment folder, {input_file}. Make sure to run the experiment with --trace-stages first."
+            )
+        self.trace = pd.read_csv(input_file)
+        self.trace["experiment"] = self.trace["experiment"].fillna("unknown")
+
+    @staticmethod
+    def stage_durations(trace):
+        """Durations of the stages of each request, in seconds.
+
+        Returns:
+            pd.DataFrame: one column per stage (see STAGES), and the total response time
+        """
+        stamps = trace[[f"{stamp}_ns" for stamp in STAMPS]].to_numpy(dtype=float)
+        durations = np.diff(stamps, axis=1, prepend=0) / 1e9
+        frame = pd.DataFrame(durations, columns=STAGES, index=trace.index)
+        frame["total"] = stamps[:, -1] / 1e9
+        return frame
+
+    def __analyze_dataframe(self, durations):
+        summary = {"requests": len(durations)}
+        for stage in STAGES + ["total"]:
+            summary[stage] = {
+                "mean": durations[stage].mean(),
+                "p50": np.percentile(durations[stage], 50),
+                "p99": np.percentile(durations[stage], 99),
+                "share": durations[stage].mean() / durations["total"].mean(),
+            }
+        return summary
+
+    def generate(self):
+        """Generates the analysis results to the result file."""
+        summary = {}
+        durations = self.stage_durations(self.trace)
+        groups = list(self.trace.groupby(["experiment", "service"]).groups.items())
+        for (experiment, service), index in groups:
+            summary.setdefault(experiment, {})[service] = self.__analyze_dataframe(
+                durations.loc[index]
+            )
+
+        # Mean duration and share of each stage, stacked for each experiment and service
+        labels = [f"{experiment}\n{service}" for (experiment, service), _ in groups]
+        fig, axs = plt.subplots(
+            1,
+            2,
+            figsize=(13, 2 + 0.6 * len(groups)),
+            sharey=True,
+            squeeze=False,
+            layout="constrained",
+        )
+        fig.suptitle("Request stages")
+        for ax, (statistic, scale, xlabel) in zip(
+            axs[0],
+            [("mean", 1000, "Mean duration (ms)"), ("share", 100, "Share (%)")],
+        ):
+            left = np.zeros(len(groups))
+            for stage in STAGES:
+                values = np.array(
+                    [
+                        scale * summary[experiment][service][stage][statistic]
+                        for (experiment, service), _ in groups
+                    ]
+                )
+                ax.barh(labels, values, left=left, label=stage)
+                left += values
+            ax.set(xlabel=xlabel)
+            ax.tick_params(axis="y", labelsize="x-small")
+        handles, legend_labels = axs[0, 0].get_legend_handles_labels()
+        fig.legend(handles, legend_labels, loc="outside lower center", ncol=len(STAGES))
+
+        output_dir = Path(f"data/{self.experiment_name}/results")
+        output_file = output_dir / "stage_trace_summary.json"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with open(output_file, "w") as f:
+            json.dump(summary, f, indent=4, default=float)
+        print(f"\t➡️ Analysis written to {str(output_file)}")
+
+        save_figure(fig, output_dir / "stage_trace.png")
+        print(f"\t➡️ Figure saved to {str(output_dir / 'stage_trace.png')}")
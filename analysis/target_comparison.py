@@ -0,0 +1,154 @@
+from pathlib import Path
+import json
+
+import numpy as np
+import pandas as pd
+from matplotlib import pyplot as plt
+
+from analysis.plotting import save_figure
+
+# Metrics compared side by side in the figures, the others are only reported in the summary
+HEADLINE_METRICS = [
+    "responsiveness_mean",
+    "responsiveness_p99",
+    "jitter",
+    "jitter_mean",
+    "server_ops_per_second",
+    "server_bytes_per_second",
+    "throughput_mean",
+    "wire_throughput_mean",
+    "wire_bytes_per_second",
+    "calls_per_second",
+    "operations_per_second",
+    "samples_per_second",
+    "recovery_time_mean",
+    "deadline_miss_rate",
+    "worst_case_overrun",
+]
+
+
+def _flatten(summary, prefix=""):
+    """Flattens a nested analysis summary into {"read_mode/responsiveness_mean": value, ...}, keeping numbers only."""
+    metrics = {}
+    for key, value in summary.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            metrics.update(_flatten(value, f"{path}/"))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            metrics[path] = value
+    return metrics
+
+
+class TargetComparisonAnalysis:
+    """Compares the analysis results of the targets of a multi-target session, side by side."""
+
+    def __init__(self, experiment_name):
+        self.experiment_name = experiment_name
+        manifest = Path(f"data/{self.experiment_name}/targets.json")
+
+        if not manifest.exists():
+            raise ValueError(
+                f"The session {self.experiment_name} is not a multi-target session ({manifest} does not exist)."
+            )
+        with open(manifest) as f:
+            self.target_runs = json.load(f)["runs"]
+
+        # One row per target, run, summary file and metric
+        rows = []
+        for target, run_names in self.target_runs.items():
+            for run_name in run_names:
+                for summary_file in Path(f"data/{run_name}/results").glob(
+                    "*_summary.json"
+                ):
+                    with open(summary_file) as f:
+                        metrics = _flatten(json.load(f))
+                    for metric, value in metrics.items():
+                        rows.append(
+                            {
+                                "target": target,
+                                "run": run_name,
+                                "summary": summary_file.stem.removesuffix("_summary"),
+                                "metric": metric,
+                                "value": value,
+                            }
+                        )
+        if len(rows) == 0:
+            raise ValueError(
+                f"No analysis results for the targets of the session. Make sure to post-process the runs first."
+            )
+        self.results = pd.DataFrame(rows)
+
+    def generate(self):
+        """Generates the comparison of the targets to the result files."""
+        targets = list(self.target_runs.keys())
+        statistics = (
+            self.results.groupby(["summary", "metric", "target"])["value"]
+            .agg(mean="mean", std="std", runs="count")
+            .reset_index()
+        )
+
+        summary = {}
+        for (summary_name, metric), frame in statistics.groupby(["summary", "metric"]):
+            summary.setdefault(summary_name, {})[metric] = {
+                row.target: {
+                    "mean": row.mean,
+                    "std": None if np.isnan(row.std) else row.std,
+                    "runs": int(row.runs),
+                }
+                for row in frame.itertuples()
+            }
+
+        output_dir = Path(f"data/{self.experiment_name}/results")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_file = output_dir / "target_comparison_summary.json"
+        with open(output_file, "w") as f:
+            json.dump(summary, f, indent=4)
+        print(f"\t➡️ Analysis written to {str(output_file)}")
+
+        # Side-by-side table: one row per metric, one column per target
+        table = statistics.pivot_table(
+            index=["summary", "metric"], columns="target", values="mean"
+        )
+        table.to_csv(output_dir / "target_comparison.csv")
+        print(f"\t➡️ Table written to {str(output_dir / 'target_comparison.csv')}")
+
+        # One figure per analysis, one subplot per headline metric, grouped bars per target
+        for summary_name, frame in statistics.groupby("summary"):
+            frame = frame.assign(name=frame["metric"].str.split("/").str[-1])
+            frame = frame[frame["name"].isin(HEADLINE_METRICS)]
+            if len(frame) == 0:
+                continue
+            names = [name for name in HEADLINE_METRICS if name in set(frame["name"])]
+            fig, axs = plt.subplots(
+                1, len(names), figsize=(4 * len(names), 4), squeeze=False
+            )
+            fig.subplots_adjust(wspace=0.4, bottom=0.25)
+            fig.suptitle(f"{summary_name}: target comparison")
+            for ax, name in zip(axs[0], names):
+                metric_frame = frame[frame["name"] == name]
+                groups = list(dict.fromkeys(metric_frame["metric"]))
+                width = 0.8 / len(targets)
+                for i, target in enumerate(targets):
+                    values = metric_frame[metric_frame["target"] == target].set_index(
+                        "metric"
+                    )
+                    ax.bar(
+                        np.arange(len(groups)) + i * width,
+                        [values["mean"].get(group, np.nan) for group in groups],
+                        width,
+                        yerr=[values["std"].get(group, np.nan) for group in groups],
+                        label=target,
+                    )
+                ax.set_xticks(
+                    np.arange(len(groups)) + width * (len(targets) - 1) / 2,
+                    [group.removesuffix(f"/{name}") or name for group in groups],
+                    rotation=30,
+                    ha="right",
+                )
+                ax.set(title=name)
+            handles, labels = axs[0, 0].get_legend_handles_labels()
+            fig.legend(handles, labels, loc="upper right", ncol=len(targets))
+            save_figure(fig, output_dir / f"target_comparison_{summary_name}.png")
+            print(
+                f"\t➡️ Figure saved to {str(output_dir / f'target_comparison_{summary_name}.png')}"
+            )
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+from experiments.wire import WIRE_COLUMNS
+
+# Width of the sliding windows of the server throughput, and their step, in seconds
+THROUGHPUT_WINDOW = 1.0
+THROUGHPUT_STEP = 0.25
+
+
+def has_wire_counts(requests):
+    """Whether the wire traffic of the requests was recorded (see experiments/wire.py), older results only have
+    their payload size."""
+    return all(column in requests.columns for column in WIRE_COLUMNS)
+
+
+def summarize_traffic(requests, duration=None):
+    """Summarizes the payload and wire traffic of requests.
+
+    The payload is the size of the values read or written (data_size), the wire traffic counts every byte of the
+    messages sent and received, with their headers, security and encoding overhead.
+
+    Args:
+        requests (pd.DataFrame): requests, with start_time, end_time, data_size and optionally the WIRE_COLUMNS
+        duration (float): duration over which the rates are computed, in seconds, by default the span of the requests
+
+    Returns:
+        dict: payload and wire bytes per second, wire bytes, chunks and messages per request, and wire bytes per
+            payload byte (wire metrics only if they were recorded)
+    """
+    if duration is None:
+        duration = requests["end_time"].max() - requests["start_time"].min()
+    summary = {"payload_bytes_per_second": requests["data_size"].sum() / duration}
+    if not has_wire_counts(requests):
+        return summary
+    wire_bytes = requests["wire_bytes_sent"] + requests["wire_bytes_received"]
+    summary.update(
+        {
+            "wire_bytes_per_second": wire_bytes.sum() / duration,
+            "wire_bytes_sent_per_request": requests["wire_bytes_sent"].mean(),
+            "wire_bytes_received_per_request": requests["wire_bytes_received"].mean(),
+            "chunks_per_request": (
+                requests["chunks_sent"] + requests["chunks_received"]
+            ).mean(),
+            "messages_per_request": (
+                requests["messages_sent"] + requests["messages_received"]
+            ).mean(),
+            "wire_overhead": wire_bytes.sum() / requests["data_size"].sum()
+            if requests["data_size"].sum() > 0
+            else None,
+        }
+    )
+    return summary
+
+
+def server_throughput(clients, window=THROUGHPUT_WINDOW, step=THROUGHPUT_STEP):
+    """Computes the throughput the server delivered to all the clients together, in sliding windows.
+
+    The requests of the clients are merged into one timeline, and each window (t, t + window] counts the requests
+    completed after t and until t + window. The windows only cover the steady state, when all the clients are
+    running: from the first request of the last client to start to the last request of the first client to stop,
+    which trims the ramp-up and ramp-down of the clients. Averaging the throughput of each request instead (data_size / response time) ignores
+    the concurrency of the requests, i.e. what the server actually delivered.
+
+    Args:
+        clients (list): requests of each client (pd.DataFrame), with start_time, end_time, data_size and optionally
+            the WIRE_COLUMNS
+        window (float): width of the windows, in seconds, the steady state being a single window if it is shorter
+        step (float): time between the starts of two windows, in seconds
+
+    Returns:
+        dict: completed requests/s and payload bytes/s (and wire bytes/s if they were recorded) over the steady
+            state, their mean, min and max over the windows, and the bounds of the steady state, None if the clients
+            never all ran at the same time
+    """
+    clients = [requests for requests in clients if len(requests) > 0]
+    if len(clients) == 0:
+        return None
+    steady_start = max(requests["start_time"].min() for requests in clients)
+    steady_end = min(requests["end_time"].max() for requests in clients)
+    if steady_end <= steady_start:
+        return None
+    window = min(window, steady_end - steady_start)
+    # Rounded so that a window ending at the end of the steady state is not lost to a floating-point error
+    n_windows = int((steady_end - steady_start - window) / step + 1e-9) + 1
+    starts = steady_start + step * np.arange(n_windows)
+
+    requests = pd.concat(clients).sort_values("end_time")
+    end_times = requests["end_time"].to_numpy()
+    rates = {
+        "ops_per_second": np.ones(len(requests)),
+        "bytes_per_second": requests["data_size"].to_numpy(),
+    }
+    if has_wire_counts(requests):
+        rates["wire_bytes_per_second"] = (
+            requests["wire_bytes_sent"] + requests["wire_bytes_received"]
+        ).to_numpy()
+
+    # Cumulated counts of the completed requests, to sum the requests of every window at once
+    first = np.searchsorted(end_times, starts, side="right")
+    last = np.searchsorted(end_times, starts + window, side="right")
+    summary = {}
+    for name, values in rates.items():
+        cumulated = np.concatenate([[0], np.cumsum(values, dtype=float)])
+        per_window = (cumulated[last] - cumulated[first]) / window
+        summary[name] = float(per_window.mean())
+        summary[f"{name}_min"] = float(per_window.min())
+        summary[f"{name}_max"] = float(per_window.max())
+    summary.update(
+        {
+            "window": window,
+            "windows": len(starts),
+            "steady_start": float(steady_start),
+            "steady_duration": float(steady_end - steady_start),
+            "steady_requests": int(
+                np.searchsorted(end_times, steady_end, side="right")
+                - np.searchsorted(end_times, steady_start, side="right")
+            ),
+        }
+    )
+    return summary
@@ -0,0 +1,131 @@
+from pathlib import Path
+import json
+
+import pandas as pd
+import numpy as np
+from matplotlib import pyplot as plt
+
+from analysis.loop_lag import generate_loop_lag_analysis
+from analysis.plotting import plot_series, save_figure
+from analysis.resources import generate_resource_analysis
+from analysis.traffic import summarize_traffic
+from experiments.store import ResultStore
+
+
+class WorkloadAnalysis:
+    """Process the results of the WorkloadExperiment."""
+
+    def __init__(self, experiment_name):
+        self.experiment_name = experiment_name
+        input_dir = Path(f"data/{self.experiment_name}/")
+
+        if not input_dir.exists():
+            raise ValueError(
+                f"Data directory for the experiment {self.experiment_name}, {input_dir}, does not exist."
+            )
+
+        with ResultStore() as store:
+            results = store.query(
+                run=self.experiment_name, experiment="WorkloadExperiment"
+            )
+        self.dataframes = [pd.read_csv(e_path) for e_path in results["path"]]
+        if len(self.dataframes) == 0:
+            raise ValueError(
+                f"No workload results in the experiment folder. Make sure to run the experiment first."
+            )
+
+    def __analyze_dataframe(self, frame, duration):
+        frame["responsiveness"] = frame["end_time"] - frame["start_time"]  # in seconds
+        successful = frame[frame["success"]]
+
+        return {
+            "operations": len(frame),
+            "failures": int((~frame["success"]).sum()),
+            "responsiveness_mean": successful.responsiveness.mean(),
+            "jitter": successful.responsiveness.std(),
+            "responsiveness_p99": np.percentile(successful.responsiveness, 99)
+            if len(successful)
+            else None,
+            "operations_per_second": len(frame) / duration,
+            "nodes_per_second": successful.batch_size.sum() / duration,
+            "batch_size_mean": frame.batch_size.mean(),
+            **summarize_traffic(successful, duration),
+        }
+
+    def __analyze_operations(self, frame):
+        """Analyzes all operations of a frame, then each operation type."""
+        duration = frame["end_time"].max() - frame["start_time"].min()
+        summary = {"all": self.__analyze_dataframe(frame.copy(), duration)}
+        for service, service_frame in frame.groupby("mode"):
+            summary[f"{service}_mode"] = self.__analyze_dataframe(
+                service_frame.copy(), duration
+            )
+        return summary
+
+    def generate(self):
+        """Generates the analysis results to the result file."""
+        summary = {}
+        for frame in self.dataframes:
+            profile = frame["profile"].iloc[0]
+            profile_summary = self.__analyze_operations(frame)
+            if frame["phase"].nunique() > 1:
+                for phase, phase_frame in frame.groupby("phase"):
+                    profile_summary[f"phase_{phase}"] = self.__analyze_operations(
+                        phase_frame
+                    )
+            summary[profile] = profile_summary
+
+        fig, axs = plt.subplots(
+            len(self.dataframes),
+            1,
+            figsize=(9, 3 * len(self.dataframes)),
+            squeeze=False,
+        )
+        fig.subplots_adjust(hspace=0.6)
+        fig.suptitle("Workload Experiment")
+        for ax, frame in zip(axs[:, 0], self.dataframes):
+            t0 = frame["start_time"].min()
+            for service, service_frame in frame[frame["success"]].groupby("mode"):
+                plot_series(
+                    ax,
+                    service_frame["start_time"] - t0,
+                    service_frame["end_time"] - service_frame["start_time"],
+                    label=service,
+                )
+            for phase_start in frame.groupby("phase")["start_time"].min().iloc[1:]:
+                ax.axvline(
+                    phase_start - t0, color="grey", linestyle="--", linewidth=0.8
+                )
+            ax.set(
+                title=f'Profile {frame["profile"].iloc[0]}',
+                xlabel="Time (s)",
+                ylabel="Response time (s)",
+            )
+            ax.legend(loc="upper right", markerscale=5)
+
+        resources = generate_resource_analysis(
+            self.experiment_name,
+            pd.concat(self.dataframes),
+            "workload",
+            "Workload Experiment",
+        )
+        if resources is not None:
+            summary["resources"] = resources
+        harness = generate_loop_lag_analysis(
+            self.experiment_name,
+            pd.concat(self.dataframes),
+            "workload",
+            "Workload Experiment",
+        )
+        if harness is not None:
+            summary["harness"] = harness
+
+        output_dir = Path(f"data/{self.experiment_name}/results")
+        output_file = output_dir / "workload_summary.json"
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with open(output_file, "w") as f:
+            json.dump(summary, f, indent=4, default=float)
+        print(f"\t➡️ Analysis written to {str(output_file)}")
+
+        save_figure(fig, output_dir / "workload.png")
+        print(f"\t➡️ Figure saved to {str(output_dir / 'workload.png')}")
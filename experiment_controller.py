@@ -1,32 +1,104 @@
 import asyncio
+import json
 import logging
 import importlib
+import inspect
+import sys
 from pathlib import Path
 from datetime import datetime
 from sys import platform
+from urllib.parse import urlparse
 
 import click
 import yaml
 
+from analysis.plotting import set_compact_figures
+from analysis.stage_trace import StageTraceAnalysis
+from analysis.target_comparison import TargetComparisonAnalysis
 import experiments.servers.test_server as test_server
+from experiments.servers.sharded_server import ShardedServer
+from experiments.matrix import MatrixRunner, load_matrix
+from experiments.proxy import (
+    IMPAIRMENT_PROFILES,
+    IMPAIRMENTS,
+    ImpairmentProxy,
+    ManagedProxy,
+    format_impairment,
+    parse_impairment,
+    proxied_url,
+)
+from experiments.registration import NodeRegistration
+from experiments.loop_monitor import EVENT_LOOPS, LoopLagMonitor, use_event_loop
+from experiments.resources import ResourceSampler
+from experiments.sampling import StoppingRule
+from experiments.stage_trace import StageTracer
+from experiments.store import RESULT_COLUMNS, ResultStore
+from experiments.trace import TraceRecorder, import_csv_log
+
+
+def __to_node_id(identifier):
+    # Identifiers are string node IDs in namespace 2, unless given as full node IDs
+    return identifier if identifier.startswith("ns=") else ("ns=2;s=" + identifier)
 
 
 def __load_client_config(path="experiments/clients/config.yaml"):
     with open(path) as f:
         config = yaml.safe_load(f)
-        if (
-            config is None
-            or "server_url" not in config
-            or "nodes_to_query_ids" not in config
-        ):
+        if config is None:
             raise Exception
-        nodes_to_query_ids = [
-            ("ns=2;s=" + node["identifier"]) for node in config["nodes_to_query_ids"]
-        ]
-        config["nodes_to_query_ids"] = nodes_to_query_ids
+        # Multi-target sessions: each target inherits the shared properties, and overrides some of them
+        targets = config.pop("targets", None)
+        for target in [config] if targets is None else targets:
+            if targets is not None:
+                target.update(
+                    {key: value for key, value in config.items() if key not in target}
+                )
+                if "name" not in target:
+                    raise Exception
+            if "server_url" not in target or "nodes_to_query_ids" not in target:
+                raise Exception
+            nodes_to_query_ids = [
+                __to_node_id(node["identifier"])
+                for node in target["nodes_to_query_ids"]
+            ]
+            target["nodes_to_query_ids"] = nodes_to_query_ids
+        config["targets"] = targets
         return config
 
 
+def __schedule_runs(experiments, targets, name, repetitions, order):
+    """Schedules the runs of a multi-target session: each repetition runs each experiment against every target in
+    turn, in the same order ("interleaved") or starting from the next target at each repetition ("round-robin"), so
+    that drifts over the session affect every target alike.
+
+    Returns:
+        list: (experiment, run name, target config) of each run, in order
+        dict: run names of each target
+    """
+    runs = []
+    target_runs = {target["name"]: [] for target in targets}
+    for repetition in range(repetitions):
+        shift = repetition % len(targets) if order == "round-robin" else 0
+        ordered_targets = targets[shift:] + targets[:shift]
+        for experiment in experiments:
+            for target in ordered_targets:
+                run_name = f'{name}/{target["name"]}' + (
+                    f"/run_{repetition + 1}" if repetitions > 1 else ""
+                )
+                runs.append((experiment, run_name, target))
+                if run_name not in target_runs[target["name"]]:
+                    target_runs[target["name"]].append(run_name)
+    return runs, target_runs
+
+
+def __local_server_port(server_url):
+    # Port of the server if it runs locally, to sample its resources
+    server_address = urlparse(server_url)
+    if server_address.hostname not in ["localhost", "127.0.0.1", "::1"]:
+        return None
+    return server_address.port or 4840  # OPC UA default port
+
+
 def __load_experiment_list(path="experiments/clients/"):
     if platform == "linux" or platform == "linux2" or platform == "darwin":
         path = path.replace("\\", "/")
@@ -53,6 +125,19 @@ def __parse_listclients(listclients):
     return client_nbs
 
 
+def __parse_list(values, cast=int):
+    return [cast(value) for value in values.split(",")]
+
+
+def __parse_tags(tags):
+    # KEY=VALUE pairs, the values being parsed as YAML scalars (numbers, booleans or strings)
+    parameters = {}
+    for tag in tags:
+        key, value = tag.split("=", 1)
+        parameters[key] = yaml.safe_load(value)
+    return parameters
+
+
 # CLI SETUP
 main = click.Group(help="Experiment controller")
 available_experiments = __load_experiment_list()
@@ -71,9 +156,245 @@ available_experiments = __load_experiment_list()
     default="http://examples.freeopcua.github.io",
     help="URI of the OPC UA server",
 )
-def main_server(name, port, uri):
+@click.option(
+    "-hn",
+    "--history-nodes",
+    "history_nodes",
+    default=0,
+    help="Number of historized nodes to generate (ns=2;i=10000, ns=2;i=10001, ...), none by default",
+)
+@click.option(
+    "-hr",
+    "--history-rate",
+    "history_rate",
+    default=10.0,
+    help="Number of values written per second to each historized node, 0 to write none",
+)
+@click.option(
+    "-hd",
+    "--history-db",
+    "history_db",
+    default="history.sqlite",
+    help="Path of the SQLite database storing the history",
+)
+@click.option(
+    "-hm",
+    "--history-max-response-size",
+    "history_max_response_size",
+    default=10000,
+    help="Maximum number of values per HistoryRead response before a continuation point is returned",
+)
+@click.option(
+    "-wn",
+    "--workload-nodes",
+    "workload_nodes",
+    default=0,
+    help="Number of 64 byte read/write nodes to generate (ns=2;i=20000, ns=2;i=20001, ...), none by default",
+)
+@click.option(
+    "-fn",
+    "--form-nodes",
+    "form_nodes",
+    default=0,
+    help="Number of 64 byte read/write nodes addressable by a string (ns=2;s=NodeIdForms.Area1.Line1.Cell1.Value0, ...) and a numeric (ns=2;i=30000, ...) node ID, none by default",
+)
+@click.option(
+    "-er",
+    "--event-rate",
+    "event_rate",
+    default=0.0,
+    help="Number of events of each type emitted per second by the Server object, none by default",
+)
+@click.option(
+    "-es",
+    "--event-size",
+    "event_size",
+    default=64,
+    help="Size of the payload of the emitted events, in bytes",
+)
+@click.option(
+    "-et",
+    "--event-types",
+    "event_types",
+    default="TestEvent",
+    help=f'List of the types of the emitted events, among {", ".join(test_server.EVENT_TYPES)}, e.g. "TestEvent,TestAlarm"',
+)
+@click.option(
+    "-ur",
+    "--update-rate",
+    "update_rate",
+    default=0.0,
+    help="Number of value updates written per second in the background (by each shard), none by default",
+)
+@click.option(
+    "-un",
+    "--update-nodes",
+    "update_nodes",
+    default="value",
+    help=f'List of the groups of nodes updated in the background, among {", ".join(test_server.UPDATE_NODE_GROUPS)}, each one followed by ":COUNT" to update its first COUNT nodes only, e.g. "value,workload:1000"',
+)
+@click.option(
+    "-up",
+    "--update-processes",
+    "update_processes",
+    default=0,
+    help="Number of child processes writing the background updates through the Write service, by default they are written by a task of the server loop",
+)
+@click.option(
+    "-sh",
+    "--shards",
+    "shards",
+    default=1,
+    help="Number of server processes (shards), on consecutive ports from --port, each serving a share of the historized and workload nodes",
+)
+@click.option(
+    "--shard",
+    "shard",
+    default=None,
+    type=int,
+    hidden=True,
+    help="Index of the shard served by this process, set by the sharded server launcher",
+)
+def main_server(
+    name,
+    port,
+    uri,
+    history_nodes,
+    history_rate,
+    history_db,
+    history_max_response_size,
+    workload_nodes,
+    form_nodes,
+    event_rate,
+    event_size,
+    event_types,
+    update_rate,
+    update_nodes,
+    update_processes,
+    shards,
+    shard,
+):
     logging.basicConfig(level=logging.DEBUG)
-    # asyncio.run(test_server.setup_server(name=name, uri=uri, port=port), debug=True)
+    if shards > 1 and shard is None:
+        asyncio.run(
+            __run_sharded_server(
+                shards,
+                port,
+                history_db,
+                [
+                    "--name",
+                    name,
+                    "--uri",
+                    uri,
+                    "--history-nodes",
+                    history_nodes,
+                    "--history-rate",
+                    history_rate,
+                    "--history-max-response-size",
+                    history_max_response_size,
+                    "--workload-nodes",
+                    workload_nodes,
+                    "--form-nodes",
+                    form_nodes,
+                    "--event-rate",
+                    event_rate,
+                    "--event-size",
+                    event_size,
+                    "--event-types",
+                    event_types,
+                    "--update-rate",
+                    update_rate,
+                    "--update-nodes",
+                    update_nodes,
+                    "--update-processes",
+                    update_processes,
+                ],
+            )
+        )
+        return
+    asyncio.run(
+        test_server.setup_server(
+            name=name,
+            uri=uri,
+            port=port,
+            history_nodes=history_nodes,
+            history_rate=history_rate,
+            history_db=history_db,
+            history_max_response_size=history_max_response_size,
+            workload_nodes=workload_nodes,
+            form_nodes=form_nodes,
+            event_rate=event_rate,
+            event_size=event_size,
+            event_types=__parse_list(event_types, cast=str),
+            update_rate=update_rate,
+            update_nodes=__parse_list(update_nodes, cast=str),
+            update_processes=update_processes,
+            shard=shard or 0,
+            n_shards=shards,
+        )
+    )
+
+
+async def __run_sharded_server(shards, port, history_db, server_args):
+    server = ShardedServer(shards, port, server_args, history_db)
+    await server.start()
+    click.echo(
+        f"\t➡️ {shards} shards listening on ports {port} to {int(port) + shards - 1}"
+    )
+    try:
+        returncode = await server.wait()
+        click.echo(f"A shard exited with code {returncode}, stopping the server.")
+    finally:
+        await server.stop()
+
+
+# PROXY
+@main.command(
+    "proxy",
+    help="Relay the connections to an OPC UA server through a proxy impairing them like a WAN or edge link",
+)
+@click.argument("server_url")
+@click.option("-p", "--port", "port", default=4841, help="Port the proxy listens on")
+@click.option(
+    "-ho",
+    "--host",
+    "host",
+    default="localhost",
+    help="Host the proxy listens on, e.g. 0.0.0.0 to relay remote clients",
+)
+@click.option(
+    "-im",
+    "--impairment",
+    "impairment",
+    default="",
+    help=f'Impairments of the link: profiles among {", ".join(IMPAIRMENT_PROFILES)} and KEY=VALUE settings among {", ".join(IMPAIRMENTS)}, e.g. "wan,loss=0.01", none by default',
+)
+def main_proxy(server_url, port, host, impairment):
+    try:
+        settings = parse_impairment(impairment)
+    except ValueError as e:
+        click.echo(e)
+        return
+    server = urlparse(server_url)
+    proxy = ImpairmentProxy(
+        server.hostname, server.port or 4840, host, int(port), **settings
+    )
+    try:
+        asyncio.run(__run_proxy(proxy, server_url))
+    except KeyboardInterrupt:
+        pass
+    click.echo(f"\t➡️ Impairments applied: {proxy.counts}")
+
+
+async def __run_proxy(proxy, server_url):
+    await proxy.start()
+    click.echo(
+        f"\t➡️ Relaying {proxied_url(server_url, proxy.port, proxy.listen_host)} to {server_url} with the impairments {format_impairment(proxy.settings) or 'none'}"
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await proxy.stop()
 
 
 # EXPERIMENTS
@@ -86,8 +407,8 @@ def main_server(name, port, uri):
     "-n",
     "--name",
     "name",
-    default=datetime.now().strftime("%d-%m-%Y_%H-%M-%S"),
-    help="Name of the experiment session (and of the result folder)",
+    default=None,
+    help="Name of the experiment session (and of the result folder), by default the current date and time",
 )
 @click.option(
     "-p",
@@ -97,14 +418,114 @@ def main_server(name, port, uri):
     is_flag=True,
     help="Post-process the results after the experiment (flag)",
 )
+@click.option(
+    "-rt",
+    "--record-trace",
+    "record_trace",
+    default=False,
+    is_flag=True,
+    help="Record the requests of the experiments as a workload trace, in the session folder (flag)",
+)
+@click.option(
+    "-sr",
+    "--sample-resources",
+    "sample_resources",
+    default=False,
+    is_flag=True,
+    help="Sample the CPU, memory, threads, sockets and context switches of the harness and of the local server under test, in the session folder (flag, Linux only)",
+)
+@click.option(
+    "-si",
+    "--sample-interval",
+    "sample_interval",
+    default=0.1,
+    help="Resource sampling interval, in seconds",
+)
+@click.option(
+    "-sp",
+    "--server-pid",
+    "server_pid",
+    default=None,
+    type=int,
+    help="PID of the server process to sample, by default the local process listening on the port of the server URL",
+)
+@click.option(
+    "-ml",
+    "--monitor-loop",
+    "monitor_loop",
+    default=False,
+    is_flag=True,
+    help="Monitor the lag and CPU utilisation of the event loop running the clients, in the session folder, to detect harness saturation (flag)",
+)
+@click.option(
+    "-ts",
+    "--trace-stages",
+    "trace_stages",
+    default=False,
+    is_flag=True,
+    help="Trace the stages of every request in the asyncua client stack (encoding, secure channel, socket, server, decoding), in the session folder (flag)",
+)
+@click.option(
+    "-im",
+    "--impairment",
+    "impairment",
+    default=None,
+    help=f'Relay the connections of the clients through a local proxy impairing them like a WAN or edge link: profiles among {", ".join(IMPAIRMENT_PROFILES)} and KEY=VALUE settings among {", ".join(IMPAIRMENTS)}, e.g. "wan,loss=0.01"',
+)
+@click.option(
+    "-rn",
+    "--register-nodes",
+    "register_nodes",
+    default=False,
+    is_flag=True,
+    help="Register the nodes of the configuration with the RegisterNodes service once the clients are connected, and address them by their registered handles in every experiment (flag)",
+)
+@click.option(
+    "-el",
+    "--event-loop",
+    "event_loop",
+    default="asyncio",
+    type=click.Choice(EVENT_LOOPS),
+    help="Event loop implementation running the clients, uvloop must be installed separately",
+)
+@click.option(
+    "-rp",
+    "--repetitions",
+    "repetitions",
+    default=1,
+    help="(multi-target sessions ONLY) Number of times each experiment is run against every target",
+)
+@click.option(
+    "-to",
+    "--target-order",
+    "target_order",
+    default="round-robin",
+    type=click.Choice(["interleaved", "round-robin"]),
+    help="(multi-target sessions ONLY) Order of the targets at each repetition: always the same (interleaved), or starting from the next target (round-robin)",
+)
+@click.option(
+    "-cf",
+    "--compact-figures",
+    "compact_figures",
+    default=False,
+    is_flag=True,
+    help="Save the figures of the post-processing as compact raster images, at a lower resolution (flag)",
+)
+@click.option(
+    "-tg",
+    "--tag",
+    "tags",
+    multiple=True,
+    help='Parameter recorded with the results in the result store, to select them in cross-session analyses, e.g. "movement=true" (repeatable)',
+)
 # Experiment specific options
 @click.option(
     "-m",
     "--mode",
     "mode",
     default=None,
-    type=click.Choice(["read", "write"]),
-    help="(responsiveness-jitter-throughput ONLY) Specify read or write mode requests, by default both are performed",
+    type=click.Choice(["read", "write", "timestamps"]),
+    help="(responsiveness-jitter-throughput & node_id_forms ONLY) Specify read or write mode requests, by default both are performed. The timestamps mode reads values with their server and source timestamps (responsiveness-jitter-throughput only)",
 )
 @click.option(
     "-nc",
@@ -118,18 +539,308 @@ def main_server(name, port, uri):
     "--nnodes",
     "nnodes",
     default=None,
-    help="Number of nodes to read at maximum, by default all nodes listed in the configuration are read",
+    help="Number of nodes to read at maximum, by default all nodes listed in the configuration are read (node_id_forms: number of NodeIdForms nodes of the test server to address, 10 by default)",
+)
+@click.option(
+    "-sh",
+    "--shards",
+    "shards",
+    default=None,
+    help="(scalability, scalability_evolution & workload ONLY) Number of shards of a sharded test server, started with the same option: the requests are routed to the shard serving each node",
 )
 @click.option(
     "-lc",
     "--listclients",
     "listclients",
     default=None,
-    help='(scalability_evolution ONLY) List of numbers of clients to run in parallel, e.g. "1,10,50,100"',
+    help='(scalability_evolution, method_call, cyclic_polling & event_throughput ONLY) List of numbers of clients to run in parallel, e.g. "1,10,50,100"',
+)
+@click.option(
+    "-ds",
+    "--data-size",
+    "data_size",
+    default=None,
+    help="Size in bytes of the data written, or of the method call arguments",
+)
+@click.option(
+    "-nr",
+    "--num-requests",
+    "num_requests",
+    default=None,
+    help="Number of requests of each client, the maximum number of requests if a confidence interval width is targeted (--ci-width), 1000 by default",
+)
+@click.option(
+    "-cw",
+    "--ci-width",
+    "ci_width",
+    default=None,
+    help="(responsiveness_jitter_throughput, scalability, scalability_evolution, method_call & node_id_forms ONLY) Sample the requests in batches until the confidence interval of the --ci-statistic of their response times is narrower than this width relative to the statistic, e.g. 0.05, or until --num-requests or --max-duration is reached",
+)
+@click.option(
+    "-cs",
+    "--ci-statistic",
+    "ci_statistic",
+    default="mean",
+    help='Statistic of the response times whose confidence interval is targeted by --ci-width, "mean" or a percentile, e.g. "p99"',
+)
+@click.option(
+    "-cl",
+    "--ci-confidence",
+    "ci_confidence",
+    default=0.95,
+    help="Confidence level of the interval targeted by --ci-width",
+)
+@click.option(
+    "-cb",
+    "--ci-batch",
+    "ci_batch",
+    default=100,
+    help="Number of requests sampled between two evaluations of the interval targeted by --ci-width",
+)
+@click.option(
+    "-md",
+    "--max-duration",
+    "max_duration",
+    default=None,
+    help="(same experiments as --ci-width) Maximum duration of the sampling of the requests of each run, in seconds, no limit by default",
+)
+@click.option(
+    "-w",
+    "--work",
+    "work",
+    default=None,
+    type=click.Choice(["sleep", "cpu"]),
+    help="(method_call ONLY) Simulated work of the test server methods, by default both are performed",
+)
+@click.option(
+    "-wm",
+    "--work-ms",
+    "work_ms",
+    default=None,
+    help="(method_call ONLY) Duration of the simulated work of the test server methods, in milliseconds",
+)
+@click.option(
+    "-rs",
+    "--response-size",
+    "response_size",
+    default=None,
+    help="(method_call ONLY) Size in bytes of the payload returned by the test server methods",
+)
+@click.option(
+    "-tr",
+    "--time-ranges",
+    "time_ranges",
+    default=None,
+    help='(history_read ONLY) List of time ranges to read the history of, in seconds before now, e.g. "1,10,60"',
+)
+@click.option(
+    "-ps",
+    "--page-sizes",
+    "page_sizes",
+    default=None,
+    help='(history_read ONLY) List of page sizes (values per node per request), 0 for unpaged reads, e.g. "0,100,1000"',
+)
+@click.option(
+    "-f",
+    "--fault",
+    "fault",
+    default=None,
+    type=click.Choice(["kill", "restart", "drop"]),
+    help="(recovery ONLY) Fault to inject into the locally managed test server, by default each fault is run",
+)
+@click.option(
+    "-nf",
+    "--nfaults",
+    "nfaults",
+    default=None,
+    help="(recovery ONLY) Number of faults to inject",
+)
+@click.option(
+    "-fi",
+    "--fault-interval",
+    "fault_interval",
+    default=None,
+    help="(recovery ONLY) Time between the recovery of the client and the next fault, in seconds",
+)
+@click.option(
+    "-t",
+    "--trace",
+    "trace",
+    default=None,
+    help="(replay ONLY) Path of the workload trace to replay",
+)
+@click.option(
+    "-s",
+    "--speed",
+    "speed",
+    default=None,
+    help="(replay ONLY) Replay speed, e.g. 2 to replay the trace twice as fast",
+)
+@click.option(
+    "-wl",
+    "--workload",
+    "workload",
+    default=None,
+    help="(workload ONLY) Path of the YAML file defining the workload profiles, experiments/workloads.yaml by default",
+)
+@click.option(
+    "-pf",
+    "--profiles",
+    "profiles",
+    default=None,
+    help='(workload ONLY) List of the workload profiles to run, e.g. "read_mostly,update_heavy", by default all profiles are run',
+)
+@click.option(
+    "-sd",
+    "--seed",
+    "seed",
+    default=None,
+    help="(workload ONLY) Seed of the random workload generators, for reproducible workloads",
+)
+@click.option(
+    "-ct",
+    "--cycle-times",
+    "cycle_times",
+    default=None,
+    help='(cyclic_polling ONLY) List of cycle times to poll the nodes at, in milliseconds, e.g. "1,10,100"',
+)
+@click.option(
+    "-du",
+    "--duration",
+    "duration",
+    default=None,
+    help="(cyclic_polling & event_throughput ONLY) Duration of the polling for each cycle time and number of clients, or of the subscriptions for each filter and number of clients, in seconds",
+)
+@click.option(
+    "-al",
+    "--aligned",
+    "aligned",
+    default=False,
+    is_flag=True,
+    help="(cyclic_polling ONLY) Start the cycles of every client at the same time, instead of staggering them over the cycle time (flag)",
+)
+@click.option(
+    "-cr",
+    "--connect-rates",
+    "connect_rates",
+    default=None,
+    help='(connection_storm ONLY) List of average connection rates, in sessions per second, 0 to open every session at once, e.g. "0,100,1000"',
+)
+@click.option(
+    "-bs",
+    "--burst-sizes",
+    "burst_sizes",
+    default=None,
+    help='(connection_storm ONLY) List of numbers of sessions opened at the same time, e.g. "1,10,100"',
+)
+@click.option(
+    "-ob",
+    "--observers",
+    "observers",
+    default=None,
+    help="(connection_storm ONLY) Number of clients connected before the storm, reading the nodes during it",
+)
+@click.option(
+    "-ef",
+    "--event-filters",
+    "event_filters",
+    default=None,
+    help='(event_throughput ONLY) List of event filters, among minimal, full and where, e.g. "minimal,where". By default, each filter is run',
+)
+@click.option(
+    "-et",
+    "--event-types",
+    "event_types",
+    default=None,
+    help='(event_throughput ONLY) List of the event types to subscribe to, emitted by the test server, e.g. "TestEvent,TestAlarm"',
+)
+@click.option(
+    "-pi",
+    "--publishing-interval",
+    "publishing_interval",
+    default=None,
+    help="(event_throughput ONLY) Publishing interval of the subscriptions, in milliseconds",
+)
+@click.option(
+    "-qs",
+    "--queue-size",
+    "queue_size",
+    default=None,
+    help="(event_throughput ONLY) Size of the event queues of the server, the oldest events being dropped when they are full, 0 for the default size",
+)
+@click.option(
+    "-pt",
+    "--processing-time",
+    "processing_time",
+    default=None,
+    help="(event_throughput ONLY) Time spent by the clients on each event, in seconds, to apply back-pressure to the server",
+)
+@click.option(
+    "-ni",
+    "--node-id-forms",
+    "node_id_forms",
+    default=None,
+    help="(node_id_forms ONLY) List of the forms of node IDs to compare, among string, numeric and registered, by default all of them",
 )
 def main_run_experiment(
-    experiments, config, name, post_process, mode, nclients, nnodes, listclients
+    experiments,
+    config,
+    name,
+    post_process,
+    record_trace,
+    sample_resources,
+    sample_interval,
+    server_pid,
+    monitor_loop,
+    trace_stages,
+    impairment,
+    register_nodes,
+    event_loop,
+    repetitions,
+    target_order,
+    compact_figures,
+    tags,
+    mode,
+    nclients,
+    nnodes,
+    shards,
+    listclients,
+    data_size,
+    num_requests,
+    ci_width,
+    ci_statistic,
+    ci_confidence,
+    ci_batch,
+    max_duration,
+    work,
+    work_ms,
+    response_size,
+    time_ranges,
+    page_sizes,
+    fault,
+    nfaults,
+    fault_interval,
+    trace,
+    speed,
+    workload,
+    profiles,
+    seed,
+    cycle_times,
+    duration,
+    aligned,
+    connect_rates,
+    burst_sizes,
+    observers,
+    event_filters,
+    event_types,
+    publishing_interval,
+    queue_size,
+    processing_time,
+    node_id_forms,
 ):
+    # The default name is the time of the call, not of the import of the controller
+    if name is None:
+        name = datetime.now().strftime("%d-%m-%Y_%H-%M-%S")
     # Load config
     try:
         config = __load_client_config(config)
@@ -138,36 +849,132 @@ def main_run_experiment(
             f"Could not load config file at {config}, or it misses required fields (server_url, node_to_query_id)."
         )
         return
+    set_compact_figures(compact_figures)
+    try:
+        tags = __parse_tags(tags)
+    except ValueError:
+        click.echo(
+            f"Could not parse your tags {tags}. Should be of the form KEY=VALUE."
+        )
+        return
+    try:
+        use_event_loop(event_loop)
+    except ValueError as e:
+        click.echo(e)
+        return
+    if monitor_loop:
+        loop_monitor = LoopLagMonitor()
+    if record_trace:
+        recorder = TraceRecorder()
+        recorder.start()
+    if trace_stages:
+        tracer = StageTracer()
+        tracer.start()
+    try:
+        stopping_rule = StoppingRule(
+            statistic=ci_statistic,
+            target_width=float(ci_width) if ci_width is not None else None,
+            confidence=float(ci_confidence),
+            batch_size=int(ci_batch),
+            max_duration=float(max_duration) if max_duration is not None else None,
+        )
+    except ValueError as e:
+        click.echo(e)
+        return
+    if impairment is not None:
+        try:
+            impairment = format_impairment(parse_impairment(impairment))
+        except ValueError as e:
+            click.echo(e)
+            return
+        if shards is not None and int(shards) > 1:
+            click.echo("The impairment proxy does not relay sharded servers.")
+            return
+        # The settings are recorded with the results, each one to pivot the analyses over
+        tags["impairment"] = impairment or "none"
+        for key, value in parse_impairment(impairment).items():
+            tags[f"impairment_{key}"] = value
+    if register_nodes:
+        registration = NodeRegistration()
+        registration.start()
+        tags["register_nodes"] = True
+    if config["targets"] is None:
+        runs = [(experiment, name, config) for experiment in experiments]
+    else:
+        runs, target_runs = __schedule_runs(
+            experiments, config["targets"], name, repetitions, target_order
+        )
+        manifest = Path(f"data/{name}/targets.json")
+        manifest.parent.mkdir(parents=True, exist_ok=True)
+        with open(manifest, "w") as f:
+            json.dump({"runs": target_runs}, f, indent=4)
+    if sample_resources:
+        if not ResourceSampler.is_supported():
+            click.echo("Resource sampling requires /proc (Linux), ignoring it.")
+            sample_resources = False
+        else:
+            sampler = ResourceSampler(interval=sample_interval, server_pid=server_pid)
+            sampler.start()
     # Run experiments
-    for experiment in experiments:
+    failed_runs = []  # Runs whose experiment raised, for the exit code
+    for experiment, run_name, run_config in runs:
         click.echo(f"Running requested experiment {experiment}...")
+        if run_name != name:
+            click.echo(f"Results of the run stored under data/{run_name}.")
+        if sample_resources and server_pid is None:
+            server_port = __local_server_port(run_config["server_url"])
+            if server_port is None:
+                click.echo(
+                    "The server is not local, only the harness resources are sampled."
+                )
+            sampler.set_server_port(server_port)
 
+        node_ids = run_config["nodes_to_query_ids"]
         if nnodes is not None:
-            config["nodes_to_query_ids"] = config["nodes_to_query_ids"][: int(nnodes)]
-        click.echo(f'{len(config["nodes_to_query_ids"])} nodes to read in experiments.')
+            node_ids = node_ids[: int(nnodes)]
+        click.echo(f"{len(node_ids)} nodes to read in experiments.")
+        if register_nodes:
+            registration.node_ids = node_ids
+
+        server_url = run_config["server_url"]
+        if impairment is not None:
+            proxy = ManagedProxy(server_url, impairment)
+            try:
+                asyncio.run(proxy.start())
+            except RuntimeError as e:
+                click.echo(f"{e} Skipping this experiment.")
+                continue
+            click.echo(f"Connections relayed through the impairment proxy {proxy.url}.")
+            server_url = proxy.url
 
         experiment_constructor = {
-            "server_url": config["server_url"],
-            "node_ids": config["nodes_to_query_ids"],
-            "experiment_name": name,
-            "server_user": config["server_user"],
-            "server_password": config["server_password"],
-            "server_cert_app_uri": config["server_certificate_application_uri"]
-            if "server_certificate_application_uri" in config
+            "server_url": server_url,
+            "node_ids": node_ids,
+            "experiment_name": run_name,
+            "server_user": run_config["server_user"],
+            "server_password": run_config["server_password"],
+            "server_cert_app_uri": run_config["server_certificate_application_uri"]
+            if "server_certificate_application_uri" in run_config
             else None,
-            "server_pub_cert": config["server_public_cert"]
-            if "server_public_cert" in config
+            "server_pub_cert": run_config["server_public_cert"]
+            if "server_public_cert" in run_config
             else None,
-            "server_priv_cert": config["server_private_cert"]
-            if "server_private_cert" in config
+            "server_priv_cert": run_config["server_private_cert"]
+            if "server_private_cert" in run_config
             else None,
         }
+        if data_size is not None:
+            experiment_constructor["data_size"] = int(data_size)
+        if num_requests is not None:
+            experiment_constructor["num_requests"] = int(num_requests)
         # Load experiment-specific options that are passed to run_experiment
         run_experiment_args = {}
         if mode is not None:
             run_experiment_args["mode"] = mode
         if nclients is not None:
             run_experiment_args["n_clients"] = int(nclients)
+        if shards is not None:
+            run_experiment_args["shards"] = int(shards)
         if listclients is not None:
             try:
                 client_nbs = __parse_listclients(listclients)
@@ -177,6 +984,78 @@ def main_run_experiment(
                 )
                 return
             run_experiment_args["l_clients"] = client_nbs
+        if work is not None:
+            run_experiment_args["work"] = work
+        if work_ms is not None:
+            run_experiment_args["work_ms"] = float(work_ms)
+        if response_size is not None:
+            run_experiment_args["response_size"] = int(response_size)
+        if ("method_id" in run_config) != ("method_object_id" in run_config):
+            click.echo(
+                "A custom method is configured by both method_object_id and method_id, the node IDs of its object and of the method."
+            )
+            return
+        if "method_id" in run_config:
+            run_experiment_args["method_object_id"] = __to_node_id(
+                run_config["method_object_id"]
+            )
+            run_experiment_args["method_id"] = __to_node_id(run_config["method_id"])
+        if fault is not None:
+            run_experiment_args["fault"] = fault
+        if nfaults is not None:
+            run_experiment_args["n_faults"] = int(nfaults)
+        if fault_interval is not None:
+            run_experiment_args["fault_interval"] = float(fault_interval)
+        if trace is not None:
+            run_experiment_args["trace"] = trace
+        if speed is not None:
+            run_experiment_args["speed"] = float(speed)
+        if workload is not None:
+            run_experiment_args["workload"] = workload
+        if profiles is not None:
+            run_experiment_args["profiles"] = __parse_list(profiles, cast=str)
+        if seed is not None:
+            run_experiment_args["seed"] = int(seed)
+        if duration is not None:
+            run_experiment_args["duration"] = float(duration)
+        if aligned:
+            run_experiment_args["aligned"] = True
+        if observers is not None:
+            run_experiment_args["n_observers"] = int(observers)
+        if event_filters is not None:
+            run_experiment_args["filters"] = __parse_list(event_filters, cast=str)
+        if event_types is not None:
+            run_experiment_args["event_types"] = __parse_list(event_types, cast=str)
+        if publishing_interval is not None:
+            run_experiment_args["publishing_interval"] = float(publishing_interval)
+        if queue_size is not None:
+            run_experiment_args["queue_size"] = int(queue_size)
+        if processing_time is not None:
+            run_experiment_args["processing_time"] = float(processing_time)
+        if nnodes is not None:
+            run_experiment_args["n_nodes"] = int(nnodes)
+        if ci_width is not None or max_duration is not None:
+            run_experiment_args["stopping_rule"] = stopping_rule
+        if node_id_forms is not None:
+            run_experiment_args["forms"] = __parse_list(node_id_forms, cast=str)
+        try:
+            if cycle_times is not None:
+                run_experiment_args["cycle_times"] = __parse_list(cycle_times, float)
+            if time_ranges is not None:
+                run_experiment_args["time_ranges"] = __parse_list(time_ranges, float)
+            if page_sizes is not None:
+                run_experiment_args["page_sizes"] = __parse_list(page_sizes)
+            if connect_rates is not None:
+                run_experiment_args["connect_rates"] = __parse_list(
+                    connect_rates, float
+                )
+            if burst_sizes is not None:
+                run_experiment_args["burst_sizes"] = __parse_list(burst_sizes)
+        except:
+            click.echo(
+                f"Could not parse your lists of cycle times, time ranges, page sizes, connect rates or burst sizes. Should be of the form 1,10,60,..."
+            )
+            return
 
         try:
             experiment_class_ = getattr(
@@ -184,13 +1063,38 @@ def main_run_experiment(
                 ___filename_to_classname(experiment, type="Experiment"),
             )
             experiment_client = experiment_class_(**experiment_constructor)
-            asyncio.run(experiment_client.run_experiment(**run_experiment_args))
+            # Only pass the options supported by the experiment
+            supported_args = inspect.signature(
+                experiment_client.run_experiment
+            ).parameters
+            run = experiment_client.run_experiment(
+                **{
+                    arg: value
+                    for arg, value in run_experiment_args.items()
+                    if arg in supported_args
+                }
+            )
+            asyncio.run(loop_monitor.monitor(run) if monitor_loop else run)
         except Exception as e:
             print(e)
             click.echo(
                 "Could not load valid experiment class, check if it exists and if it has a run_experiment method, and server_url, node_id and experiment_name in its constructor arguments. Skipping this experiment."
             )
-            pass
+            failed_runs.append(run_name)
+        finally:
+            if impairment is not None:
+                asyncio.run(proxy.stop())
+
+        with ResultStore() as store:
+            store.tag(
+                run_name, session=name, target=run_config.get("name"), parameters=tags
+            )
+        if sample_resources:  # Saved before the analyses, which overlay the samples
+            sampler.save(f"data/{run_name}/resources.csv")
+        if monitor_loop:
+            loop_monitor.save(f"data/{run_name}/loop_lag.csv")
+        if trace_stages:
+            tracer.save(f"data/{run_name}/stage_trace.csv", experiment=experiment)
 
         # Post-process if requested
         if post_process:
@@ -199,13 +1103,211 @@ def main_run_experiment(
                     importlib.import_module(f"analysis.{experiment}"),
                     ___filename_to_classname(experiment, type="Analysis"),
                 )
-                analysis_client = analysis_class_(experiment_name=name)
+                analysis_client = analysis_class_(experiment_name=run_name)
                 analysis_client.generate()
             except Exception as e:
                 click.echo(
                     f"Could not post-process results of {experiment}, check if a class with the same name as the experiment is defined with a generate method in the analysis folder. Skipping this step."
                 )
                 click.echo(e)
+            if trace_stages:
+                __post_process_stage_trace(run_name)
+
+    if post_process and config["targets"] is not None:
+        try:
+            TargetComparisonAnalysis(name).generate()
+        except Exception as e:
+            click.echo(f"Could not compare the results of the targets: {e}")
+
+    if record_trace:
+        recorder.stop()
+        recorder.save(f"data/{name}/trace.csv")
+    if trace_stages:
+        tracer.stop()
+    if register_nodes:
+        registration.stop()
+        if registration.failures > 0:
+            click.echo(
+                f"{registration.failures} client(s) could not register the nodes and used their node IDs."
+            )
+    if sample_resources:
+        sampler.stop()
+    if len(failed_runs) > 0:
+        click.echo(f"{len(failed_runs)} experiment(s) failed: {', '.join(failed_runs)}")
+        sys.exit(1)
+
+
+# MATRIX
+@main.command(
+    "run-matrix",
+    help="Run the cells of an experiment matrix (see experiments/matrix.yaml), resuming the session if it was interrupted",
+)
+@click.argument("matrix_file", type=click.Path(exists=True))
+@click.option("-c", "--config", "config", default="experiments/config.yaml")
+@click.option(
+    "-n",
+    "--name",
+    "name",
+    default=None,
+    help="Name of the session (and of the result folder), by default the name of the matrix file and the current date and time. Give the name of an interrupted session to resume it",
+)
+def main_run_matrix(matrix_file, config, name):
+    try:
+        spec = load_matrix(matrix_file)
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        click.echo(f"Could not load the matrix {matrix_file}: {e}")
+        return
+    if name is None:
+        name = (
+            f'{Path(matrix_file).stem}_{datetime.now().strftime("%d-%m-%Y_%H-%M-%S")}'
+        )
+    try:
+        runner = MatrixRunner(
+            spec,
+            name,
+            main_run_experiment,
+            main_server,
+            spec.get("config", config),
+        )
+        records = asyncio.run(runner.run())
+    except (ValueError, RuntimeError) as e:
+        click.echo(e)
+        return
+    failed = [cell for cell, record in records.items() if record["status"] != "done"]
+    click.echo(
+        f"\t➡️ {len(records) - len(failed)} of {len(runner.cells)} cells done, results in data/{name}"
+    )
+    if len(failed) > 0:
+        click.echo(
+            f"{len(failed)} cells failed, run the command again with --name {name} to retry them."
+        )
+
+
+# TRACES
+@main.command(
+    "import-trace", help="Convert a CSV log of client operations to a workload trace"
+)
+@click.argument("log_file", type=click.Path(exists=True))
+@click.argument("output_file", type=click.Path())
+@click.option(
+    "--timestamp-column",
+    default="timestamp",
+    help="Column of the operation timestamps (UNIX timestamps in seconds or dates)",
+)
+@click.option(
+    "--client-column",
+    default="client",
+    help="Column identifying the client of the operation",
+)
+@click.option(
+    "--service-column",
+    default="service",
+    help="Column of the service names (read, write or call)",
+)
+@click.option(
+    "--node-column", default="node_id", help="Column of the node IDs of the operation"
+)
+@click.option(
+    "--size-column", default=None, help="Column of the payload sizes in bytes"
+)
+@click.option(
+    "--node-separator", default="|", help="Separator of the node IDs of an operation"
+)
+def main_import_trace(
+    log_file,
+    output_file,
+    timestamp_column,
+    client_column,
+    service_column,
+    node_column,
+    size_column,
+    node_separator,
+):
+    try:
+        trace = import_csv_log(
+            log_file,
+            timestamp_column=timestamp_column,
+            client_column=client_column,
+            service_column=service_column,
+            node_column=node_column,
+            size_column=size_column,
+            node_separator=node_separator,
+        )
+    except KeyError as e:
+        click.echo(f"Column {e} not found in {log_file}.")
+        return
+    except ValueError as e:
+        click.echo(f"Could not parse the timestamps of {log_file}: {e}")
+        return
+    trace.to_csv(output_file, index=False)
+    click.echo(f"\t➡️ Trace of {len(trace)} operations written to {output_file}")
+
+
+# RESULTS
+@main.command(
+    "results", help="List the result files of the result store matching the filters"
+)
+@click.option("-se", "--session", "sessions", multiple=True, help="Session name")
+@click.option(
+    "-e",
+    "--experiment",
+    "experiments",
+    multiple=True,
+    help="Experiment class, e.g. ScalabilityExperiment",
+)
+@click.option("-tn", "--target", "targets", multiple=True, help="Target name")
+@click.option("-m", "--mode", "modes", multiple=True, help="Mode of the experiment")
+@click.option(
+    "-nc",
+    "--nclients",
+    "nclients",
+    multiple=True,
+    type=int,
+    help="Number of concurrent clients",
+)
+@click.option(
+    "-pm",
+    "--parameter",
+    "parameters",
+    multiple=True,
+    help='Parameter filter, e.g. "data_size=64" (repeatable)',
+)
+@click.option(
+    "-o",
+    "--output",
+    "output_file",
+    default=None,
+    help="CSV file to write the matching result files to, instead of printing them",
+)
+def main_results(
+    sessions, experiments, targets, modes, nclients, parameters, output_file
+):
+    try:
+        parameters = __parse_tags(parameters)
+    except ValueError:
+        click.echo(
+            f"Could not parse your parameters {parameters}. Should be of the form KEY=VALUE."
+        )
+        return
+    # Repeated options match any of their values
+    with ResultStore() as store:
+        results = store.query(
+            session=list(sessions) or None,
+            experiment=list(experiments) or None,
+            target=list(targets) or None,
+            mode=list(modes) or None,
+            n_clients=list(nclients) or None,
+            parameters=parameters,
+        )
+    if output_file is not None:
+        results.to_csv(output_file, index=False)
+        click.echo(f"\t➡️ {len(results)} result files written to {output_file}")
+        return
+    click.echo(
+        results[RESULT_COLUMNS[:-2] + ["rows"]].to_string(index=False)
+        if len(results) > 0
+        else "No result files match the filters."
+    )
 
 
 # ANALYSIS
@@ -218,45 +1320,75 @@ def main_run_experiment(
     required=True,
     type=str,
 )
-def main_post_process(session_names):
-    # Detect all experiments that have been run in the session folder
+@click.option(
+    "-cf",
+    "--compact-figures",
+    "compact_figures",
+    default=False,
+    is_flag=True,
+    help="Save the figures as compact raster images, at a lower resolution (flag)",
+)
+def main_post_process(session_names, compact_figures):
+    set_compact_figures(compact_figures)
     for session_name in session_names:
-        click.echo(f"Detecting experiment results in session {session_name}...")
-        detected_experiments = set()
+        manifest = Path(f"data/{session_name}/targets.json")
+        if not manifest.exists():
+            __post_process_session(session_name)
+            continue
+        # Multi-target session: analyze each run, then compare the targets
+        with open(manifest) as f:
+            target_runs = json.load(f)["runs"]
+        for run_names in target_runs.values():
+            for run_name in run_names:
+                __post_process_session(run_name)
         try:
-            path = f"data/{session_name}/"
-            results_pathlist = Path(path).glob("*")
-            for r_path in results_pathlist:
-                for experiment in available_experiments:
-                    if (
-                        r_path.is_file()
-                        and "__" not in str(r_path)
-                        and str(r_path.name).startswith(
-                            ___filename_to_classname(experiment, "Experiment")
-                        )
-                    ):
-                        detected_experiments.add(experiment)
-        except:
-            click.echo("Could not find the requested session folder in data.")
-            pass
-        if len(detected_experiments) == 0:
-            click.echo("No experimental results found in the session folder.")
-            pass
-
-        # For each detected experiment, run the according analyzer
-        for experiment in detected_experiments:
-            try:
-                analysis_class_ = getattr(
-                    importlib.import_module(f"analysis.{experiment}"),
-                    ___filename_to_classname(experiment, type="Analysis"),
-                )
-                analysis_client = analysis_class_(experiment_name=session_name)
-                analysis_client.generate()
-            except Exception as e:
-                print(e)
-                click.echo(
-                    f"Could not post-process results of {experiment}, check if a class with the same name as the experiment is defined with a generate method in the analysis folder. Skipping this experiment."
-                )
+            TargetComparisonAnalysis(session_name).generate()
+        except Exception as e:
+            click.echo(f"Could not compare the results of the targets: {e}")
+
+
+def __post_process_session(session_name):
+    # Detect all experiments that have been run in the session folder
+    click.echo(f"Detecting experiment results in session {session_name}...")
+    detected_experiments = set()
+    if not Path(f"data/{session_name}").is_dir():
+        click.echo("Could not find the requested session folder in data.")
+    else:
+        with ResultStore() as store:
+            recorded_experiments = set(store.query(run=session_name)["experiment"])
+        for experiment in available_experiments:
+            if (
+                ___filename_to_classname(experiment, "Experiment")
+                in recorded_experiments
+            ):
+                detected_experiments.add(experiment)
+    if len(detected_experiments) == 0:
+        click.echo("No experimental results found in the session folder.")
+        pass
+
+    # For each detected experiment, run the according analyzer
+    for experiment in detected_experiments:
+        try:
+            analysis_class_ = getattr(
+                importlib.import_module(f"analysis.{experiment}"),
+                ___filename_to_classname(experiment, type="Analysis"),
+            )
+            analysis_client = analysis_class_(experiment_name=session_name)
+            analysis_client.generate()
+        except Exception as e:
+            print(e)
+            click.echo(
+                f"Could not post-process results of {experiment}, check if a class with the same name as the experiment is defined with a generate method in the analysis folder. Skipping this experiment."
+            )
+    if Path(f"data/{session_name}/stage_trace.csv").exists():
+        __post_process_stage_trace(session_name)
+
+
+def __post_process_stage_trace(session_name):
+    try:
+        StageTraceAnalysis(session_name).generate()
+    except Exception as e:
+        click.echo(f"Could not break down the request stages: {e}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,247 @@
+import asyncio
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+from asyncua import Client, ua
+from tqdm import tqdm
+
+from experiments.store import ResultStore
+
+
+class ConnectionStormExperiment:
+    """Experiment for measuring how an OPC UA server copes with a storm of clients (re)connecting at once, e.g. after
+    a plant-wide power restore: session establishment latency, failures and rejections, and the read latency of the
+    clients already connected during the storm.
+    """
+
+    def __init__(
+        self,
+        server_url,
+        node_ids,
+        server_user,
+        server_password,
+        server_cert_app_uri,
+        server_pub_cert,
+        server_priv_cert,
+        experiment_name=f'connection_storm_{datetime.now().strftime("%d-%m-%Y_%H-%M-%S")}',
+        num_requests=1000,
+        data_size=64,
+    ):
+        self.server_url = server_url
+        self.node_ids = node_ids
+        self.experiment_name = experiment_name
+        self.num_requests = num_requests
+        self.data_size = data_size
+        self.server_user = server_user
+        self.server_password = server_password
+        self.server_cert_app_uri = server_cert_app_uri
+        self.server_pub_cert = server_pub_cert
+        self.server_priv_cert = server_priv_cert
+
+    async def create_client(self):
+        client = Client(self.server_url)
+        client.set_user(self.server_user)
+        client.set_password(self.server_password)
+        if self.server_cert_app_uri is not None:
+            client.application_uri = self.server_cert_app_uri
+            await client.set_security_string(
+                "Basic256,Sign,uaexpert.der,uaexpert_key.pem"
+            )
+        return client
+
+    async def open_session(self, client_id, burst, scheduled_time, sessions, progress):
+        """Opens a session at its scheduled time, and records how long it took to establish and how it failed.
+
+        A session is "rejected" when the server refuses it (status code, refused or reset connection), "timeout" when
+        the server does not answer in time, and "failed" on any other error.
+
+        Returns:
+            Client: the connected client, None if the session could not be established
+        """
+        await asyncio.sleep(max(0, scheduled_time - time.time()))
+        client = await self.create_client()
+        status, error = "established", None
+        start_time = time.time()
+        try:
+            await client.connect()
+        except ua.UaStatusCodeError as e:
+            status, error = "rejected", type(e).__name__
+        except (ConnectionRefusedError, ConnectionResetError) as e:
+            status, error = "rejected", type(e).__name__
+        except (asyncio.TimeoutError, TimeoutError) as e:
+            status, error = "timeout", type(e).__name__
+        except Exception as e:
+            status, error = "failed", type(e).__name__
+        end_time = time.time()
+        sessions.append(
+            {
+                "client_id": client_id,
+                "burst": burst,
+                "scheduled_time": scheduled_time,
+                "start_time": start_time,
+                "end_time": end_time,
+                "status": status,
+                "error": error,
+            }
+        )
+        progress.update(1)
+        if status != "established":
+            try:
+                await client.disconnect()
+            except Exception:
+                pass
+            return None
+        return client
+
+    async def observe(self, observer_id, request_interval, requests, done):
+        """Reads the nodes every request_interval seconds with an already connected client, until done is set."""
+        client = await self.create_client()
+        await client.connect()
+        nodes = [client.get_node(node_id) for node_id in self.node_ids]
+        try:
+            next_request = time.time()
+            while not done.is_set():
+                start_time = time.time()
+                success = True
+                try:
+                    await client.read_values(nodes)
+                except Exception:
+                    success = False
+                requests.append(
+                    {
+                        "client_id": observer_id,
+                        "start_time": start_time,
+                        "end_time": time.time(),
+                        "success": success,
+                    }
+                )
+                next_request += request_interval
+                await asyncio.sleep(max(0, next_request - time.time()))
+        finally:
+            try:
+                await client.disconnect()
+            except Exception:
+                pass
+
+    async def run_storm(
+        self, n_clients, connect_rate, burst_size, n_observers, request_interval, settle
+    ):
+        """Opens n_clients sessions in bursts of burst_size sessions, at connect_rate sessions per second on average,
+        while observers read the nodes from settle seconds before the storm to settle seconds after it. The sessions
+        are kept open until the end of the storm.
+
+        Returns:
+            list: one record per session
+            list: one record per read request of the observers
+        """
+        sessions = []
+        requests = []
+        done = asyncio.Event()
+        observers = [
+            asyncio.create_task(self.observe(i, request_interval, requests, done))
+            for i in range(n_observers)
+        ]
+        await asyncio.sleep(settle)
+
+        # Absolute schedule of the bursts: they do not wait for the previous sessions to be established
+        t0 = time.time()
+        burst_interval = burst_size / connect_rate if connect_rate > 0 else 0
+        with tqdm(
+            total=n_clients,
+            desc=f"Opening {n_clients} sessions at {connect_rate:g} sessions/s in bursts of {burst_size}",
+            unit=" sessions",
+        ) as progress:
+            clients = await asyncio.gather(
+                *[
+                    self.open_session(
+                        i,
+                        i // burst_size,
+                        t0 + (i // burst_size) * burst_interval,
+                        sessions,
+                        progress,
+                    )
+                    for i in range(n_clients)
+                ]
+            )
+        await asyncio.sleep(settle)
+
+        done.set()
+        await asyncio.gather(*observers, return_exceptions=True)
+        await asyncio.gather(
+            *[client.disconnect() for client in clients if client is not None],
+            return_exceptions=True,
+        )
+        return sessions, requests
+
+    async def run_experiment(
+        self,
+        n_clients=100,
+        connect_rates=[0],
+        burst_sizes=[1],
+        n_observers=2,
+        request_interval=0.01,
+        settle=2.0,
+    ):
+        """Runs a connection storm for each connect rate and burst size, and measures the establishment of the
+        sessions and the read latency of the observers.
+
+        Args:
+            n_clients: number of sessions opened by each storm
+            connect_rates: list of average connection rates, in sessions per second, 0 to open every session at once
+            burst_sizes: list of numbers of sessions opened at the same time
+            n_observers: number of clients connected before the storm, reading the nodes during it
+            request_interval: period of the read requests of the observers, in seconds
+            settle: observation time before and after each storm, in seconds
+        """
+        for connect_rate in connect_rates:
+            for burst_size in burst_sizes:
+                sessions, requests = await self.run_storm(
+                    n_clients,
+                    connect_rate,
+                    int(burst_size),
+                    n_observers,
+                    request_interval,
+                    settle,
+                )
+                mode = f"rate{connect_rate:g}_burst{int(burst_size)}"
+                sessions = pd.DataFrame().from_records(sessions)
+                sessions["connect_rate"] = connect_rate
+                sessions["burst_size"] = int(burst_size)
+                requests = pd.DataFrame().from_records(
+                    requests, columns=["client_id", "start_time", "end_time", "success"]
+                )
+
+                output_dir = Path(f"data/{self.experiment_name}")
+                output_dir.mkdir(parents=True, exist_ok=True)
+                for df, output_file, kind in [
+                    (sessions, f"{self.__class__.__name__}_{mode}.csv", "measurements"),
+                    (
+                        requests,
+                        f"{self.__class__.__name__}_{mode}_requests.csv",
+                        "requests",
+                    ),
+                ]:  # Important to have the experiment class name at the beginning of the output file for automatic detection by the analyzer
+                    df["mode"] = mode
+                    with ResultStore() as store:
+                        store.save(
+                            df,
+                            output_dir / output_file,
+                            self.experiment_name,
+                            self.__class__.__name__,
+                            mode=mode,
+                            kind=kind,
+                            n_clients=n_clients,
+                            parameters={
+                                "connect_rate": connect_rate,
+                                "burst_size": int(burst_size),
+                                "n_observers": n_observers,
+                                "request_interval": request_interval,
+                                "settle": settle,
+                                "node_ids": self.node_ids,
+                            },
+                        )
+                    print(
+                        f"\t➡️ Measurements written to {str(output_dir / output_file)}"
+                    )
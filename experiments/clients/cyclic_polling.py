@@ -0,0 +1,178 @@
+import asyncio
+import math
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+from asyncua import Client
+from tqdm import tqdm
+
+from experiments.store import ResultStore
+
+
+class CyclicPollingExperiment:
+    """Experiment for measuring the timeliness of clients polling an OPC UA server at a fixed cycle time, as the
+    cyclic tasks of a PLC do: per-cycle start error, completion time and deadline misses.
+    """
+
+    def __init__(
+        self,
+        server_url,
+        node_ids,
+        server_user,
+        server_password,
+        server_cert_app_uri,
+        server_pub_cert,
+        server_priv_cert,
+        experiment_name=f'cyclic_polling_{datetime.now().strftime("%d-%m-%Y_%H-%M-%S")}',
+        num_requests=1000,
+        data_size=64,
+    ):
+        self.server_url = server_url
+        self.node_ids = node_ids
+        self.experiment_name = experiment_name
+        self.num_requests = num_requests
+        self.data_size = data_size
+        self.server_user = server_user
+        self.server_password = server_password
+        self.server_cert_app_uri = server_cert_app_uri
+        self.server_pub_cert = server_pub_cert
+        self.server_priv_cert = server_priv_cert
+
+    async def run_client(
+        self, client_id, n_clients, cycle_time, t0, duration, phase, progress
+    ):
+        """Runs one client reading the nodes at each cycle of an absolute schedule, t0 + phase + k * cycle_time.
+
+        The schedule does not drift: a late cycle does not delay the next ones. When a read overruns the following
+        cycles, they are skipped (as a PLC task does) and counted in the skipped_cycles of the next executed cycle.
+
+        Args:
+            client_id: ID of the client
+            n_clients: number of clients polling concurrently
+            cycle_time: cycle time, in seconds
+            t0: start of the schedule, as a time.time() timestamp
+            duration: duration of the schedule, in seconds
+            phase: offset of the cycles of the client from t0, in seconds
+            progress: progress bar, updated at each cycle
+
+        Returns:
+            list: one measurement per executed cycle
+        """
+        client = Client(self.server_url)
+        client.set_user(self.server_user)
+        client.set_password(self.server_password)
+        if self.server_cert_app_uri is not None:
+            client.application_uri = self.server_cert_app_uri
+            await client.set_security_string(
+                "Basic256,Sign,uaexpert.der,uaexpert_key.pem"
+            )
+        try:
+            await client.connect()
+        except Exception as e:
+            print(f"Error: {e}")
+        nodes = [client.get_node(node_id) for node_id in self.node_ids]
+
+        # The schedule is followed on the monotonic clock of the loop, and recorded as wall clock times
+        loop = asyncio.get_running_loop()
+        loop_t0 = loop.time() + (t0 - time.time()) + phase
+        n_cycles = round(duration / cycle_time)
+        measurements = []
+        cycle = 0
+        skipped_cycles = 0
+        while cycle < n_cycles:
+            await asyncio.sleep(loop_t0 + cycle * cycle_time - loop.time())
+            start_time = time.time()
+            success = True
+            try:
+                await client.read_values(nodes)
+            except Exception:
+                success = False
+            end_time = time.time()
+
+            scheduled_time = t0 + phase + cycle * cycle_time
+            measurements.append(
+                {
+                    "scheduled_time": scheduled_time,
+                    "start_time": start_time,
+                    "end_time": end_time,
+                    "cycle": cycle,
+                    "cycle_time": cycle_time,
+                    "skipped_cycles": skipped_cycles,
+                    "n_clients": n_clients,
+                    "client_id": client_id,
+                    "success": success,
+                }
+            )
+            # Next cycle whose start is still ahead
+            next_cycle = max(
+                cycle + 1,
+                math.ceil((loop.time() - loop_t0) / cycle_time),
+            )
+            skipped_cycles = min(next_cycle, n_cycles) - cycle - 1
+            progress.update(1 + skipped_cycles)
+            cycle = next_cycle
+        await client.disconnect()
+        return measurements
+
+    async def run_experiment(
+        self, cycle_times=[1, 10, 100], l_clients=[1], duration=10.0, aligned=False
+    ):
+        """Runs the clients polling the nodes at each cycle time in turn, and measures the timeliness of each cycle.
+
+        Args:
+            cycle_times: list of cycle times, in milliseconds
+            l_clients: list of numbers of clients polling concurrently
+            duration: duration of each run, in seconds
+            aligned: if True, the cycles of every client start at the same time (worst case), otherwise they are
+                evenly staggered over the cycle time
+        """
+        for cycle_time_ms in cycle_times:
+            cycle_time = cycle_time_ms / 1000
+            measurements = []
+            for n_clients in l_clients:
+                # Leave time for the clients to connect before the first cycle
+                t0 = time.time() + 2
+                with tqdm(
+                    total=n_clients * round(duration / cycle_time),
+                    desc=f"Polling every {cycle_time_ms}ms with {n_clients} clients for {duration}s",
+                    unit=" cycles",
+                ) as progress:
+                    client_measurements = await asyncio.gather(
+                        *[
+                            self.run_client(
+                                i,
+                                n_clients,
+                                cycle_time,
+                                t0,
+                                duration,
+                                0 if aligned else i * cycle_time / n_clients,
+                                progress,
+                            )
+                            for i in range(n_clients)
+                        ]
+                    )
+                for m in client_measurements:
+                    measurements.extend(m)
+
+            df = pd.DataFrame().from_records(measurements)
+            output_file = f"{self.__class__.__name__}_{cycle_time_ms:g}ms.csv"  # Important to have the experiment class name at the beginning of the output file for automatic detection by the analyzer
+            output_dir = Path(f"data/{self.experiment_name}")
+            output_dir.mkdir(parents=True, exist_ok=True)
+            with ResultStore() as store:
+                store.save(
+                    df,
+                    output_dir / output_file,
+                    self.experiment_name,
+                    self.__class__.__name__,
+                    mode=f"{cycle_time_ms:g}ms",
+                    parameters={
+                        "cycle_time_ms": cycle_time_ms,
+                        "l_clients": l_clients,
+                        "duration": duration,
+                        "aligned": aligned,
+                        "node_ids": self.node_ids,
+                    },
+                )
+            print(f"\t➡️ Measurements written to {str(output_dir / output_file)}")
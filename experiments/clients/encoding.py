@@ -0,0 +1,274 @@
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pandas as pd
+from asyncua import ua
+from asyncua.common.utils import Buffer
+from asyncua.ua.ua_binary import (
+    struct_from_binary,
+    struct_to_binary,
+    variant_from_binary,
+    variant_to_binary,
+)
+from tqdm import tqdm
+
+from experiments.store import ResultStore
+
+# Sizes of the ByteString payloads, in bytes, besides the data size of the experiments
+BYTESTRING_SIZES = [16, 64, 1024, 65536]
+# Number of elements of the arrays
+ARRAY_SIZES = [100, 10000]
+# Number of messages encoded or decoded while tracing the memory allocations, tracing being slow
+TRACED_MESSAGES = 20
+
+
+def _data_value(value, variant_type):
+    now = datetime.now(timezone.utc)
+    return ua.DataValue(
+        ua.Variant(value, variant_type), SourceTimestamp=now, ServerTimestamp=now
+    )
+
+
+def _node_ids(n_nodes, string_ids):
+    if string_ids:  # String node IDs, as the experiment configurations use
+        return [ua.NodeId(f"Area1.Line1.Cell1.Value{i}", 2) for i in range(n_nodes)]
+    return [ua.NodeId(20000 + i, 2) for i in range(n_nodes)]
+
+
+def read_request(n_nodes, string_ids=False):
+    request = ua.ReadRequest()
+    request.Parameters = ua.ReadParameters(
+        NodesToRead=[
+            ua.ReadValueId(NodeId=node_id, AttributeId=ua.AttributeIds.Value)
+            for node_id in _node_ids(n_nodes, string_ids)
+        ]
+    )
+    return request
+
+
+def read_response(n_nodes, data_size):
+    response = ua.ReadResponse()
+    response.Results = [
+        _data_value(b"\x00" * data_size, ua.VariantType.ByteString)
+        for _ in range(n_nodes)
+    ]
+    return response
+
+
+def write_request(n_nodes, data_size, string_ids=False):
+    request = ua.WriteRequest()
+    request.Parameters = ua.WriteParameters(
+        NodesToWrite=[
+            ua.WriteValue(
+                NodeId=node_id,
+                AttributeId=ua.AttributeIds.Value,
+                Value=_data_value(b"\x00" * data_size, ua.VariantType.ByteString),
+            )
+            for node_id in _node_ids(n_nodes, string_ids)
+        ]
+    )
+    return request
+
+
+def server_status():
+    """ServerStatusDataType structure, encoded as an ExtensionObject in a Variant."""
+    now = datetime.now(timezone.utc)
+    return ua.ServerStatusDataType(
+        StartTime=now,
+        CurrentTime=now,
+        State=ua.ServerState.Running,
+        BuildInfo=ua.BuildInfo(
+            ProductUri="urn:freeopcua:python:server",
+            ManufacturerName="FreeOpcUa",
+            ProductName="TestServer",
+            SoftwareVersion="2.1.0",
+            BuildNumber="0",
+            BuildDate=now,
+        ),
+        SecondsTillShutdown=0,
+        ShutdownReason=ua.LocalizedText(""),
+    )
+
+
+class EncodingExperiment:
+    """Micro-benchmark of the asyncua binary encoding and decoding of the payloads of the experiments: ByteStrings,
+    arrays, numeric scalars and structures (ExtensionObjects) as Variants, and whole Read and Write service messages,
+    to tell whether the CPU of the clients spent on serialization limits the scalability runs.
+
+    The messages are encoded without their chunk and security headers. The benchmark runs in the harness process only,
+    it does not connect to the server.
+    """
+
+    def __init__(
+        self,
+        server_url,
+        node_ids,
+        server_user,
+        server_password,
+        server_cert_app_uri,
+        server_pub_cert,
+        server_priv_cert,
+        experiment_name=f'encoding_{datetime.now().strftime("%d-%m-%Y_%H-%M-%S")}',
+        num_requests=1000,
+        data_size=64,
+    ):
+        self.server_url = server_url
+        self.node_ids = node_ids
+        self.experiment_name = experiment_name
+        self.num_requests = num_requests
+        self.data_size = data_size
+        self.server_user = server_user
+        self.server_password = server_password
+        self.server_cert_app_uri = server_cert_app_uri
+        self.server_pub_cert = server_pub_cert
+        self.server_priv_cert = server_priv_cert
+
+    def payloads(self, n_nodes):
+        """Payloads of the benchmark.
+
+        Returns:
+            list: name, kind ("variant" or "message") and value of each payload
+        """
+        payloads = [
+            (f"bytestring_{size}", "variant", ua.Variant(b"\x00" * size))
+            for size in sorted(set(BYTESTRING_SIZES + [self.data_size]))
+        ]
+        for size in ARRAY_SIZES:
+            payloads += [
+                (
+                    f"double_array_{size}",
+                    "variant",
+                    ua.Variant([float(i) for i in range(size)], ua.VariantType.Double),
+                ),
+                (
+                    f"int32_array_{size}",
+                    "variant",
+                    ua.Variant(list(range(size)), ua.VariantType.Int32),
+                ),
+            ]
+        payloads += [
+            ("double", "variant", ua.Variant(1.5, ua.VariantType.Double)),
+            ("int32", "variant", ua.Variant(42, ua.VariantType.Int32)),
+            ("boolean", "variant", ua.Variant(True, ua.VariantType.Boolean)),
+            ("structure", "variant", ua.Variant(server_status())),
+            (f"read_request_{n_nodes}", "message", read_request(n_nodes)),
+            (
+                f"read_request_string_ids_{n_nodes}",
+                "message",
+                read_request(n_nodes, string_ids=True),
+            ),
+            (
+                f"read_response_{n_nodes}",
+                "message",
+                read_response(n_nodes, self.data_size),
+            ),
+            (
+                f"write_request_{n_nodes}",
+                "message",
+                write_request(n_nodes, self.data_size),
+            ),
+        ]
+        return payloads
+
+    def measure(self, operation, duration):
+        """Runs an operation repeatedly for at least duration seconds, then traces the memory it allocates.
+
+        Returns:
+            dict: number of runs, wall-clock and CPU time, and per run, the peak of memory allocated and the number of
+                memory blocks still allocated afterwards (by the result)
+        """
+        operation()  # Warm-up
+        iterations = 0
+        batch = 1
+        start_time = time.perf_counter()
+        start_cpu = time.process_time()
+        while time.perf_counter() - start_time < duration:
+            for _ in range(batch):
+                operation()
+            iterations += batch
+            batch *= 2
+        elapsed = time.perf_counter() - start_time
+        cpu_time = time.process_time() - start_cpu
+
+        # CPython does not count allocations: the peak of traced memory gives the memory allocated per run, the
+        # blocks still allocated after the runs, their results being kept, the objects each run creates
+        results = []
+        tracemalloc.start()
+        peaks = []
+        before = tracemalloc.take_snapshot()
+        for _ in range(TRACED_MESSAGES):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            results.append(operation())
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+        return {
+            "iterations": iterations,
+            "elapsed": elapsed,
+            "cpu_time": cpu_time,
+            "peak_bytes_per_message": sum(peaks) / len(peaks),
+            "retained_blocks_per_message": blocks / TRACED_MESSAGES,
+        }
+
+    async def run_experiment(self, n_nodes=10, duration=0.5):
+        """Measures the encoding and decoding throughput of each payload.
+
+        Args:
+            n_nodes: number of nodes of the Read and Write messages
+            duration: minimum duration of the measurement of each payload and operation, in seconds
+        """
+        measurements = []
+        payloads = self.payloads(n_nodes)
+        for name, kind, value in tqdm(
+            payloads, desc="Benchmarking the encoding of the payloads", unit=" payloads"
+        ):
+            if kind == "variant":
+                data = variant_to_binary(value)
+                operations = {
+                    "encode": lambda: variant_to_binary(value),
+                    "decode": lambda: variant_from_binary(Buffer(data)),
+                }
+            else:
+                data = struct_to_binary(value)
+                operations = {
+                    "encode": lambda: struct_to_binary(value),
+                    "decode": lambda: struct_from_binary(type(value), Buffer(data)),
+                }
+            for operation, run in operations.items():
+                measurement = self.measure(run, duration)
+                measurements.append(
+                    {
+                        "payload": name,
+                        "kind": kind,
+                        "operation": operation,
+                        "encoded_size": len(data),
+                        **measurement,
+                        "messages_per_second": measurement["iterations"]
+                        / measurement["elapsed"],
+                        "bytes_per_second": measurement["iterations"]
+                        * len(data)
+                        / measurement["elapsed"],
+                    }
+                )
+
+        df = pd.DataFrame().from_records(measurements)
+        output_file = f"{self.__class__.__name__}.csv"  # Important to have the experiment class name at the beginning of the output file for automatic detection by the analyzer
+        output_dir = Path(f"data/{self.experiment_name}")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with ResultStore() as store:
+            store.save(
+                df,
+                output_dir / output_file,
+                self.experiment_name,
+                self.__class__.__name__,
+                parameters={
+                    "n_nodes": n_nodes,
+                    "data_size": self.data_size,
+                    "duration": duration,
+                },
+            )
+        print(f"\t➡️ Measurements written to {str(output_dir / output_file)}")
@@ -0,0 +1,335 @@
+import asyncio
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+from asyncua import Client, ua
+from asyncua.common.events import get_filter_from_event_type
+from tqdm import tqdm
+
+from experiments.servers.test_server import EVENT_TYPES, event_severity
+from experiments.store import ResultStore
+
+# Minimum severity of the events selected by the "where" filter: 6 events out of 10 of the test server
+WHERE_SEVERITY = 500
+
+
+class _EventHandler:
+    """Subscription handler recording the sequence number, emit and receive times of each event."""
+
+    def __init__(self, client_id, n_clients, event_types, processing_time):
+        self.client_id = client_id
+        self.n_clients = n_clients
+        self.event_types = event_types
+        self.processing_time = processing_time
+        self.events = []
+
+    def event_notification(self, event):
+        receive_time = time.time()
+        self.events.append(
+            {
+                "client_id": self.client_id,
+                "n_clients": self.n_clients,
+                "event_type": self.event_types.get(event.EventType),
+                "sequence": event.Sequence,
+                "emit_time": event.EmitTime,
+                "receive_time": receive_time,
+            }
+        )
+        # Slow consumer: blocks the event loop of the clients, which delays their publish requests
+        deadline = time.perf_counter() + self.processing_time
+        while time.perf_counter() < deadline:
+            pass
+
+
+class EventThroughputExperiment:
+    """Experiment for measuring the delivery of events by an OPC UA server to many subscribed clients: delivery
+    latency, events/s per client and events lost under back-pressure, for event filters of increasing complexity.
+
+    The events are emitted by the test server (see the --event-rate option of the server command), each carrying a
+    sequence number and the time at which it was emitted.
+    """
+
+    FILTERS = ["minimal", "full", "where"]
+
+    def __init__(
+        self,
+        server_url,
+        node_ids,
+        server_user,
+        server_password,
+        server_cert_app_uri,
+        server_pub_cert,
+        server_priv_cert,
+        experiment_name=f'event_throughput_{datetime.now().strftime("%d-%m-%Y_%H-%M-%S")}',
+        num_requests=1000,
+        data_size=64,
+    ):
+        self.server_url = server_url
+        self.node_ids = node_ids
+        self.experiment_name = experiment_name
+        self.num_requests = num_requests
+        self.data_size = data_size
+        self.server_user = server_user
+        self.server_password = server_password
+        self.server_cert_app_uri = server_cert_app_uri
+        self.server_pub_cert = server_pub_cert
+        self.server_priv_cert = server_priv_cert
+
+    async def get_event_types(self, client, event_types):
+        """Looks up the custom event types of the test server, by name.
+
+        Returns:
+            dict: node of each event type
+        """
+        nodes = {}
+        for event_type in event_types:
+            for child in await client.get_node(EVENT_TYPES[event_type]).get_children(
+                refs=ua.ObjectIds.HasSubtype
+            ):
+                if (await child.read_browse_name()).Name == event_type:
+                    nodes[event_type] = child
+            if event_type not in nodes:
+                raise ValueError(
+                    f"The server does not define the event type {event_type}, start it with --event-types"
+                )
+        return nodes
+
+    async def create_filter(self, event_filter, event_types):
+        """Creates the event filter of the given complexity.
+
+        Args:
+            event_filter: "minimal" (select the event type, sequence number and emit time only), "full" (select every
+                field of the event types, where clause on the event types) or "where" (as "full", with an additional
+                where clause on the severity of the events)
+            event_types: nodes of the event types to subscribe to
+
+        Returns:
+            ua.EventFilter: the event filter
+        """
+        if event_filter not in EventThroughputExperiment.FILTERS:
+            raise ValueError(
+                f"Invalid filter {event_filter}, expected one of {EventThroughputExperiment.FILTERS}"
+            )
+        evfilter = await get_filter_from_event_type(event_types)
+        if event_filter == "minimal":
+            evfilter.SelectClauses = [
+                clause
+                for clause in evfilter.SelectClauses
+                if len(clause.BrowsePath) == 1
+                and clause.BrowsePath[0].Name in ["EventType", "Sequence", "EmitTime"]
+            ]
+            evfilter.WhereClause = ua.ContentFilter()
+        elif event_filter == "where":
+            severity = ua.SimpleAttributeOperand(
+                TypeDefinitionId=ua.NodeId(ua.ObjectIds.BaseEventType),
+                BrowsePath=[ua.QualifiedName("Severity", 0)],
+                AttributeId=ua.AttributeIds.Value,
+            )
+            elements = evfilter.WhereClause.Elements
+            # Root element: event types clause (shifted by one) and severity clause (appended)
+            for element in elements:
+                for operand in element.FilterOperands:
+                    if isinstance(operand, ua.ElementOperand):
+                        operand.Index += 1
+            evfilter.WhereClause.Elements = [
+                ua.ContentFilterElement(
+                    FilterOperator=ua.FilterOperator.And,
+                    FilterOperands=[
+                        ua.ElementOperand(Index=1),
+                        ua.ElementOperand(Index=len(elements) + 1),
+                    ],
+                ),
+                *elements,
+                ua.ContentFilterElement(
+                    FilterOperator=ua.FilterOperator.GreaterThanOrEqual,
+                    FilterOperands=[
+                        severity,
+                        ua.LiteralOperand(
+                            Value=ua.Variant(WHERE_SEVERITY, ua.VariantType.UInt16)
+                        ),
+                    ],
+                ),
+            ]
+        return evfilter
+
+    async def run_client(
+        self,
+        client_id,
+        n_clients,
+        event_filter,
+        event_types,
+        duration,
+        publishing_interval,
+        queue_size,
+        processing_time,
+        progress,
+    ):
+        """Runs one client subscribed to the events of the Server object for duration seconds.
+
+        Returns:
+            list: one record per received event
+        """
+        client = Client(self.server_url)
+        client.set_user(self.server_user)
+        client.set_password(self.server_password)
+        if self.server_cert_app_uri is not None:
+            client.application_uri = self.server_cert_app_uri
+            await client.set_security_string(
+                "Basic256,Sign,uaexpert.der,uaexpert_key.pem"
+            )
+        await client.connect()
+        try:
+            types = await self.get_event_types(client, event_types)
+            handler = _EventHandler(
+                client_id,
+                n_clients,
+                {node.nodeid: name for name, node in types.items()},
+                processing_time,
+            )
+            subscription = await client.create_subscription(
+                publishing_interval, handler
+            )
+            await subscription.subscribe_events(
+                client.nodes.server,
+                list(types.values()),
+                evfilter=await self.create_filter(event_filter, list(types.values())),
+                queuesize=queue_size,
+            )
+            await asyncio.sleep(duration)
+        finally:
+            await client.disconnect()
+        progress.update(1)
+        return handler.events
+
+    def count_losses(self, events, event_filter):
+        """Counts the events of each client and event type lost between the first and last event it received, from
+        the gaps in their sequence numbers.
+
+        Returns:
+            pd.DataFrame: expected, received and lost events of each client and event type
+        """
+        losses = []
+        for (n_clients, client_id, event_type), frame in events.groupby(
+            ["n_clients", "client_id", "event_type"]
+        ):
+            first, last = frame["sequence"].min(), frame["sequence"].max()
+            if event_filter == "where":
+                expected = sum(
+                    event_severity(sequence) >= WHERE_SEVERITY
+                    for sequence in range(first, last + 1)
+                )
+            else:
+                expected = last - first + 1
+            received = frame["sequence"].nunique()
+            losses.append(
+                {
+                    "n_clients": n_clients,
+                    "client_id": client_id,
+                    "event_type": event_type,
+                    "first_sequence": first,
+                    "last_sequence": last,
+                    "expected": expected,
+                    "received": received,
+                    "lost": expected - received,
+                    "first_receive_time": frame["receive_time"].min(),
+                    "last_receive_time": frame["receive_time"].max(),
+                }
+            )
+        return pd.DataFrame().from_records(losses)
+
+    async def run_experiment(
+        self,
+        filters=None,
+        l_clients=[1],
+        event_types=["TestEvent"],
+        duration=10.0,
+        publishing_interval=50,
+        queue_size=0,
+        processing_time=0.0,
+    ):
+        """Subscribes the clients to the events emitted by the test server, with each event filter in turn, and
+        records the events they receive.
+
+        The latency of an event is measured from the time the server emitted it, the server and the clients must
+        then share the same clock (run on the same host, or be synchronized).
+
+        Args:
+            filters: list of event filters among FILTERS (see create_filter), by default each one is run
+            l_clients: list of numbers of clients subscribed concurrently
+            event_types: list of the event types to subscribe to, emitted by the test server
+            duration: duration of each run, in seconds
+            publishing_interval: publishing interval of the subscriptions, in milliseconds
+            queue_size: size of the event queue of the monitored items on the server, the oldest events being
+                dropped when it is full, 0 for the default size of the server
+            processing_time: time spent by the clients on each event, in seconds, blocking their event loop to
+                apply back-pressure to the server
+        """
+        for event_filter in filters or EventThroughputExperiment.FILTERS:
+            events = []
+            for n_clients in l_clients:
+                with tqdm(
+                    total=n_clients,
+                    desc=f"Subscribing {n_clients} clients to {', '.join(event_types)} events with the {event_filter} filter for {duration}s",
+                    unit=" clients",
+                ) as progress:
+                    client_events = await asyncio.gather(
+                        *[
+                            self.run_client(
+                                i,
+                                n_clients,
+                                event_filter,
+                                event_types,
+                                duration,
+                                publishing_interval,
+                                queue_size,
+                                processing_time,
+                                progress,
+                            )
+                            for i in range(n_clients)
+                        ]
+                    )
+                for e in client_events:
+                    events.extend(e)
+
+            events = pd.DataFrame().from_records(
+                events,
+                columns=[
+                    "client_id",
+                    "n_clients",
+                    "event_type",
+                    "sequence",
+                    "emit_time",
+                    "receive_time",
+                ],
+            )
+            losses = self.count_losses(events, event_filter)
+            output_dir = Path(f"data/{self.experiment_name}")
+            output_dir.mkdir(parents=True, exist_ok=True)
+            for df, output_file, kind in [
+                (events, f"{self.__class__.__name__}_{event_filter}.csv", "events"),
+                (
+                    losses,
+                    f"{self.__class__.__name__}_{event_filter}_losses.csv",
+                    "losses",
+                ),
+            ]:  # Important to have the experiment class name at the beginning of the output file for automatic detection by the analyzer
+                with ResultStore() as store:
+                    store.save(
+                        df,
+                        output_dir / output_file,
+                        self.experiment_name,
+                        self.__class__.__name__,
+                        mode=event_filter,
+                        kind=kind,
+                        parameters={
+                            "l_clients": l_clients,
+                            "event_types": event_types,
+                            "duration": duration,
+                            "publishing_interval": publishing_interval,
+                            "queue_size": queue_size,
+                            "processing_time": processing_time,
+                        },
+                    )
+                print(f"\t➡️ Measurements written to {str(output_dir / output_file)}")
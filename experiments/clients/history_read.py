@@ -0,0 +1,157 @@
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+from asyncua import Client, ua
+from tqdm import tqdm
+
+from experiments.store import ResultStore
+
+
+class HistoryReadExperiment:
+    """Experiment for measuring the performance of the HistoryRead service of an OPC UA server, for raw and paged reads over different time ranges."""
+
+    def __init__(
+        self,
+        server_url,
+        node_ids,
+        server_user,
+        server_password,
+        server_cert_app_uri,
+        server_pub_cert,
+        server_priv_cert,
+        experiment_name=f'history_read_{datetime.now().strftime("%d-%m-%Y_%H-%M-%S")}',
+        num_requests=20,
+        data_size=64,
+    ):
+        self.server_url = server_url
+        self.node_ids = node_ids
+        self.experiment_name = experiment_name
+        self.num_requests = num_requests
+        self.data_size = data_size
+        self.server_user = server_user
+        self.server_password = server_password
+        self.server_cert_app_uri = server_cert_app_uri
+        self.server_pub_cert = server_pub_cert
+        self.server_priv_cert = server_priv_cert
+
+    async def measure_history_pages(self, node, time_range, page_size, read_id):
+        """Reads the raw history of a node over the last time_range seconds, page by page.
+
+        Pages are followed through the continuation points returned by the server. If the server
+        does not return any but fills the page, the next page is requested from the source
+        timestamp of the last value read.
+
+        Args:
+            node: node to read the history of
+            time_range: length of the time range to read, in seconds before now
+            page_size: maximum number of values per page (NumValuesPerNode), 0 for a raw unpaged read
+            read_id: identifier of the read, shared by its pages
+
+        Returns:
+            list: one measurement per page
+        """
+        end = datetime.now(timezone.utc)
+        details = ua.ReadRawModifiedDetails()
+        details.IsReadModified = False
+        details.StartTime = end - timedelta(seconds=time_range)
+        details.EndTime = end
+        details.NumValuesPerNode = page_size
+        details.ReturnBounds = False
+
+        pages = []
+        continuation_point = None
+        while True:
+            start_time = time.time()
+            result = await node.history_read(details, continuation_point)
+            end_time = time.time()
+            result.StatusCode.check()
+            values = result.HistoryData.DataValues or []
+
+            if result.ContinuationPoint is not None:
+                paging = "continuation"
+            elif page_size > 0 and len(values) == page_size:
+                paging = "timestamp"
+            else:
+                paging = None
+            pages.append(
+                {
+                    "start_time": start_time,
+                    "end_time": end_time,
+                    "read_id": read_id,
+                    "page_index": len(pages),
+                    "n_values": len(values),
+                    "time_range": time_range,
+                    "page_size": page_size,
+                    "paging": paging,
+                    "node_id": node.nodeid.to_string(),
+                }
+            )
+
+            if paging == "continuation":
+                continuation_point = result.ContinuationPoint
+            elif paging == "timestamp":
+                details.StartTime = values[-1].SourceTimestamp + timedelta(
+                    microseconds=1
+                )
+            else:
+                return pages
+
+    async def run_experiment(self, time_ranges=[1, 10, 60], page_sizes=[0, 100, 1000]):
+        """Runs num_requests history reads for each time range and page size, and measures start- and end-times of pages.
+
+        Args:
+            time_ranges: list of time ranges to read, in seconds before now
+            page_sizes: list of page sizes (NumValuesPerNode), 0 for a raw unpaged read
+        """
+        client = Client(self.server_url)
+        client.set_user(self.server_user)
+        client.set_password(self.server_password)
+        if self.server_cert_app_uri is not None:
+            client.application_uri = self.server_cert_app_uri
+            await client.set_security_string(
+                "Basic256,Sign,uaexpert.der,uaexpert_key.pem"
+            )
+        try:
+            await client.connect()
+        except Exception as e:
+            print(f"Error: {e}")
+
+        nodes = [client.get_node(node_id) for node_id in self.node_ids]
+        measurements = []
+        read_id = 0
+        for time_range in time_ranges:
+            for page_size in page_sizes:
+                for i in tqdm(
+                    range(self.num_requests),
+                    desc=f"Running history reads over {time_range}s with page size {page_size}",
+                    unit=" reads",
+                ):
+                    measurements.extend(
+                        await self.measure_history_pages(
+                            nodes[i % len(nodes)], time_range, page_size, read_id
+                        )
+                    )
+                    read_id += 1
+        await client.disconnect()
+
+        df = pd.DataFrame().from_records(measurements)
+        output_file = f"{self.__class__.__name__}.csv"  # Important to have the experiment class name at the beginning of the output file for automatic detection by the analyzer
+        output_dir = Path(f"data/{self.experiment_name}")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with ResultStore() as store:
+            store.save(
+                df,
+                output_dir / output_file,
+                self.experiment_name,
+                self.__class__.__name__,
+                n_clients=1,
+                parameters={
+                    "time_ranges": time_ranges,
+                    "page_sizes": page_sizes,
+                    "num_requests": self.num_requests,
+                    "node_ids": self.node_ids,
+                },
+            )
+        print(f"\t➡️ Measurements written to {str(output_dir / output_file)}")
@@ -0,0 +1,243 @@
+import asyncio
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+from asyncua import Client, ua
+from tqdm import tqdm
+
+from experiments.sampling import StoppingRule
+from experiments.store import ResultStore
+
+
+class MethodCallExperiment:
+    """Experiment for measuring the latency and throughput of the Call service of an OPC UA server, for different numbers of clients calling a method concurrently."""
+
+    # Method object and methods of the test server (experiments/servers/test_server.py)
+    TEST_METHODS_OBJECT_ID = "ns=2;s=TestMethods"
+    TEST_METHOD_IDS = {
+        "sleep": "ns=2;s=TestMethods.SleepWork",
+        "cpu": "ns=2;s=TestMethods.CpuWork",
+    }
+
+    def __init__(
+        self,
+        server_url,
+        node_ids,
+        server_user,
+        server_password,
+        server_cert_app_uri,
+        server_pub_cert,
+        server_priv_cert,
+        experiment_name=f'method_call_{datetime.now().strftime("%d-%m-%Y_%H-%M-%S")}',
+        num_requests=1000,
+        data_size=64,
+    ):
+        self.server_url = server_url
+        self.node_ids = node_ids
+        self.experiment_name = experiment_name
+        self.num_requests = num_requests
+        self.data_size = data_size
+        self.server_user = server_user
+        self.server_password = server_password
+        self.server_cert_app_uri = server_cert_app_uri
+        self.server_pub_cert = server_pub_cert
+        self.server_priv_cert = server_priv_cert
+
+    async def measure_call_times(
+        self, client, object_node, method_node, arguments, work_ms
+    ):
+        """Measures the response time of a method call.
+
+        Args:
+            client: opcua client
+            object_node: node of the object the method is called on
+            method_node: node of the method to call
+            arguments: input arguments of the method
+            work_ms: simulated work of the test server methods, None for a custom method
+
+        Returns:
+            float: start time of the request
+            float: end time of the request
+            float: server-side start time of the method execution (None for a custom method)
+            float: server-side end time of the method execution (None for a custom method)
+        """
+        start_time = time.time()
+        result = await object_node.call_method(method_node, *arguments)
+        end_time = time.time()
+
+        if work_ms is None:
+            return (start_time, end_time, None, None)
+        return (start_time, end_time, result[1], result[2])
+
+    async def run_client(
+        self,
+        client_id,
+        n_clients,
+        work,
+        work_ms,
+        response_size,
+        object_id,
+        method_id,
+        stopping_rule,
+        progress,
+    ):
+        """Runs one client calling the method in a closed loop, until the stopping rule ends its sampling.
+
+        Returns:
+            list: measurements of the client
+            dict: sample size reached and precision of the response times of the client (see StoppingRule.summary)
+        """
+        client = Client(self.server_url)
+        client.set_user(self.server_user)
+        client.set_password(self.server_password)
+        if self.server_cert_app_uri is not None:
+            client.application_uri = self.server_cert_app_uri
+            await client.set_security_string(
+                "Basic256,Sign,uaexpert.der,uaexpert_key.pem"
+            )
+        try:
+            await client.connect()
+        except Exception as e:
+            print(f"Error: {e}")
+
+        object_node = client.get_node(object_id)
+        method_node = client.get_node(method_id)
+        payload = ua.Variant(b"\x00" * self.data_size, ua.VariantType.ByteString)
+        if work_ms is None:  # Custom method: only the payload is passed
+            arguments = [payload]
+        else:
+            arguments = [
+                payload,
+                ua.Variant(float(work_ms), ua.VariantType.Double),
+                ua.Variant(int(response_size), ua.VariantType.UInt32),
+            ]
+
+        measurements = []
+        response_times = []
+        sampling_start = time.time()
+        stop_reason = None
+        while stop_reason is None:
+            (
+                start_time,
+                end_time,
+                server_start_time,
+                server_end_time,
+            ) = await self.measure_call_times(
+                client, object_node, method_node, arguments, work_ms
+            )
+            measurements.append(
+                {
+                    "start_time": start_time,
+                    "end_time": end_time,
+                    "server_start_time": server_start_time,
+                    "server_end_time": server_end_time,
+                    "data_size": self.data_size,
+                    "mode": work,
+                    "work_ms": work_ms,
+                    "n_clients": n_clients,
+                    "client_id": client_id,
+                }
+            )
+            response_times.append(end_time - start_time)
+            progress.update(1)
+            stop_reason = stopping_rule.stop_reason(
+                response_times, time.time() - sampling_start, self.num_requests
+            )
+        await client.disconnect()
+        return measurements, stopping_rule.summary(response_times, stop_reason)
+
+    async def run_experiment(
+        self,
+        l_clients=(1, 2, 5, 10),
+        work=None,
+        work_ms=1.0,
+        response_size=64,
+        method_object_id=None,
+        method_id=None,
+        stopping_rule=None,
+    ):
+        """Runs the method calls for each number of concurrent clients and measures start- and end-times of requests.
+
+        Args:
+            l_clients: list of numbers of clients calling the method concurrently
+            work: "sleep" or "cpu" simulated work of the test server methods, by default both are run
+            work_ms: duration of the simulated work, in milliseconds
+            response_size: size of the payload returned by the test server methods, in bytes
+            method_object_id: node ID of the object of a custom method to call instead of the test server methods
+            method_id: node ID of a custom method, called with a single ByteString argument of data_size bytes
+            stopping_rule: StoppingRule ending the calls of each client once its response times are precise enough,
+                by default each client calls the method num_requests times
+
+        Raises:
+            ValueError: if work is not "sleep" or "cpu"
+        """
+        if method_id is not None:
+            work = "custom"
+            work_ms = None
+        elif work is None:  # If no work is specified, run both sleep and cpu work
+            await self.run_experiment(
+                l_clients, "sleep", work_ms, response_size, stopping_rule=stopping_rule
+            )
+            await self.run_experiment(
+                l_clients, "cpu", work_ms, response_size, stopping_rule=stopping_rule
+            )
+            return
+        elif work not in MethodCallExperiment.TEST_METHOD_IDS:
+            raise ValueError("Invalid work")
+        else:
+            method_object_id = MethodCallExperiment.TEST_METHODS_OBJECT_ID
+            method_id = MethodCallExperiment.TEST_METHOD_IDS[work]
+
+        stopping_rule = stopping_rule or StoppingRule()
+        measurements = []
+        samplings = {}
+        for n_clients in l_clients:
+            with tqdm(
+                total=n_clients * self.num_requests,
+                desc=f"Running {work} method calls with {n_clients} concurrent clients",
+                unit=" requests",
+            ) as progress:
+                client_measurements = await asyncio.gather(
+                    *[
+                        self.run_client(
+                            i,
+                            n_clients,
+                            work,
+                            work_ms,
+                            response_size,
+                            method_object_id,
+                            method_id,
+                            stopping_rule,
+                            progress,
+                        )
+                        for i in range(n_clients)
+                    ]
+                )
+            for m, _ in client_measurements:
+                measurements.extend(m)
+            # Sampling of each client, by client ID
+            samplings[str(n_clients)] = [summary for _, summary in client_measurements]
+
+        df = pd.DataFrame().from_records(measurements)
+        output_file = f"{self.__class__.__name__}_{work}.csv"  # Important to have the experiment class name at the beginning of the output file for automatic detection by the analyzer
+        output_dir = Path(f"data/{self.experiment_name}")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with ResultStore() as store:
+            store.save(
+                df,
+                output_dir / output_file,
+                self.experiment_name,
+                self.__class__.__name__,
+                mode=work,
+                parameters={
+                    "l_clients": list(l_clients),
+                    "work_ms": work_ms,
+                    "response_size": response_size,
+                    "num_requests": self.num_requests,
+                    "method_id": method_id,
+                    "sampling": samplings,
+                },
+            )
+        print(f"\t➡️ Measurements written to {str(output_dir / output_file)}")
@@ -0,0 +1,229 @@
+import random
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+from asyncua import Client, ua
+from asyncua.ua.ua_binary import nodeid_to_binary
+from tqdm import tqdm
+
+from experiments.servers.test_server import FORM_NODE_ID_OFFSET, FORM_NODE_ID_PREFIX
+from experiments.sampling import StoppingRule
+from experiments.store import ResultStore
+from experiments.wire import WireCounter
+
+
+class NodeIdFormsExperiment:
+    """Experiment comparing the forms of the node IDs addressing the same nodes of an OPC UA server: string node IDs,
+    numeric node IDs, and the handles returned by the RegisterNodes service for the string node IDs.
+
+    Each request records its end-to-end latency, its size on the wire and the encoded size of its node IDs, and the
+    time the client took to resolve the node IDs into nodes (client.get_node), as every experiment does before each
+    request. The nodes are the NodeIdForms nodes of the test server (see the --form-nodes option of the server
+    command), addressable by both a string and a numeric node ID: the difference in latency between the forms is the
+    cost of looking up the node IDs on the server.
+    """
+
+    FORMS = ["string", "numeric", "registered"]
+
+    def __init__(
+        self,
+        server_url,
+        node_ids,
+        server_user,
+        server_password,
+        server_cert_app_uri,
+        server_pub_cert,
+        server_priv_cert,
+        experiment_name=f'node_id_forms_{datetime.now().strftime("%d-%m-%Y_%H-%M-%S")}',
+        num_requests=1000,
+        data_size=64,
+    ):
+        self.server_url = server_url
+        self.node_ids = node_ids
+        self.experiment_name = experiment_name
+        self.num_requests = num_requests
+        self.data_size = data_size
+        self.server_user = server_user
+        self.server_password = server_password
+        self.server_cert_app_uri = server_cert_app_uri
+        self.server_pub_cert = server_pub_cert
+        self.server_priv_cert = server_priv_cert
+
+    def form_node_ids(self, form, n_nodes, namespace):
+        """Node IDs of the NodeIdForms nodes of the test server, in the given form ("registered" nodes being
+        registered by their string node IDs)."""
+        if form == "numeric":
+            return [
+                f"ns={namespace};i={FORM_NODE_ID_OFFSET + i}" for i in range(n_nodes)
+            ]
+        return [f"ns={namespace};s={FORM_NODE_ID_PREFIX}{i}" for i in range(n_nodes)]
+
+    async def measure_request(self, client, node_ids, handles, mode, wire):
+        """Resolves the nodes of a request and measures the response time of the request.
+
+        Args:
+            client: connected opcua client
+            node_ids: node IDs of the request, resolved before each request
+            handles: registered nodes, resolved once, None to use the node IDs
+            mode: "read" or "write"
+            wire: wire counter of the client
+
+        Returns:
+            dict: resolution time, start and end times, payload and wire traffic of the request
+        """
+        resolve_start = time.perf_counter()
+        nodes = (
+            handles if handles is not None else [client.get_node(i) for i in node_ids]
+        )
+        resolve_time = time.perf_counter() - resolve_start
+        data = bytes([random.randint(0, 255) for _ in range(self.data_size)])
+
+        wire.delta()
+        start_time = time.time()
+        if mode == "read":
+            await client.read_attributes(nodes)
+        else:
+            await client.write_values(
+                nodes,
+                [ua.DataValue(ua.Variant(data, ua.VariantType.ByteString))]
+                * len(nodes),
+            )
+        end_time = time.time()
+        return {
+            "start_time": start_time,
+            "end_time": end_time,
+            "resolve_time": resolve_time,
+            "data_size": self.data_size * len(nodes),
+            **wire.delta(),
+        }
+
+    async def run_form(self, form, mode, n_nodes, namespace, stopping_rule):
+        """Runs requests addressing the nodes in the given form, until the stopping rule ends the sampling.
+
+        Returns:
+            pd.DataFrame: measurements of the requests
+            bool: whether the server returned handles different from the string node IDs when registering the nodes
+            dict: sample size reached and precision of the response times (see StoppingRule.summary)
+        """
+        client = Client(self.server_url)
+        client.set_user(self.server_user)
+        client.set_password(self.server_password)
+        if self.server_cert_app_uri is not None:
+            client.application_uri = self.server_cert_app_uri
+            await client.set_security_string(
+                "Basic256,Sign,uaexpert.der,uaexpert_key.pem"
+            )
+        await client.connect()
+        try:
+            node_ids = self.form_node_ids(form, n_nodes, namespace)
+            handles = None
+            aliased = False
+            if form == "registered":
+                handles = await client.register_nodes(
+                    [client.get_node(node_id) for node_id in node_ids]
+                )
+                aliased = any(node.nodeid != node.basenodeid for node in handles)
+            # Encoded size of the node IDs sent in the request
+            node_id_bytes = sum(
+                len(nodeid_to_binary(node.nodeid))
+                for node in (handles or [client.get_node(i) for i in node_ids])
+            )
+            wire = WireCounter(client)
+            measurements = []
+            response_times = []
+            progress = tqdm(
+                total=self.num_requests,
+                desc=f"Running {mode} requests on {n_nodes} nodes with {form} node IDs",
+                unit=" requests",
+            )
+            sampling_start = time.time()
+            stop_reason = None
+            while stop_reason is None:
+                measurement = await self.measure_request(
+                    client, node_ids, handles, mode, wire
+                )
+                measurements.append(
+                    {
+                        **measurement,
+                        "mode": mode,
+                        "form": form,
+                        "n_nodes": n_nodes,
+                        "node_id_bytes": node_id_bytes,
+                    }
+                )
+                response_times.append(
+                    measurement["end_time"] - measurement["start_time"]
+                )
+                progress.update(1)
+                stop_reason = stopping_rule.stop_reason(
+                    response_times, time.time() - sampling_start, self.num_requests
+                )
+            progress.close()
+            if handles is not None:
+                await client.unregister_nodes(handles)
+        finally:
+            await client.disconnect()
+        return (
+            pd.DataFrame().from_records(measurements),
+            aliased,
+            stopping_rule.summary(response_times, stop_reason),
+        )
+
+    async def run_experiment(
+        self, forms=None, mode=None, n_nodes=10, namespace=2, stopping_rule=None
+    ):
+        """Runs read or write requests on the same nodes addressed with each form of node ID in turn.
+
+        Args:
+            forms: list of forms among FORMS, by default each one is run
+            mode: "read" or "write", by default both are performed
+            n_nodes: number of NodeIdForms nodes of the test server addressed by each request, at most the number of
+                nodes it was started with
+            namespace: namespace index of the NodeIdForms nodes
+            stopping_rule: StoppingRule ending the sampling of each form once its response times are precise enough,
+                by default num_requests requests are sampled
+
+        Raises:
+            ValueError: if a form or the mode is invalid
+        """
+        for form in forms or NodeIdFormsExperiment.FORMS:
+            if form not in NodeIdFormsExperiment.FORMS:
+                raise ValueError(
+                    f"Invalid node ID form {form}, expected one of {NodeIdFormsExperiment.FORMS}"
+                )
+        if mode is None:  # If no mode is specified, run both read and write mode
+            await self.run_experiment(forms, "read", n_nodes, namespace, stopping_rule)
+            await self.run_experiment(forms, "write", n_nodes, namespace, stopping_rule)
+            return
+        if mode not in ["read", "write"]:
+            raise ValueError(f"Invalid mode {mode}, expected read or write")
+        stopping_rule = stopping_rule or StoppingRule()
+
+        output_dir = Path(f"data/{self.experiment_name}")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for form in forms or NodeIdFormsExperiment.FORMS:
+            df, aliased, sampling = await self.run_form(
+                form, mode, n_nodes, namespace, stopping_rule
+            )
+            output_file = f"{self.__class__.__name__}_{form}_{mode}.csv"  # Important to have the experiment class name at the beginning of the output file for automatic detection by the analyzer
+            with ResultStore() as store:
+                store.save(
+                    df,
+                    output_dir / output_file,
+                    self.experiment_name,
+                    self.__class__.__name__,
+                    mode=f"{form}_{mode}",
+                    parameters={
+                        "form": form,
+                        "service": mode,
+                        "n_nodes": n_nodes,
+                        "num_requests": self.num_requests,
+                        "data_size": self.data_size,
+                        "aliased": aliased,
+                        "sampling": sampling,
+                        "server_url": self.server_url,
+                    },
+                )
+            print(f"\t➡️ Measurements written to {str(output_dir / output_file)}")
@@ -0,0 +1,269 @@
+import asyncio
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlparse
+
+import pandas as pd
+from asyncua import Client
+from tqdm import tqdm
+
+from experiments.proxy import TcpProxy, proxied_url
+from experiments.servers.managed_server import ManagedServer
+from experiments.store import ResultStore
+
+
+class _NotificationHandler:
+    """Subscription handler signalling the first data change notification of a subscription, e.g. the initial
+    values sent once it is (re)created, through its notified event."""
+
+    def __init__(self):
+        self.notified = asyncio.Event()
+
+    def datachange_notification(self, node, val, data):
+        self.notified.set()
+
+
+class RecoveryExperiment:
+    """Experiment for measuring how long a client takes to recover from faults of the server: runs a read workload with a subscription against a locally managed test server, which is killed, restarted or disconnected on a schedule."""
+
+    FAULTS = ["kill", "restart", "drop"]
+
+    def __init__(
+        self,
+        server_url,
+        node_ids,
+        server_user,
+        server_password,
+        server_cert_app_uri,
+        server_pub_cert,
+        server_priv_cert,
+        experiment_name=f'recovery_{datetime.now().strftime("%d-%m-%Y_%H-%M-%S")}',
+        num_requests=1000,
+        data_size=64,
+    ):
+        self.server_url = server_url
+        self.node_ids = node_ids
+        self.experiment_name = experiment_name
+        self.num_requests = num_requests
+        self.data_size = data_size
+        self.server_user = server_user
+        self.server_password = server_password
+        self.server_cert_app_uri = server_cert_app_uri
+        self.server_pub_cert = server_pub_cert
+        self.server_priv_cert = server_priv_cert
+
+    async def connect(self, url, handler, retry_interval):
+        """Connects a client, retrying until it succeeds, and subscribes to data changes of the nodes.
+
+        Returns:
+            Client: the connected client
+            float: time at which the session was activated
+            float: time at which the subscription was created
+            int: number of connection attempts
+        """
+        attempts = 0
+        while True:
+            attempts += 1
+            client = Client(url)
+            client.set_user(self.server_user)
+            client.set_password(self.server_password)
+            if self.server_cert_app_uri is not None:
+                client.application_uri = self.server_cert_app_uri
+                await client.set_security_string(
+                    "Basic256,Sign,uaexpert.der,uaexpert_key.pem"
+                )
+            try:
+                await client.connect()
+                connected_time = time.time()
+                subscription = await client.create_subscription(100, handler)
+                await subscription.subscribe_data_change(
+                    [client.get_node(node_id) for node_id in self.node_ids]
+                )
+                return client, connected_time, time.time(), attempts
+            except Exception:
+                try:
+                    await client.disconnect()
+                except Exception:
+                    pass
+                await asyncio.sleep(retry_interval)
+
+    async def inject_faults(
+        self, fault, server, proxy, n_faults, fault_interval, healthy, faults
+    ):
+        """Injects n_faults faults, fault_interval seconds after the client has recovered from the previous one."""
+        for _ in tqdm(
+            range(n_faults), desc=f"Injecting {fault} faults", unit=" faults"
+        ):
+            await healthy.wait()
+            await asyncio.sleep(fault_interval)
+            record = {"fault": fault, "fault_time": time.time()}
+            healthy.clear()
+            faults.append(record)
+            if fault == "kill":
+                server.kill()
+                record["server_up_time"] = await server.start()
+            elif fault == "restart":
+                await server.stop()
+                record["server_up_time"] = await server.start()
+            else:
+                proxy.drop_connections()
+                record["server_up_time"] = record["fault_time"]
+        await healthy.wait()
+
+    async def run_workload(
+        self, url, request_interval, retry_interval, healthy, faults, requests, done
+    ):
+        """Reads the nodes every request_interval seconds on an absolute schedule, and recovers the session on failure.
+
+        Scheduled requests that fail or that are skipped while recovering are counted as lost.
+        """
+        handler = _NotificationHandler()
+        client, _, _, _ = await self.connect(url, handler, retry_interval)
+        await handler.notified.wait()
+        healthy.set()
+
+        next_request = time.time()
+        while not done.is_set():
+            start_time = time.time()
+            try:
+                await client.read_values(
+                    [client.get_node(node_id) for node_id in self.node_ids]
+                )
+                requests.append(
+                    {"start_time": start_time, "end_time": time.time(), "success": True}
+                )
+            except Exception:
+                detect_time = time.time()
+                requests.append(
+                    {
+                        "start_time": start_time,
+                        "end_time": detect_time,
+                        "success": False,
+                    }
+                )
+                try:
+                    await client.disconnect()
+                except Exception:
+                    pass
+                handler = _NotificationHandler()
+                client, connected_time, subscribed_time, attempts = await self.connect(
+                    url, handler, retry_interval
+                )
+                await handler.notified.wait()
+                restored_time = time.time()
+
+                # Scheduled requests missed while recovering
+                skipped = 0
+                while next_request + request_interval < restored_time:
+                    next_request += request_interval
+                    skipped += 1
+                record = faults[-1] if faults else {}
+                record.update(
+                    {
+                        "detect_time": detect_time,
+                        "connected_time": connected_time,
+                        "subscribed_time": subscribed_time,
+                        "restored_time": restored_time,
+                        "connection_attempts": attempts,
+                        "requests_lost": 1 + skipped,
+                    }
+                )
+                healthy.set()
+            next_request += request_interval
+            await asyncio.sleep(max(0, next_request - time.time()))
+        await client.disconnect()
+
+    async def run_experiment(
+        self,
+        fault=None,
+        n_faults=5,
+        fault_interval=5.0,
+        request_interval=0.01,
+        retry_interval=0.1,
+    ):
+        """Runs the workload while injecting faults, and measures the recovery of the client.
+
+        Args:
+            fault: "kill" (SIGKILL and restart the server), "restart" (graceful stop and restart) or "drop"
+                (reset the TCP connections through a local proxy), by default each fault is run
+            n_faults: number of faults to inject
+            fault_interval: time between the recovery of the client and the next fault, in seconds
+            request_interval: period of the read requests of the workload, in seconds
+            retry_interval: time between two connection attempts of the client, in seconds
+
+        Raises:
+            ValueError: if fault is not "kill", "restart" or "drop"
+        """
+        if fault is None:  # If no fault is specified, run every fault
+            for f in RecoveryExperiment.FAULTS:
+                await self.run_experiment(
+                    f, n_faults, fault_interval, request_interval, retry_interval
+                )
+            return
+        if fault not in RecoveryExperiment.FAULTS:
+            raise ValueError("Invalid fault")
+
+        server = ManagedServer(urlparse(self.server_url).port or 4840)
+        await server.start()
+        proxy = None
+        url = self.server_url
+        if fault == "drop":
+            proxy = TcpProxy("localhost", server.port)
+            url = proxied_url(self.server_url, await proxy.start())
+
+        healthy = asyncio.Event()
+        done = asyncio.Event()
+        faults = []
+        requests = []
+        workload = asyncio.create_task(
+            self.run_workload(
+                url, request_interval, retry_interval, healthy, faults, requests, done
+            )
+        )
+        try:
+            await self.inject_faults(
+                fault, server, proxy, n_faults, fault_interval, healthy, faults
+            )
+        finally:
+            done.set()
+            if (
+                not healthy.is_set()
+            ):  # The client may never recover if the server failed to restart
+                workload.cancel()
+            await asyncio.gather(workload, return_exceptions=True)
+            if proxy is not None:
+                await proxy.stop()
+            await server.stop()
+
+        output_dir = Path(f"data/{self.experiment_name}")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for df, output_file, kind in [
+            (
+                pd.DataFrame().from_records(faults),
+                f"{self.__class__.__name__}_{fault}.csv",
+                "measurements",
+            ),
+            (
+                pd.DataFrame().from_records(requests),
+                f"{self.__class__.__name__}_{fault}_requests.csv",
+                "requests",
+            ),
+        ]:  # Important to have the experiment class name at the beginning of the output file for automatic detection by the analyzer
+            with ResultStore() as store:
+                store.save(
+                    df,
+                    output_dir / output_file,
+                    self.experiment_name,
+                    self.__class__.__name__,
+                    mode=fault,
+                    kind=kind,
+                    n_clients=1,
+                    parameters={
+                        "n_faults": n_faults,
+                        "fault_interval": fault_interval,
+                        "request_interval": request_interval,
+                        "retry_interval": retry_interval,
+                    },
+                )
+            print(f"\t➡️ Measurements written to {str(output_dir / output_file)}")
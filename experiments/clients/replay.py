@@ -0,0 +1,173 @@
+import asyncio
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+from asyncua import Client, ua
+from tqdm import tqdm
+
+from experiments.store import ResultStore
+from experiments.trace import NODE_ID_SEPARATOR, load_trace
+
+
+class ReplayExperiment:
+    """Experiment replaying a recorded workload trace against an OPC UA server, keeping the inter-arrival times of the operations."""
+
+    def __init__(
+        self,
+        server_url,
+        node_ids,
+        server_user,
+        server_password,
+        server_cert_app_uri,
+        server_pub_cert,
+        server_priv_cert,
+        experiment_name=f'replay_{datetime.now().strftime("%d-%m-%Y_%H-%M-%S")}',
+        num_requests=1000,
+        data_size=64,
+    ):
+        self.server_url = server_url
+        self.node_ids = node_ids
+        self.experiment_name = experiment_name
+        self.num_requests = num_requests
+        self.data_size = data_size
+        self.server_user = server_user
+        self.server_password = server_password
+        self.server_cert_app_uri = server_cert_app_uri
+        self.server_pub_cert = server_pub_cert
+        self.server_priv_cert = server_priv_cert
+
+    async def measure_operation(self, client, operation, scheduled_time, client_id):
+        """Measures the response time of a traced operation.
+
+        Writes use ByteString values of the traced payload size, split evenly over the nodes. Calls are
+        made without input arguments if the traced payload is empty, with one ByteString argument otherwise.
+
+        Returns:
+            dict: measurement of the operation
+        """
+        nodes = [
+            client.get_node(n) for n in operation.node_ids.split(NODE_ID_SEPARATOR)
+        ]
+        success = True
+        start_time = time.time()
+        try:
+            if operation.service == "read":
+                await client.read_values(nodes)
+            elif operation.service == "write":
+                data = b"\x00" * (int(operation.payload_size) // len(nodes))
+                await client.write_values(nodes, [data for _ in nodes])
+            elif operation.service == "call":
+                arguments = (
+                    [
+                        ua.Variant(
+                            b"\x00" * int(operation.payload_size),
+                            ua.VariantType.ByteString,
+                        )
+                    ]
+                    if operation.payload_size > 0
+                    else []
+                )
+                for i in range(0, len(nodes), 2):  # (object, method) pairs
+                    await nodes[i].call_method(nodes[i + 1], *arguments)
+            else:
+                raise ValueError(f"Invalid service {operation.service}")
+        except Exception:
+            success = False
+        end_time = time.time()
+
+        return {
+            "scheduled_time": scheduled_time,
+            "start_time": start_time,
+            "end_time": end_time,
+            "data_size": operation.payload_size,
+            "mode": operation.service,
+            "client_id": client_id,
+            "trace_client_id": operation.client_id,
+            "success": success,
+        }
+
+    async def run_client(self, client_id, operations, t0, trace_t0, speed, progress):
+        """Issues the operations of one client at their traced times, without waiting for the previous ones to complete.
+
+        Returns:
+            list: measurements of the client
+        """
+        client = Client(self.server_url)
+        client.set_user(self.server_user)
+        client.set_password(self.server_password)
+        if self.server_cert_app_uri is not None:
+            client.application_uri = self.server_cert_app_uri
+            await client.set_security_string(
+                "Basic256,Sign,uaexpert.der,uaexpert_key.pem"
+            )
+        try:
+            await client.connect()
+        except Exception as e:
+            print(f"Error: {e}")
+
+        tasks = []
+        for operation in operations.itertuples():
+            scheduled_time = t0 + (operation.timestamp - trace_t0) / speed
+            await asyncio.sleep(max(0, scheduled_time - time.time()))
+            task = asyncio.create_task(
+                self.measure_operation(client, operation, scheduled_time, client_id)
+            )
+            task.add_done_callback(lambda _: progress.update(1))
+            tasks.append(task)
+        measurements = await asyncio.gather(*tasks)
+        await client.disconnect()
+        return measurements
+
+    async def run_experiment(self, trace=None, speed=1.0, n_clients=None):
+        """Replays a trace and measures start- and end-times of its operations.
+
+        Args:
+            trace: path of the trace to replay (see experiments/trace.py)
+            speed: replay speed, 2.0 replays the trace twice as fast
+            n_clients: number of clients replaying the trace, the operations of trace client i being sent by client
+                i % n_clients. By default, one client per client of the trace.
+
+        Raises:
+            ValueError: if no trace is given
+        """
+        if trace is None:
+            raise ValueError("No trace to replay")
+        operations = load_trace(trace)
+        if n_clients is None:
+            n_clients = operations["client_id"].nunique()
+        client_ids = pd.factorize(operations["client_id"])[0] % n_clients
+
+        # Leave time for the clients to connect before the first operation
+        t0 = time.time() + 2
+        trace_t0 = operations["timestamp"].iloc[0]
+        with tqdm(
+            total=len(operations),
+            desc=f"Replaying {len(operations)} operations at {speed}x with {n_clients} clients",
+            unit=" requests",
+        ) as progress:
+            client_measurements = await asyncio.gather(
+                *[
+                    self.run_client(
+                        i, operations[client_ids == i], t0, trace_t0, speed, progress
+                    )
+                    for i in range(n_clients)
+                ]
+            )
+        measurements = [m for ms in client_measurements for m in ms]
+
+        df = pd.DataFrame().from_records(measurements)
+        output_file = f"{self.__class__.__name__}.csv"  # Important to have the experiment class name at the beginning of the output file for automatic detection by the analyzer
+        output_dir = Path(f"data/{self.experiment_name}")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with ResultStore() as store:
+            store.save(
+                df,
+                output_dir / output_file,
+                self.experiment_name,
+                self.__class__.__name__,
+                n_clients=n_clients,
+                parameters={"trace": str(trace), "speed": speed},
+            )
+        print(f"\t➡️ Measurements written to {str(output_dir / output_file)}")
@@ -1,15 +1,27 @@
 import asyncio
 import random
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
-import sys
 
-import numpy as np
 import pandas as pd
-from asyncua import Client
+from asyncua import Client, ua
+import asyncua.client.ua_session as ua_session
 from tqdm import tqdm
 
+from experiments.sampling import StoppingRule
+from experiments.store import ResultStore
+from experiments.wire import WireCounter, payload_size
+
+
+def _to_epoch(timestamp):
+    """Converts an OPC UA UtcTime to a UNIX timestamp, None if the server did not return it."""
+    if timestamp is None:
+        return None
+    if timestamp.tzinfo is None:  # older asyncua versions return naive UTC datetimes
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
 
 class ResponsivenessJitterThroughputExperiment:
     """Experiment for measuring the responsiveness, jitter and throughput of an OPC UA server."""
@@ -28,6 +40,7 @@ class ResponsivenessJitterThroughputExperiment:
         data_size=64,
         filename_prefix="",
         experiment_number="",
+        n_clients=1,
     ):
         self.server_url = server_url
         self.node_ids = node_ids
@@ -36,6 +49,7 @@ class ResponsivenessJitterThroughputExperiment:
         self.data_size = data_size
         self.filename_prefix = str(filename_prefix)
         self.experiment_number = str(experiment_number)
+        self.n_clients = int(n_clients)
         self.server_user = server_user
         self.server_password = server_password
         self.server_cert_app_uri = server_cert_app_uri
@@ -55,17 +69,16 @@ class ResponsivenessJitterThroughputExperiment:
         Returns:
             float: start time of the request
             float: end time of the request
+            int: size of the values read or written, in bytes
         """
         # node = client.get_node(self.node_id)  # Get the node object from the node ID
         nodes_to_read = [client.get_node(node_id) for node_id in self.node_ids]
         # Create a random data value of the given size
         data = bytes([random.randint(0, 255) for _ in range(self.data_size)])
-        size_read = None
 
         start_time = time.time()
         if mode == "read":
-            read = await client.read_values(nodes_to_read)
-            size_read = np.sum([sys.getsizeof(r) for r in read])
+            read = await client.read_attributes(nodes_to_read)
         elif mode == "write":
             await client.write_values(
                 nodes_to_read, [data for i in range(len(nodes_to_read))]
@@ -74,18 +87,82 @@ class ResponsivenessJitterThroughputExperiment:
             raise ValueError("Invalid mode")
         end_time = time.time()
 
-        return (start_time, end_time, size_read)
+        if mode == "read":
+            size = sum(payload_size(r.Value) for r in read if r.Value is not None)
+        else:
+            size = len(data) * len(nodes_to_read)
+        return (start_time, end_time, size)
+
+    async def measure_timestamps(self, client):
+        """Measures a read request returning full DataValues, with the server and source timestamps.
+
+        The request is sent with TimestampsToReturn.Both so that the client send/receive times can be
+        matched against the server clock (NTP-style) during the analysis. It goes through the same client stack as
+        the reads of the read mode (request semaphore, stage and wire hooks), only keeping the response header, which
+        carries the server send time.
+
+        Args:
+            client: opcua client
+
+        Returns:
+            dict: client send and receive times, server response time, server and source timestamps
+        """
+        params = ua.ReadParameters()
+        params.TimestampsToReturn = ua.TimestampsToReturn.Both
+        for node_id in self.node_ids:
+            read_value_id = ua.ReadValueId()
+            read_value_id.NodeId = client.get_node(node_id).nodeid
+            read_value_id.AttributeId = ua.AttributeIds.Value
+            params.NodesToRead.append(read_value_id)
+        request = ua.ReadRequest()
+        request.Parameters = params
+
+        start_time = time.time()
+        data = await client.uaclient._send_request(request)
+        # Decoded by the session module, as the responses of client.read_attributes
+        response = ua_session.struct_from_binary(ua.ReadResponse, data)
+        end_time = time.time()
 
-    async def run_experiment(self, mode=None):
+        response.ResponseHeader.ServiceResult.check()
+        server_timestamps = [
+            _to_epoch(r.ServerTimestamp)
+            for r in response.Results
+            if r.ServerTimestamp is not None
+        ]
+        source_timestamps = [
+            _to_epoch(r.SourceTimestamp)
+            for r in response.Results
+            if r.SourceTimestamp is not None
+        ]
+
+        return {
+            "start_time": start_time,
+            "end_time": end_time,
+            "data_size": sum(
+                payload_size(r.Value) for r in response.Results if r.Value is not None
+            ),
+            "mode": "timestamps",
+            # Server receive (value read) time, earliest over the nodes of the request
+            "server_timestamp": min(server_timestamps) if server_timestamps else None,
+            # Server send time of the response
+            "response_timestamp": _to_epoch(response.ResponseHeader.Timestamp),
+            # Oldest source timestamp of the request, i.e. the stalest value read
+            "source_timestamp": min(source_timestamps) if source_timestamps else None,
+        }
+
+    async def run_experiment(self, mode=None, stopping_rule=None):
         """Runs the experiment and measures start- and end-times of requests.
 
         Args:
-            mode: "read" or "write"
+            mode: "read", "write" or "timestamps" (read with server and source timestamps)
+            stopping_rule: StoppingRule ending the sampling once the response times are precise enough, by default
+                num_requests requests are sampled
         """
         if mode is None:  # If no mode is specified, run both read and write mode
-            await self.run_experiment(mode="read")
-            await self.run_experiment(mode="write")
+            await self.run_experiment(mode="read", stopping_rule=stopping_rule)
+            await self.run_experiment(mode="write", stopping_rule=stopping_rule)
             return
+        stopping_rule = stopping_rule or StoppingRule()
 
         client = Client(self.server_url)
         client.set_user(self.server_user)
@@ -99,31 +176,68 @@ class ResponsivenessJitterThroughputExperiment:
             await client.connect()
         except Exception as e:
             print(f"Error: {e}")
+        wire = WireCounter(client) if client.uaclient.protocol is not None else None
 
         measurements = []
-        for i in tqdm(
-            range(self.num_requests),
+        response_times = []
+        progress = tqdm(
+            total=self.num_requests,
             desc=f"Running {mode} mode responsiveness/jitter/throughput experiment",
             unit=" requests",
-        ):
-            start_time, end_time, data_size_read = await self.measure_response_times(
-                client, mode
-            )
-            measurements.append(
-                {
+        )
+        sampling_start = time.time()
+        stop_reason = None
+        while stop_reason is None:
+            if mode == "timestamps":
+                measurement = await self.measure_timestamps(client)
+            else:
+                start_time, end_time, data_size = await self.measure_response_times(
+                    client, mode
+                )
+                measurement = {
                     "start_time": start_time,
                     "end_time": end_time,
-                    "data_size": self.data_size if mode == "write" else data_size_read,
+                    "data_size": data_size,
                     "mode": mode,
                 }
+            if wire is not None:
+                measurement.update(wire.delta())
+            measurements.append(measurement)
+            response_times.append(measurement["end_time"] - measurement["start_time"])
+            progress.update(1)
+            stop_reason = stopping_rule.stop_reason(
+                response_times, time.time() - sampling_start, self.num_requests
             )
+        progress.close()
         await client.disconnect()
 
         df = pd.DataFrame().from_records(measurements)
         output_file = f"{('ScalabilityEvolutionExperiment_'+self.experiment_number+'_') if self.experiment_number != '' else ''}{('ScalabilityExperiment_' + self.filename_prefix + '_') if self.filename_prefix != '' else ''}{self.__class__.__name__}_{mode}.csv"  # Important to have the experiment class name at the beginning of the output file for automatic detection by the analyzer
         output_dir = Path(f"data/{self.experiment_name}")
         output_dir.mkdir(parents=True, exist_ok=True)
-        df.to_csv(output_dir / output_file, index=False)
+        if self.experiment_number != "":
+            experiment = "ScalabilityEvolutionExperiment"
+        elif self.filename_prefix != "":
+            experiment = "ScalabilityExperiment"
+        else:
+            experiment = self.__class__.__name__
+        with ResultStore() as store:
+            store.save(
+                df,
+                output_dir / output_file,
+                self.experiment_name,
+                experiment,
+                mode=mode,
+                n_clients=self.n_clients,
+                client_id=self.filename_prefix or None,
+                parameters={
+                    "num_requests": self.num_requests,
+                    "data_size": self.data_size,
+                    "node_ids": self.node_ids,
+                    "server_url": self.server_url,
+                    "sampling": stopping_rule.summary(response_times, stop_reason),
+                },
+            )
         print(f"\t➡️ Measurements written to {str(output_dir / output_file)}")
 
 
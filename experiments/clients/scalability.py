@@ -5,6 +5,7 @@ import asyncio
 from experiments.clients.responsiveness_jitter_throughput import (
     ResponsivenessJitterThroughputExperiment,
 )
+from experiments.sharding import ShardRouter
 
 
 class ScalabilityExperiment:
@@ -36,21 +37,32 @@ class ScalabilityExperiment:
         self.server_pub_cert = server_pub_cert
         self.server_priv_cert = server_priv_cert
 
-    async def run_experiment(self, n_clients=10, mode=None):
+    async def run_experiment(
+        self, n_clients=10, mode=None, shards=1, stopping_rule=None
+    ):
         """
 
         Args:
             mode: "read" or "write"
+            shards: number of shards of a sharded test server, client i querying the nodes of shard i % shards
+            stopping_rule: stopping rule of the requests of each client (see ResponsivenessJitterThroughputExperiment)
 
         Raises:
-            ValueError: if mode is not "read" or "write"
+            ValueError: if mode is not "read" or "write", or if a shard serves none of the nodes to query
         """
+        router = ShardRouter(self.server_url, shards)
         experiment_clients = []
         for i in range(n_clients):
+            shard = router.client_shard(i)
+            node_ids = router.shard_nodes(self.node_ids, shard)
+            if len(node_ids) == 0:
+                raise ValueError(
+                    f"None of the nodes to query is served by shard {shard}"
+                )
             experiment_clients.append(
                 ResponsivenessJitterThroughputExperiment(
-                    self.server_url,
-                    self.node_ids,
+                    router.shard_url(shard),
+                    node_ids,
                     self.server_user,
                     self.server_password,
                     self.server_cert_app_uri,
@@ -61,6 +73,7 @@ class ScalabilityExperiment:
                     self.data_size,
                     i,
                     self.experiment_number,
-                ).run_experiment(mode)
+                    n_clients,
+                ).run_experiment(mode, stopping_rule)
             )
         await asyncio.gather(*experiment_clients)
@@ -32,10 +32,14 @@ class ScalabilityEvolutionExperiment:
         self.server_pub_cert = server_pub_cert
         self.server_priv_cert = server_priv_cert
 
-    async def run_experiment(self, l_clients=[1, 3, 5, 10], mode=None):
+    async def run_experiment(
+        self, l_clients=[1, 3, 5, 10], mode=None, shards=1, stopping_rule=None
+    ):
         """
         Args:
             mode: "read" or "write"
+            shards: number of shards of a sharded test server (see ScalabilityExperiment)
+            stopping_rule: stopping rule of the requests of each client (see ResponsivenessJitterThroughputExperiment)
 
         Raises:
             ValueError: if mode is not "read" or "write"
@@ -53,4 +57,4 @@ class ScalabilityEvolutionExperiment:
                 self.num_requests,
                 self.data_size,
                 l_clients[i],
-            ).run_experiment(l_clients[i], mode)
+            ).run_experiment(l_clients[i], mode, shards, stopping_rule)
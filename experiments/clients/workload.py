@@ -0,0 +1,286 @@
+import asyncio
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+from asyncua import Client, ua
+from tqdm import tqdm
+
+from experiments.clients.method_call import MethodCallExperiment
+from experiments.sharding import ShardRouter
+from experiments.store import ResultStore
+from experiments.wire import WIRE_COLUMNS, WireCounter, payload_size
+from experiments.workload import OperationGenerator, load_profiles
+
+
+class WorkloadExperiment:
+    """Experiment running declarative mixed workloads (read/write/call ratios, node popularity, batch sizes) on an OPC UA server."""
+
+    def __init__(
+        self,
+        server_url,
+        node_ids,
+        server_user,
+        server_password,
+        server_cert_app_uri,
+        server_pub_cert,
+        server_priv_cert,
+        experiment_name=f'workload_{datetime.now().strftime("%d-%m-%Y_%H-%M-%S")}',
+        num_requests=1000,
+        data_size=64,
+    ):
+        self.server_url = server_url
+        self.node_ids = node_ids
+        self.experiment_name = experiment_name
+        # The profiles run for their duration, num_requests is only accepted as the other experiments do
+        self.num_requests = num_requests
+        self.data_size = data_size
+        self.server_user = server_user
+        self.server_password = server_password
+        self.server_cert_app_uri = server_cert_app_uri
+        self.server_pub_cert = server_pub_cert
+        self.server_priv_cert = server_priv_cert
+
+    async def measure_operation(self, service, batches, phase, method):
+        """Measures the response time of an operation.
+
+        Args:
+            service: "read", "write" or "call"
+            batches: (opcua client, nodes to read or write) of each shard the operation is sent to, concurrently
+            phase: phase of the profile the operation belongs to
+            method: (object node, method node, arguments) of the method to call
+
+        Returns:
+            float: start time of the request
+            float: end time of the request
+            bool: whether the operation succeeded
+            int: size of the values read or written, or of the method arguments, in bytes
+        """
+        success = True
+        start_time = time.time()
+        try:
+            if service == "read":
+                results = await asyncio.gather(
+                    *[client.read_attributes(nodes) for client, nodes in batches]
+                )
+            elif service == "write":
+                data = b"\x00" * phase.data_size
+                await asyncio.gather(
+                    *[
+                        client.write_values(nodes, [data for _ in nodes])
+                        for client, nodes in batches
+                    ]
+                )
+            else:
+                object_node, method_node, arguments = method
+                await object_node.call_method(method_node, *arguments)
+        except Exception:
+            success = False
+        end_time = time.time()
+        if service == "read":
+            data_size = (
+                sum(
+                    payload_size(r.Value)
+                    for values in results
+                    for r in values
+                    if r.Value is not None
+                )
+                if success
+                else 0
+            )
+        elif service == "write":
+            data_size = phase.data_size * sum(len(nodes) for _, nodes in batches)
+        else:
+            data_size = phase.data_size
+        return start_time, end_time, success, data_size
+
+    async def connect(self, server_url):
+        client = Client(server_url)
+        client.set_user(self.server_user)
+        client.set_password(self.server_password)
+        if self.server_cert_app_uri is not None:
+            client.application_uri = self.server_cert_app_uri
+            await client.set_security_string(
+                "Basic256,Sign,uaexpert.der,uaexpert_key.pem"
+            )
+        try:
+            await client.connect()
+        except Exception as e:
+            print(f"Error: {e}")
+        return client
+
+    async def run_client(
+        self, client_id, profile, node_ids, method_ids, seed, router, progress
+    ):
+        """Runs the phases of a profile with one client, in a closed loop or at the rate of each phase.
+
+        With a sharded test server, the client connects to every shard, and splits each operation in one request
+        per shard serving nodes of the operation. Method calls are sent to the shard of the client.
+
+        Returns:
+            list: measurements of the client
+        """
+        clients = [
+            await self.connect(router.shard_url(shard))
+            for shard in range(router.n_shards)
+        ]
+        wires = [
+            WireCounter(client)
+            for client in clients
+            if client.uaclient.protocol is not None
+        ]
+        client_shard = router.client_shard(client_id)
+        node_shards = []
+        for node_id in node_ids:
+            shard = router.shard_of(node_id)
+            node_shards.append(client_shard if shard is None else shard)
+        nodes = [
+            clients[shard].get_node(node_id)
+            for node_id, shard in zip(node_ids, node_shards)
+        ]
+        object_node = clients[client_shard].get_node(method_ids[0])
+        method_node = clients[client_shard].get_node(method_ids[1])
+
+        measurements = []
+        for phase_id, phase in enumerate(profile.phases):
+            generator = OperationGenerator(
+                phase,
+                len(nodes),
+                None if seed is None else seed + client_id * 1000 + phase_id,
+            )
+            payload = ua.Variant(b"\x00" * phase.data_size, ua.VariantType.ByteString)
+            if method_ids[2]:  # Test server method
+                arguments = [
+                    payload,
+                    ua.Variant(phase.call_work_ms, ua.VariantType.Double),
+                    ua.Variant(0, ua.VariantType.UInt32),
+                ]
+            else:  # Custom method: only the payload is passed
+                arguments = [payload]
+            method = (object_node, method_node, arguments)
+
+            phase_start = time.time()
+            phase_end = phase_start + phase.duration
+            n_operations = 0
+            while time.time() < phase_end:
+                if phase.rate is not None:
+                    # Paced: the operations are sent on a fixed schedule, immediately if late
+                    await asyncio.sleep(
+                        max(0, phase_start + n_operations / phase.rate - time.time())
+                    )
+                service, node_indices = generator.next()
+                operation_nodes = [nodes[i] for i in node_indices]
+                batches = {}
+                for i in node_indices:
+                    batches.setdefault(node_shards[i], []).append(nodes[i])
+                (
+                    start_time,
+                    end_time,
+                    success,
+                    data_size,
+                ) = await self.measure_operation(
+                    service,
+                    [(clients[shard], batch) for shard, batch in batches.items()],
+                    phase,
+                    method,
+                )
+                # Traffic of the operation over the connections to every shard
+                deltas = [wire.delta() for wire in wires]
+                measurements.append(
+                    {
+                        "start_time": start_time,
+                        "end_time": end_time,
+                        "data_size": data_size,
+                        "mode": service,
+                        "batch_size": len(operation_nodes),
+                        "profile": profile.name,
+                        "phase": phase_id,
+                        "client_id": client_id,
+                        "success": success,
+                        **{
+                            column: sum(delta[column] for delta in deltas)
+                            for column in WIRE_COLUMNS
+                        },
+                    }
+                )
+                n_operations += 1
+                progress.update(1)
+        for client in clients:
+            await client.disconnect()
+        return measurements
+
+    async def run_experiment(
+        self,
+        workload="experiments/workloads.yaml",
+        profiles=None,
+        n_clients=1,
+        seed=None,
+        method_object_id=None,
+        method_id=None,
+        shards=1,
+    ):
+        """Runs each workload profile in turn and measures start- and end-times of the operations.
+
+        Args:
+            workload: path of the YAML file defining the workload profiles (see experiments/workload.py)
+            profiles: names of the profiles to run, by default all profiles of the file
+            n_clients: number of clients running each profile concurrently
+            seed: seed of the random operation generators, for reproducible workloads
+            method_object_id: node ID of the object of a custom method to call instead of the test server sleep method
+            method_id: node ID of a custom method, called with a single ByteString argument of data_size bytes
+            shards: number of shards of a sharded test server, on consecutive ports from the server URL one
+
+        Raises:
+            ValueError: if a profile does not exist or is invalid
+        """
+        if method_id is not None:
+            method_ids = (method_object_id, method_id, False)
+        else:
+            method_ids = (
+                MethodCallExperiment.TEST_METHODS_OBJECT_ID,
+                MethodCallExperiment.TEST_METHOD_IDS["sleep"],
+                True,
+            )
+
+        router = ShardRouter(self.server_url, shards)
+        # The data size of the experiment is the default of the profiles and phases that do not set one
+        for profile in load_profiles(
+            workload, profiles, defaults={"data_size": self.data_size}
+        ):
+            node_ids = profile.node_ids(self.node_ids)
+            with tqdm(
+                desc=f"Running profile {profile.name} ({profile.duration:.0f}s) with {n_clients} clients",
+                unit=" requests",
+            ) as progress:
+                client_measurements = await asyncio.gather(
+                    *[
+                        self.run_client(
+                            i, profile, node_ids, method_ids, seed, router, progress
+                        )
+                        for i in range(n_clients)
+                    ]
+                )
+            measurements = [m for ms in client_measurements for m in ms]
+
+            df = pd.DataFrame().from_records(measurements)
+            output_file = f"{self.__class__.__name__}_{profile.name}.csv"  # Important to have the experiment class name at the beginning of the output file for automatic detection by the analyzer
+            output_dir = Path(f"data/{self.experiment_name}")
+            output_dir.mkdir(parents=True, exist_ok=True)
+            with ResultStore() as store:
+                store.save(
+                    df,
+                    output_dir / output_file,
+                    self.experiment_name,
+                    self.__class__.__name__,
+                    mode=profile.name,
+                    n_clients=n_clients,
+                    parameters={
+                        "workload": str(workload),
+                        "seed": seed,
+                        "data_size": self.data_size,
+                        "shards": shards,
+                        "method_id": method_id,
+                    },
+                )
+            print(f"\t➡️ Measurements written to {str(output_dir / output_file)}")
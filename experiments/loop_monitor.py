@@ -0,0 +1,92 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Columns of a loop lag sample: one row per monitoring timer
+LOOP_LAG_COLUMNS = ["timestamp", "lag", "loop_cpu_percent", "loop"]
+EVENT_LOOPS = ["asyncio", "uvloop"]
+
+
+def use_event_loop(name):
+    """Sets the event loop implementation used by asyncio.run.
+
+    Args:
+        name: "asyncio" (default implementation) or "uvloop"
+
+    Raises:
+        ValueError: if the implementation is unknown or not installed
+    """
+    if name == "asyncio":
+        asyncio.set_event_loop_policy(None)
+    elif name == "uvloop":
+        try:
+            import uvloop
+        except ImportError:
+            raise ValueError(
+                "uvloop is not installed, install it with pip install uvloop"
+            )
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    else:
+        raise ValueError(f"Invalid event loop {name}, expected one of {EVENT_LOOPS}")
+
+
+class LoopLagMonitor:
+    """Monitors the event loop running the experiment clients, to detect when the harness itself is saturated.
+
+    A timer is scheduled every interval seconds: the delay with which it fires (lag) is the time any callback of the
+    loop, e.g. the processing of a response, waits before it runs. The CPU time of the loop thread between two timers
+    gives the loop utilisation, close to 100% when the loop is CPU bound.
+    """
+
+    def __init__(self, interval=0.01):
+        """
+        Args:
+            interval: interval between two monitoring timers, in seconds
+        """
+        self.interval = float(interval)
+        self.samples = []
+        self._task = None
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        loop_name = type(loop).__module__.split(".")[0]
+        while True:
+            expected = loop.time() + self.interval
+            cpu_time = time.thread_time()
+            await asyncio.sleep(self.interval)
+            now = loop.time()
+            self.samples.append(
+                {
+                    "timestamp": time.time(),
+                    "lag": max(0.0, now - expected),
+                    "loop_cpu_percent": 100
+                    * (time.thread_time() - cpu_time)
+                    / (now - expected + self.interval),
+                    "loop": loop_name,
+                }
+            )
+
+    async def monitor(self, coroutine):
+        """Runs a coroutine while monitoring the loop it runs on.
+
+        Returns:
+            the result of the coroutine
+        """
+        self._task = asyncio.create_task(self.run())
+        try:
+            return await coroutine
+        finally:
+            self._task.cancel()
+
+    def save(self, path):
+        """Appends the samples recorded since the last save to a CSV file, so that the samples of every run of a
+        session are kept."""
+        samples, self.samples = self.samples, []
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pd.DataFrame(samples, columns=LOOP_LAG_COLUMNS).to_csv(
+            path, mode="a", header=not path.exists(), index=False
+        )
+        print(f"\t➡️ {len(samples)} loop lag samples written to {str(path)}")
@@ -0,0 +1,301 @@
+import asyncio
+import itertools
+import json
+import re
+import sys
+import time
+from pathlib import Path
+
+import click
+import yaml
+from tqdm import tqdm
+
+from experiments.servers.managed_server import ManagedServer
+from experiments.store import ResultStore
+
+# Options of the run-experiment command that the runner sets for each cell
+RESERVED_OPTIONS = ["name", "config"]
+
+
+def _format_value(value):
+    # Lists are passed as the comma-separated lists of the command line options
+    if isinstance(value, (list, tuple)):
+        return ",".join(str(v) for v in value)
+    return str(value)
+
+
+def command_args(command, options):
+    """Converts options of a click command, given by parameter name, to its command line arguments.
+
+    Args:
+        command: click command, e.g. the run-experiment command of the controller
+        options: dict of option values by parameter name, e.g. {"nclients": 10, "post_process": True}
+
+    Raises:
+        ValueError: if the command has no such option
+
+    Returns:
+        list: command line arguments, e.g. ["--nclients", "10", "--post-process"]
+    """
+    params = {
+        param.name: param
+        for param in command.params
+        if isinstance(param, click.Option) and not param.hidden
+    }
+    args = []
+    for name, value in options.items():
+        if name not in params:
+            raise ValueError(
+                f"Unknown option {name} of the {command.name} command, expected one of {list(params)}"
+            )
+        flag = max(params[name].opts, key=len)  # Long form of the option
+        if params[name].is_flag:
+            if value:
+                args.append(flag)
+        elif params[name].multiple:
+            for v in value if isinstance(value, (list, tuple)) else [value]:
+                args.extend([flag, _format_value(v)])
+        else:
+            args.extend([flag, _format_value(value)])
+    return args
+
+
+def cell_name(parameters):
+    """Name of the result folder of a cell, from its parameters, e.g. "nclients-10_data_size-64"."""
+    name = "_".join(
+        f"{key}-{_format_value(value)}" for key, value in parameters.items()
+    )
+    return re.sub(r"[^\w.-]", "-", name) or "cell"
+
+
+def load_matrix(path):
+    """Loads an experiment matrix from a YAML file (see experiments/matrix.yaml).
+
+    Raises:
+        ValueError: if the matrix is invalid
+
+    Returns:
+        dict: the matrix specification
+    """
+    with open(path) as f:
+        spec = yaml.safe_load(f) or {}
+    experiments = spec.get("experiments")
+    if isinstance(experiments, str):
+        spec["experiments"] = [experiments]
+    if not spec.get("experiments"):
+        raise ValueError(f"The matrix {path} does not list any experiment")
+    spec.setdefault("options", {})
+    spec.setdefault("matrix", {})
+    spec.setdefault("exclude", [])
+    spec["repetitions"] = int(spec.get("repetitions", 1))
+    for dimension, values in spec["matrix"].items():
+        if not isinstance(values, list) or len(values) == 0:
+            raise ValueError(
+                f"Dimension {dimension} of the matrix {path} must be a non-empty list of values"
+            )
+    for option in RESERVED_OPTIONS:
+        if option in spec["options"] or option in spec["matrix"]:
+            raise ValueError(
+                f"The {option} option is set by the matrix runner, it cannot be set in the matrix {path}"
+            )
+    return spec
+
+
+def expand_matrix(spec):
+    """Expands a matrix into its cells: every combination of the values of its dimensions, in order (the last
+    dimension varying fastest), without the excluded combinations, each repeated spec["repetitions"] times.
+
+    Returns:
+        list: cells, as dicts with their name and the values of the dimensions ("parameters")
+    """
+    dimensions = list(spec["matrix"].keys())
+    cells = []
+    for values in itertools.product(*spec["matrix"].values()):
+        parameters = dict(zip(dimensions, values))
+        if any(
+            all(parameters.get(key) == value for key, value in excluded.items())
+            for excluded in spec["exclude"]
+        ):
+            continue
+        for repetition in range(spec["repetitions"]):
+            name = cell_name(parameters)
+            if spec["repetitions"] > 1:
+                name += f"/run_{repetition + 1}"
+            cells.append(
+                {"name": name, "parameters": parameters, "repetition": repetition + 1}
+            )
+    return cells
+
+
+class MatrixRunner:
+    """Runs the cells of an experiment matrix, one run-experiment command per cell, and checkpoints the completed
+    cells so that an interrupted session resumes where it stopped.
+
+    The results of each cell are stored in data/{session}/{cell name}, and tagged in the result store with the
+    session and the parameters of the cell, so that the analyses can pivot over any dimension of the matrix. The
+    cells run in order against the configured server, or on several local test servers in parallel.
+    """
+
+    def __init__(self, spec, session, run_command, server_command, config):
+        """
+        Args:
+            spec: matrix specification (see load_matrix)
+            session: name of the session, i.e. the result folder of the matrix
+            run_command: run-experiment command of the controller, the cells being passed as its options
+            server_command: server command of the controller, for the options of the local test servers
+            config: path of the client configuration
+
+        Raises:
+            ValueError: if an option of the matrix is not an option of the commands
+        """
+        self.spec = spec
+        self.session = session
+        self.run_command = run_command
+        self.config = config
+        self.cells = expand_matrix(spec)
+        self.output_dir = Path(f"data/{session}")
+        self.checkpoint_file = self.output_dir / "matrix.json"
+        # Options are checked before running any cell
+        for cell in self.cells:
+            command_args(run_command, {**spec["options"], **cell["parameters"]})
+        servers = spec.get("servers")
+        self.servers = []
+        if servers is not None:
+            server_args = command_args(server_command, servers.get("args", {}))
+            self.servers = [
+                ManagedServer(int(servers.get("port", 4840)) + i, server_args)
+                for i in range(int(servers.get("count", 1)))
+            ]
+
+    def load_checkpoint(self):
+        """Returns the records of the cells of the session run so far, by cell name."""
+        if not self.checkpoint_file.exists():
+            return {}
+        with open(self.checkpoint_file) as f:
+            return json.load(f)["cells"]
+
+    def save_checkpoint(self, records):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        checkpoint = self.checkpoint_file.with_suffix(".json.tmp")
+        with open(checkpoint, "w") as f:
+            json.dump({"spec": self.spec, "cells": records}, f, indent=4)
+        # Atomic replacement, an interrupted write leaves the previous checkpoint
+        checkpoint.replace(self.checkpoint_file)
+
+    def worker_configs(self):
+        """Client configuration of each worker: the configuration itself, or one per local test server, pointing to
+        its port."""
+        if len(self.servers) == 0:
+            return [self.config]
+        with open(self.config) as f:
+            config = yaml.safe_load(f)
+        if config.get("targets") is not None:
+            raise ValueError(
+                "Local test servers cannot be combined with a multi-target configuration"
+            )
+        configs = []
+        for i, server in enumerate(self.servers):
+            path = self.output_dir / "matrix" / f"config_{i}.yaml"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w") as f:
+                yaml.safe_dump(
+                    {
+                        **config,
+                        "server_url": f"opc.tcp://localhost:{server.port}/freeopcua/server/",
+                    },
+                    f,
+                )
+            configs.append(str(path))
+        return configs
+
+    async def run_cell(self, cell, config):
+        """Runs the experiments of a cell in a child process, its output being logged in the session folder.
+
+        Returns:
+            dict: record of the cell, its status being "done" if it recorded results, "failed" otherwise
+        """
+        run_name = f"{self.session}/{cell['name']}"
+        log_file = self.output_dir / "logs" / f"{cell['name'].replace('/', '_')}.log"
+        log_file.parent.mkdir(parents=True, exist_ok=True)
+        start_time = time.time()
+        with open(log_file, "w") as log:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable,
+                "experiment_controller.py",
+                "run-experiment",
+                *self.spec["experiments"],
+                "--name",
+                run_name,
+                "--config",
+                config,
+                *command_args(
+                    self.run_command,
+                    {**self.spec["options"], **cell["parameters"]},
+                ),
+                stdout=log,
+                stderr=asyncio.subprocess.STDOUT,
+            )
+            returncode = await process.wait()
+
+        # Results of the runs of the cell, several for a multi-target configuration
+        with ResultStore() as store:
+            runs = store.query(session=[run_name, self.session])
+            runs = [
+                run
+                for run in runs["run"].unique()
+                if run == run_name or run.startswith(f"{run_name}/")
+            ]
+            for run in runs:
+                store.tag(run, session=self.session, parameters=cell["parameters"])
+        return {
+            **cell,
+            "run": run_name,
+            "status": "done" if returncode == 0 and len(runs) > 0 else "failed",
+            "returncode": returncode,
+            "start_time": start_time,
+            "end_time": time.time(),
+            "log": str(log_file),
+        }
+
+    async def run(self):
+        """Runs the cells that have not been completed yet, and checkpoints each one as soon as it is over.
+
+        Returns:
+            dict: records of every cell run in the session, by cell name
+        """
+        records = self.load_checkpoint()
+        pending = [
+            cell
+            for cell in self.cells
+            if records.get(cell["name"], {}).get("status") != "done"
+        ]
+        if len(pending) < len(self.cells):
+            print(
+                f"\t➡️ Resuming the session {self.session}: {len(self.cells) - len(pending)} of {len(self.cells)} cells already done"
+            )
+        configs = self.worker_configs()
+        queue = asyncio.Queue()
+        for cell in pending:
+            queue.put_nowait(cell)
+
+        async def worker(config, progress):
+            while not queue.empty():
+                cell = queue.get_nowait()
+                record = await self.run_cell(cell, config)
+                records[cell["name"]] = record
+                self.save_checkpoint(records)
+                if record["status"] != "done":
+                    print(f"\t➡️ Cell {cell['name']} failed, see {record['log']}")
+                progress.update(1)
+
+        try:
+            await asyncio.gather(*[server.start() for server in self.servers])
+            with tqdm(
+                total=len(pending),
+                desc=f"Running {len(pending)} cells of the matrix on {len(configs)} worker(s)",
+                unit=" cells",
+            ) as progress:
+                await asyncio.gather(*[worker(config, progress) for config in configs])
+        finally:
+            await asyncio.gather(*[server.stop() for server in self.servers])
+        return records
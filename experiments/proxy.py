@@ -0,0 +1,374 @@
+import asyncio
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlparse
+
+
+def proxied_url(server_url, port, host="localhost"):
+    """Returns the server URL with its host and port replaced by the proxy ones."""
+    return urlparse(server_url)._replace(netloc=f"{host}:{port}").geturl()
+
+
+class TcpProxy:
+    """Userspace TCP proxy relaying the connections of the experiment clients to a server."""
+
+    CHUNK_SIZE = 65536
+
+    def __init__(
+        self, target_host, target_port, listen_host="localhost", listen_port=0
+    ):
+        """
+        Args:
+            target_host: host of the server
+            target_port: port of the server
+            listen_host: host the proxy listens on
+            listen_port: port the proxy listens on, 0 for a free port
+        """
+        self.target_host = target_host
+        self.target_port = int(target_port)
+        self.listen_host = listen_host
+        self.listen_port = int(listen_port)
+        self.port = None
+        self._server = None
+        self._connections = set()
+
+    async def start(self):
+        """Starts listening for client connections.
+
+        Returns:
+            int: port the proxy listens on
+        """
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.listen_host, self.listen_port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self):
+        self.drop_connections()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def drop_connections(self):
+        """Aborts all relayed connections (TCP reset), on both the client and the server side.
+
+        Returns:
+            int: number of connections dropped
+        """
+        connections = list(self._connections)
+        for client_writer, server_writer in connections:
+            client_writer.transport.abort()
+            server_writer.transport.abort()
+        self._connections.clear()
+        return len(connections)
+
+    async def _handle_connection(self, client_reader, client_writer):
+        try:
+            server_reader, server_writer = await asyncio.open_connection(
+                self.target_host, self.target_port
+            )
+        except OSError:
+            client_writer.transport.abort()
+            return
+        connection = (client_writer, server_writer)
+        self._connections.add(connection)
+        await asyncio.gather(
+            self._relay(client_reader, server_writer),
+            self._relay(server_reader, client_writer),
+        )
+        self._connections.discard(connection)
+
+    async def _relay(self, reader, writer):
+        try:
+            while True:
+                data = await reader.read(TcpProxy.CHUNK_SIZE)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+
+
+# Impairments of the links relayed by the ImpairmentProxy, applied to each direction of each connection, and their
+# default (unimpaired) values
+IMPAIRMENTS = {
+    "latency": 0.0,  # one-way delay, in milliseconds
+    "jitter": 0.0,  # standard deviation of the one-way delay, in milliseconds
+    "bandwidth": 0.0,  # bytes per second, 0 for no cap
+    "reorder": 0.0,  # probability that a TCP segment arrives out of order
+    "reorder_delay": 10.0,  # delay of a segment arriving out of order, in milliseconds
+    "loss": 0.0,  # probability that a TCP segment is lost and retransmitted
+    "rto": 200.0,  # retransmission timeout of a lost segment, in milliseconds
+    "reset_interval": 0.0,  # mean time between two resets of a connection, in seconds, 0 for no reset
+    "seed": None,  # seed of the random impairments, for reproducible runs
+}
+# Typical links of the remote sites, as IMPAIRMENTS values
+IMPAIRMENT_PROFILES = {
+    "lan": {"latency": 0.25, "jitter": 0.05},
+    "wan": {"latency": 25.0, "jitter": 5.0, "bandwidth": 12_500_000, "loss": 0.001},
+    "edge": {
+        "latency": 40.0,
+        "jitter": 15.0,
+        "bandwidth": 2_500_000,
+        "reorder": 0.01,
+        "loss": 0.005,
+    },
+    "satellite": {
+        "latency": 300.0,
+        "jitter": 20.0,
+        "bandwidth": 1_250_000,
+        "loss": 0.01,
+        "rto": 1000.0,
+    },
+}
+
+
+def parse_impairment(spec):
+    """Parses impairment settings: a comma-separated list of profiles of IMPAIRMENT_PROFILES and KEY=VALUE settings
+    of IMPAIRMENTS, applied in order, e.g. "wan,loss=0.01,reset_interval=30".
+
+    Raises:
+        ValueError: if a profile or a setting is unknown, or a value is invalid
+
+    Returns:
+        dict: value of each of IMPAIRMENTS
+    """
+    settings = dict(IMPAIRMENTS)
+    for item in [item.strip() for item in spec.split(",") if item.strip()]:
+        if "=" not in item:
+            if item not in IMPAIRMENT_PROFILES:
+                raise ValueError(
+                    f"Unknown impairment profile {item}, expected one of {list(IMPAIRMENT_PROFILES)}"
+                )
+            settings.update(IMPAIRMENT_PROFILES[item])
+            continue
+        key, value = [part.strip() for part in item.split("=", 1)]
+        if key not in IMPAIRMENTS:
+            raise ValueError(
+                f"Unknown impairment {key}, expected one of {list(IMPAIRMENTS)}"
+            )
+        try:
+            settings[key] = int(value) if key == "seed" else float(value)
+        except ValueError:
+            raise ValueError(f"Invalid value {value} of the impairment {key}")
+        if settings[key] < 0 or (key in ["reorder", "loss"] and settings[key] > 1):
+            raise ValueError(f"Invalid value {value} of the impairment {key}")
+    return settings
+
+
+def format_impairment(settings):
+    """Formats the impaired settings, i.e. those differing from their default value, as parsed by parse_impairment.
+    Values are formatted exactly (repr), so that parse_impairment(format_impairment(settings)) == settings.
+    """
+    return ",".join(
+        f"{key}={value!r}"
+        for key, value in settings.items()
+        if value != IMPAIRMENTS[key]
+    )
+
+
+def free_port(host="localhost"):
+    """Returns a TCP port that is free at the time of the call."""
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+class ImpairmentProxy(TcpProxy):
+    """TCP proxy impairing the connections it relays like a WAN or edge link, in userspace: latency, jitter,
+    bandwidth cap, reordering and loss of TCP segments, and connection resets.
+
+    The relayed streams remain in order, as TCP delivers them: a segment arriving out of order, or lost and
+    retransmitted, delays the data that follows it (head-of-line blocking). Each chunk read from a connection is
+    counted as ceil(size / SEGMENT_SIZE) segments for the reordering and loss probabilities, and a connection whose
+    data is delayed stops being read beyond MAX_QUEUED_CHUNKS chunks, which throttles its sender as a TCP window does.
+    """
+
+    SEGMENT_SIZE = 1460  # Maximum segment size of a TCP connection over Ethernet
+    MAX_QUEUED_CHUNKS = 64
+
+    def __init__(
+        self,
+        target_host,
+        target_port,
+        listen_host="localhost",
+        listen_port=0,
+        **impairments,
+    ):
+        """
+        Args:
+            target_host: host of the server
+            target_port: port of the server
+            listen_host: host the proxy listens on
+            listen_port: port the proxy listens on, 0 for a free port
+            impairments: values of IMPAIRMENTS, the others being unimpaired
+
+        Raises:
+            ValueError: if an impairment is unknown
+        """
+        super().__init__(target_host, target_port, listen_host, listen_port)
+        for key in impairments:
+            if key not in IMPAIRMENTS:
+                raise ValueError(
+                    f"Unknown impairment {key}, expected one of {list(IMPAIRMENTS)}"
+                )
+        self.settings = {**IMPAIRMENTS, **impairments}
+        self.random = random.Random(self.settings["seed"])
+        # Impairments applied so far
+        self.counts = {"segments": 0, "reordered": 0, "lost": 0, "resets": 0}
+
+    async def _handle_connection(self, client_reader, client_writer):
+        timer = None
+        if self.settings["reset_interval"] > 0:
+            timer = asyncio.get_running_loop().call_later(
+                self.random.expovariate(1 / self.settings["reset_interval"]),
+                self._reset_connection,
+                client_writer,
+            )
+        try:
+            await super()._handle_connection(client_reader, client_writer)
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+    def _reset_connection(self, client_writer):
+        for connection in list(self._connections):
+            if connection[0] is client_writer:
+                for writer in connection:
+                    writer.transport.abort()
+                self._connections.discard(connection)
+                self.counts["resets"] += 1
+
+    def _delivery_time(self, link, size, now):
+        """Time at which a chunk read at time now arrives at the other end of the link.
+
+        Args:
+            link: state of the direction of the connection: time at which the link is free to send the next chunk,
+                and arrival time of the last chunk
+            size: size of the chunk, in bytes
+            now: time at which the chunk was read
+        """
+        settings = self.settings
+        sent = now
+        if settings["bandwidth"] > 0:  # Serialization of the chunk on the capped link
+            sent = max(now, link["free"]) + size / settings["bandwidth"]
+            link["free"] = sent
+        delay = max(0.0, self.random.gauss(settings["latency"], settings["jitter"]))
+        segments = -(-size // ImpairmentProxy.SEGMENT_SIZE)
+        self.counts["segments"] += segments
+        if self.random.random() < 1 - (1 - settings["reorder"]) ** segments:
+            self.counts["reordered"] += 1
+            delay += settings["reorder_delay"]
+        if self.random.random() < 1 - (1 - settings["loss"]) ** segments:
+            self.counts["lost"] += 1
+            delay += settings["rto"]
+        # In order delivery: a chunk never arrives before the previous one
+        link["arrival"] = max(sent + delay / 1000, link["arrival"])
+        return link["arrival"]
+
+    async def _relay(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=ImpairmentProxy.MAX_QUEUED_CHUNKS)
+        delivery = asyncio.create_task(self._deliver(queue, writer))
+        link = {"free": 0.0, "arrival": 0.0}
+        try:
+            while True:
+                data = await reader.read(TcpProxy.CHUNK_SIZE)
+                if not data:
+                    break
+                await queue.put(
+                    (self._delivery_time(link, len(data), loop.time()), data)
+                )
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            await queue.put(None)
+            await delivery
+
+    async def _deliver(self, queue, writer):
+        """Writes the chunks of a direction of a connection at their arrival time, then closes it."""
+        loop = asyncio.get_running_loop()
+        failed = False
+        while (chunk := await queue.get()) is not None:
+            arrival, data = chunk
+            # The chunks are still consumed once the connection failed, not to block its reader
+            if failed or writer.transport.is_closing():
+                continue
+            await asyncio.sleep(max(0.0, arrival - loop.time()))
+            try:
+                writer.write(data)
+                await writer.drain()
+            except (ConnectionError, OSError):
+                failed = True
+        writer.close()
+
+
+class ManagedProxy:
+    """Impairment proxy run in a child process, through the controller's proxy command, so that relaying the
+    connections does not load the event loop of the experiment clients."""
+
+    def __init__(self, server_url, impairment, port=None):
+        """
+        Args:
+            server_url: URL of the server the proxy relays the connections to
+            impairment: impairment settings, as parsed by parse_impairment
+            port: port the proxy listens on, a free port by default
+        """
+        self.server_url = server_url
+        self.impairment = impairment
+        self.port = int(port) if port is not None else free_port()
+        self.url = proxied_url(server_url, self.port)
+        self.process = None
+
+    async def start(self, timeout=10):
+        """Starts the proxy process and waits until it accepts connections.
+
+        Raises:
+            RuntimeError: if the proxy exits or does not accept connections in time
+        """
+        self.process = subprocess.Popen(
+            [
+                sys.executable,
+                "experiment_controller.py",
+                "proxy",
+                self.server_url,
+                "--port",
+                str(self.port),
+                "--impairment",
+                self.impairment,
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(
+                    f"Impairment proxy exited with code {self.process.returncode}, is port {self.port} already in use?"
+                )
+            try:
+                _, writer = await asyncio.open_connection("localhost", self.port)
+                writer.close()
+                return
+            except OSError:
+                await asyncio.sleep(0.05)
+        await self.stop()
+        raise RuntimeError(f"Impairment proxy did not start within {timeout}s.")
+
+    async def stop(self, timeout=10):
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.send_signal(signal.SIGINT)
+        try:
+            await asyncio.to_thread(self.process.wait, timeout)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
@@ -0,0 +1,77 @@
+import weakref
+
+from asyncua import Client, ua
+
+
+class NodeRegistration:
+    """Makes every OPC UA client of the process use registered handles for a set of node IDs: each client registers
+    the nodes with the RegisterNodes service once connected, and get_node returns their registered handles, resolved
+    once per session, instead of parsing the node IDs on every call.
+
+    Servers may return handles that are cheaper to look up than the registered node IDs (e.g. numeric aliases of
+    string node IDs), or the node IDs themselves. Registration hooks the connect and get_node methods of the asyncua
+    client, so that any experiment can opt into it without modification. A client whose registration fails keeps
+    using the node IDs. Only one registration can be started at a time.
+    """
+
+    _originals = None
+
+    def __init__(self, node_ids=()):
+        """
+        Args:
+            node_ids: node IDs to register, as strings
+        """
+        self.node_ids = list(node_ids)
+        self.failures = 0
+        # Registered nodes of each client, by node ID
+        self._handles = weakref.WeakKeyDictionary()
+
+    def start(self):
+        if NodeRegistration._originals is not None:
+            raise RuntimeError("A node registration is already started.")
+        originals = {"connect": Client.connect, "get_node": Client.get_node}
+        registration = self
+
+        async def connect(client, *args, **kwargs):
+            await originals["connect"](client, *args, **kwargs)
+            await registration.register(client)
+
+        def get_node(client, nodeid):
+            if isinstance(nodeid, (str, ua.NodeId)):
+                handle = registration._handles.get(client, {}).get(nodeid)
+                if handle is not None:
+                    return handle
+            return originals["get_node"](client, nodeid)
+
+        NodeRegistration._originals = originals
+        Client.connect = connect
+        Client.get_node = get_node
+
+    def stop(self):
+        originals = NodeRegistration._originals
+        if originals is None:
+            return
+        Client.connect = originals["connect"]
+        Client.get_node = originals["get_node"]
+        NodeRegistration._originals = None
+
+    async def register(self, client):
+        """Registers the nodes for a connected client, replacing the handles of its previous session."""
+        self._handles.pop(client, None)
+        if len(self.node_ids) == 0:
+            return
+        nodes = [
+            NodeRegistration._originals["get_node"](client, node_id)
+            for node_id in self.node_ids
+        ]
+        try:
+            registered = await client.register_nodes(nodes)
+        except Exception:
+            self.failures += 1
+            return
+        handles = {}
+        # register_nodes replaces the node IDs of the nodes by the handles, keeping the former as basenodeid
+        for node_id, handle in zip(self.node_ids, registered):
+            handles[node_id] = handle
+            handles[handle.basenodeid] = handle
+        self._handles[client] = handles
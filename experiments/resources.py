@@ -0,0 +1,200 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Columns of a resource sample: one row per process and sampling time
+RESOURCE_COLUMNS = [
+    "timestamp",
+    "process",
+    "pid",
+    "cpu_percent",
+    "rss_bytes",
+    "threads",
+    "open_sockets",
+    "voluntary_switches_per_second",
+    "involuntary_switches_per_second",
+]
+PROC_NET_FILES = ["/proc/net/tcp", "/proc/net/tcp6"]
+TCP_LISTEN = "0A"
+
+
+def find_listening_pid(port):
+    """Finds the local process listening on a TCP port, from /proc.
+
+    Returns:
+        int: PID of the process, None if no (visible) process listens on the port
+    """
+    inodes = set()
+    for path in PROC_NET_FILES:
+        try:
+            with open(path) as f:
+                next(f)  # header
+                for line in f:
+                    fields = line.split()
+                    local_port = int(fields[1].split(":")[1], 16)
+                    if local_port == port and fields[3] == TCP_LISTEN:
+                        inodes.add(f"socket:[{fields[9]}]")
+        except OSError:
+            continue
+    if not inodes:
+        return None
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            for fd in os.listdir(f"/proc/{pid}/fd"):
+                if os.readlink(f"/proc/{pid}/fd/{fd}") in inodes:
+                    return int(pid)
+        except OSError:  # process exited, or not ours
+            continue
+    return None
+
+
+def read_process_stats(pid):
+    """Reads the cumulative CPU time, memory, threads, sockets and context switches of a process from /proc.
+
+    Raises:
+        OSError: if the process does not exist (anymore)
+
+    Returns:
+        dict: cpu_time (s), rss_bytes, threads, open_sockets, voluntary_switches, involuntary_switches
+    """
+    with open(f"/proc/{pid}/stat") as f:
+        # The command name may contain spaces: fields are counted after its closing parenthesis
+        fields = f.read().rsplit(")", 1)[1].split()
+    stats = {
+        "cpu_time": (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK"),
+        "rss_bytes": int(fields[21]) * os.sysconf("SC_PAGE_SIZE"),
+        "threads": int(fields[17]),
+    }
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("voluntary_ctxt_switches"):
+                stats["voluntary_switches"] = int(line.split()[1])
+            elif line.startswith("nonvoluntary_ctxt_switches"):
+                stats["involuntary_switches"] = int(line.split()[1])
+    open_sockets = 0
+    for fd in os.listdir(f"/proc/{pid}/fd"):
+        try:
+            open_sockets += os.readlink(f"/proc/{pid}/fd/{fd}").startswith("socket:")
+        except OSError:  # fd closed meanwhile
+            continue
+    stats["open_sockets"] = open_sockets
+    return stats
+
+
+class ResourceSampler:
+    """Samples the resource usage of the harness process and of a local server under test from /proc, at a fixed
+    interval, in a background thread (so that the samples keep their timing when the harness event loop is busy).
+
+    The server process is either given by its PID, or looked up by the local port it listens on. In the latter case,
+    it is looked up again when it exits, so that restarted servers (e.g. by the recovery experiment) are followed.
+    """
+
+    # Minimum time between two lookups of the server process by its port, in seconds
+    LOOKUP_INTERVAL = 1.0
+
+    def __init__(self, interval=0.1, server_pid=None, server_port=None):
+        """
+        Args:
+            interval: sampling interval, in seconds
+            server_pid: PID of the server process
+            server_port: local port of the server, to look its process up if server_pid is not given
+        """
+        self.interval = float(interval)
+        self.server_pid = server_pid
+        self.server_port = server_port
+        self.samples = []
+        self._previous = (
+            {}
+        )  # (process, pid) -> (timestamp, stats) of the previous sample
+        self._last_lookup = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def set_server_port(self, server_port):
+        """Follows the server listening on another local port (None to only sample the harness)."""
+        if server_port != self.server_port:
+            self.server_port = server_port
+            self.server_pid = None
+            self._last_lookup = 0
+
+    @staticmethod
+    def is_supported():
+        return Path("/proc/self/stat").exists()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        next_sample = time.monotonic()
+        while not self._stop.is_set():
+            self.sample()
+            next_sample += self.interval
+            self._stop.wait(max(0, next_sample - time.monotonic()))
+
+    def _server(self):
+        """Returns the PID of the server process, looking it up by port if needed."""
+        if self.server_port is None:
+            return self.server_pid
+        now = time.monotonic()
+        if (
+            self.server_pid is None or not Path(f"/proc/{self.server_pid}").exists()
+        ) and now - self._last_lookup >= ResourceSampler.LOOKUP_INTERVAL:
+            self._last_lookup = now
+            self.server_pid = find_listening_pid(self.server_port)
+        return self.server_pid
+
+    def sample(self):
+        """Records one sample of each process."""
+        processes = {"harness": os.getpid(), "server": self._server()}
+        for process, pid in processes.items():
+            if pid is None:
+                continue
+            timestamp = time.time()
+            try:
+                stats = read_process_stats(pid)
+            except OSError:
+                continue
+            row = {
+                "timestamp": timestamp,
+                "process": process,
+                "pid": pid,
+                "cpu_percent": None,
+                "rss_bytes": stats["rss_bytes"],
+                "threads": stats["threads"],
+                "open_sockets": stats["open_sockets"],
+                "voluntary_switches_per_second": None,
+                "involuntary_switches_per_second": None,
+            }
+            previous = self._previous.get((process, pid))
+            if previous is not None:  # rates since the previous sample of the process
+                elapsed = timestamp - previous[0]
+                row["cpu_percent"] = (
+                    100 * (stats["cpu_time"] - previous[1]["cpu_time"]) / elapsed
+                )
+                for switches in ["voluntary_switches", "involuntary_switches"]:
+                    row[f"{switches}_per_second"] = (
+                        stats[switches] - previous[1][switches]
+                    ) / elapsed
+            self._previous[(process, pid)] = (timestamp, stats)
+            self.samples.append(row)
+
+    def save(self, path):
+        """Appends the samples recorded since the last save to a CSV file, so that the samples of every run of a
+        session are kept."""
+        samples, self.samples = self.samples, []
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pd.DataFrame(samples, columns=RESOURCE_COLUMNS).to_csv(
+            path, mode="a", header=not path.exists(), index=False
+        )
+        print(f"\t➡️ {len(samples)} resource samples written to {str(path)}")
@@ -0,0 +1,181 @@
+import math
+from statistics import NormalDist
+
+import numpy as np
+
+# Reasons for which a stopping rule ends the sampling: interval narrow enough, request or time cap reached
+STOP_REASONS = ["converged", "max_samples", "max_duration"]
+
+
+def parse_statistic(statistic):
+    """Parses a statistic, "mean" or a percentile "p{q}" with 0 < q < 100.
+
+    Raises:
+        ValueError: if the statistic is invalid
+
+    Returns:
+        float: the quantile of the percentile, between 0 and 1, None for the mean
+    """
+    if statistic == "mean":
+        return None
+    try:
+        quantile = float(statistic[1:]) / 100 if statistic.startswith("p") else None
+    except ValueError:
+        quantile = None
+    if quantile is None or not 0 < quantile < 1:
+        raise ValueError(
+            f'Invalid statistic {statistic}, expected "mean" or a percentile such as "p99"'
+        )
+    return quantile
+
+
+def confidence_interval(samples, statistic="mean", confidence=0.95):
+    """Computes a statistic of samples and its confidence interval.
+
+    The interval of the mean assumes it is normally distributed (central limit theorem). The interval of a percentile
+    is distribution-free: it is bounded by the order statistics whose ranks are the bounds of the normal approximation
+    of the binomial distribution of the number of samples below the percentile.
+
+    Args:
+        samples: sampled values, e.g. response times
+        statistic: "mean" or a percentile "p{q}", e.g. "p99"
+        confidence: confidence level of the interval
+
+    Returns:
+        float: the statistic, None without samples
+        float: lower bound of the interval, None if there are too few samples
+        float: upper bound of the interval, None if there are too few samples
+    """
+    quantile = parse_statistic(statistic)
+    samples = np.asarray(samples, dtype=float)
+    n = len(samples)
+    if n == 0:
+        return None, None, None
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    if quantile is None:
+        estimate = samples.mean()
+        if n < 2:
+            return estimate, None, None
+        half_width = z * samples.std(ddof=1) / math.sqrt(n)
+        return estimate, estimate - half_width, estimate + half_width
+    estimate = np.percentile(samples, quantile * 100)
+    if n < 2:
+        return estimate, None, None
+    ordered = np.sort(samples)
+    half_width = z * math.sqrt(n * quantile * (1 - quantile))
+    lower = math.floor(n * quantile - half_width)
+    upper = math.ceil(n * quantile + half_width)
+    if lower < 0 or upper > n - 1:  # Too few samples to bound an extreme percentile
+        return estimate, None, None
+    return estimate, ordered[lower], ordered[upper]
+
+
+def relative_width(estimate, lower, upper):
+    """Width of a confidence interval relative to its statistic, None if it is undefined."""
+    if lower is None or upper is None or estimate == 0:
+        return None
+    return (upper - lower) / abs(estimate)
+
+
+def sampling_summary(samples, statistics=("mean", "p99"), confidence=0.95):
+    """Summarizes the precision of statistics of samples, e.g. the response times of a run.
+
+    Returns:
+        dict: number of samples, and each statistic with its confidence interval and relative width
+    """
+    summary = {"samples": len(samples), "confidence": confidence}
+    for statistic in statistics:
+        estimate, lower, upper = confidence_interval(samples, statistic, confidence)
+        summary[statistic] = {
+            "estimate": estimate,
+            "ci_lower": lower,
+            "ci_upper": upper,
+            "ci_relative_width": relative_width(estimate, lower, upper),
+        }
+    return summary
+
+
+class StoppingRule:
+    """Stopping rule of an experiment sampling requests: the requests are sampled until the confidence interval of a
+    statistic of their response times (mean or percentile) is narrower than a target width relative to the
+    statistic, or until a number of requests or a duration is reached.
+
+    The interval is evaluated every batch_size samples only, so that the rule is cheap and that a run does not stop on
+    a lucky streak. Without target width, the rule stops after the maximum number of requests, i.e. the fixed sample
+    size of the experiments.
+    """
+
+    def __init__(
+        self,
+        statistic="mean",
+        target_width=None,
+        confidence=0.95,
+        batch_size=100,
+        max_duration=None,
+    ):
+        """
+        Args:
+            statistic: "mean" or a percentile "p{q}", e.g. "p99"
+            target_width: width of the confidence interval relative to the statistic under which sampling stops, e.g.
+                0.05 for +/- 2.5%, None to sample the maximum number of requests
+            confidence: confidence level of the interval
+            batch_size: number of samples between two evaluations of the interval
+            max_duration: maximum duration of the sampling, in seconds, None for no limit
+
+        Raises:
+            ValueError: if the statistic or the batch size is invalid
+        """
+        parse_statistic(statistic)
+        if batch_size < 1:
+            raise ValueError(f"Invalid batch size {batch_size}, expected at least 1")
+        self.statistic = statistic
+        self.target_width = target_width
+        self.confidence = confidence
+        self.batch_size = int(batch_size)
+        self.max_duration = max_duration
+
+    def stop_reason(self, samples, elapsed, max_samples):
+        """Tells whether the sampling must stop.
+
+        Args:
+            samples: samples so far
+            elapsed: time since the sampling started, in seconds
+            max_samples: maximum number of samples, e.g. the num_requests of the experiment
+
+        Returns:
+            str: one of STOP_REASONS, None to take more samples
+        """
+        n = len(samples)
+        if n >= max_samples:
+            return "max_samples"
+        if self.max_duration is not None and elapsed >= self.max_duration:
+            return "max_duration"
+        if self.target_width is None or n == 0 or n % self.batch_size != 0:
+            return None
+        width = relative_width(
+            *confidence_interval(samples, self.statistic, self.confidence)
+        )
+        if width is not None and width <= self.target_width:
+            return "converged"
+        return None
+
+    def summary(self, samples, reason):
+        """Records the sample size reached and the precision of the statistic, e.g. as parameters of the results.
+
+        Returns:
+            dict: stop reason, number of samples, statistic and its confidence interval
+        """
+        estimate, lower, upper = confidence_interval(
+            samples, self.statistic, self.confidence
+        )
+        return {
+            "stop_reason": reason,
+            "samples": len(samples),
+            "statistic": self.statistic,
+            "estimate": estimate,
+            "ci_lower": lower,
+            "ci_upper": upper,
+            "ci_relative_width": relative_width(estimate, lower, upper),
+            "target_width": self.target_width,
+            "confidence": self.confidence,
+        }
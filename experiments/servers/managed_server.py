@@ -0,0 +1,83 @@
+import asyncio
+import signal
+import subprocess
+import sys
+import time
+
+
+class ManagedServer:
+    """Test server (experiments/servers/test_server.py) run in a child process, for experiments that control its lifecycle.
+
+    The server is started through the controller's server command, so the experiment must be run from the root folder of
+    the project, like every other command.
+    """
+
+    def __init__(self, port=4840, server_args=()):
+        """
+        Args:
+            port: port the server is exposed on
+            server_args: additional options of the controller's server command, e.g. ("--history-nodes", "10")
+        """
+        self.port = int(port)
+        self.server_args = [str(arg) for arg in server_args]
+        self.process = None
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process is not None else None
+
+    async def start(self, timeout=30):
+        """Starts the server process and waits until it accepts connections.
+
+        Args:
+            timeout: maximum time to wait for the server to accept connections, in seconds
+
+        Raises:
+            RuntimeError: if the server exits or does not accept connections in time
+
+        Returns:
+            float: time at which the server accepted a connection
+        """
+        self.process = subprocess.Popen(
+            [
+                sys.executable,
+                "experiment_controller.py",
+                "server",
+                "--port",
+                str(self.port),
+                *self.server_args,
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(
+                    f"Test server exited with code {self.process.returncode}, is port {self.port} already in use?"
+                )
+            try:
+                _, writer = await asyncio.open_connection("localhost", self.port)
+                writer.close()
+                return time.time()
+            except OSError:
+                await asyncio.sleep(0.05)
+        self.kill()
+        raise RuntimeError(f"Test server did not start within {timeout}s.")
+
+    async def stop(self, timeout=10):
+        """Stops the server gracefully (SIGINT, sessions are closed), or kills it after timeout seconds."""
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.send_signal(signal.SIGINT)
+        try:
+            await asyncio.to_thread(self.process.wait, timeout)
+        except subprocess.TimeoutExpired:
+            self.kill()
+
+    def kill(self):
+        """Kills the server process (SIGKILL), without letting it close its sessions."""
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.process.kill()
+        self.process.wait()
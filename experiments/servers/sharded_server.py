@@ -0,0 +1,70 @@
+import asyncio
+from pathlib import Path
+
+from experiments.servers.managed_server import ManagedServer
+
+
+class ShardedServer:
+    """Test server sharded over several processes, on consecutive ports, so that its capacity scales with the CPU
+    cores. Each shard serves its share of the generated nodes (see experiments/sharding.py for the routing).
+    """
+
+    def __init__(
+        self, n_shards, port=4840, server_args=(), history_db="history.sqlite"
+    ):
+        """
+        Args:
+            n_shards: number of shards (processes)
+            port: port of the first shard, shard i listening on port + i
+            server_args: options of the controller's server command passed to every shard, e.g. ("--workload-nodes", "10000")
+            history_db: path of the SQLite history database, each shard storing its history in its own database
+        """
+        history_db = Path(history_db)
+        self.shards = [
+            ManagedServer(
+                int(port) + shard,
+                [
+                    *server_args,
+                    "--shard",
+                    shard,
+                    "--shards",
+                    n_shards,
+                    "--history-db",
+                    history_db.with_name(
+                        f"{history_db.stem}_{shard}{history_db.suffix}"
+                    ),
+                ],
+            )
+            for shard in range(n_shards)
+        ]
+
+    async def start(self, timeout=60):
+        """Starts the shards and waits until they all accept connections.
+
+        Raises:
+            RuntimeError: if a shard exits or does not accept connections in time
+        """
+        try:
+            await asyncio.gather(*[shard.start(timeout) for shard in self.shards])
+        except RuntimeError:
+            self.kill()
+            raise
+
+    async def stop(self):
+        await asyncio.gather(*[shard.stop() for shard in self.shards])
+
+    def kill(self):
+        for shard in self.shards:
+            shard.kill()
+
+    async def wait(self):
+        """Waits until a shard exits.
+
+        Returns:
+            int: return code of the shard
+        """
+        while True:
+            for shard in self.shards:
+                if shard.process.poll() is not None:
+                    return shard.process.returncode
+            await asyncio.sleep(1)
@@ -1,13 +1,390 @@
 import asyncio
 import logging
+import multiprocessing
+import time
+from datetime import datetime, timezone
 
-from asyncua import ua, Server
+from asyncua import ua, Client, Server, uamethod
+from asyncua.server.history_sql import HistorySQLite
 
+# Numeric identifier of the first generated historized node
+HISTORY_NODE_ID_OFFSET = 10000
+# Numeric identifier of the first generated workload node
+WORKLOAD_NODE_ID_OFFSET = 20000
+# Numeric identifier of the first node addressable by a string and a numeric node ID, and prefix of its string node ID
+FORM_NODE_ID_OFFSET = 30000
+FORM_NODE_ID_PREFIX = "NodeIdForms.Area1.Line1.Cell1.Value"
+# Groups of 64 byte nodes whose values the background writers can update: the test data point, and the workload and
+# node ID form nodes, if generated
+UPDATE_NODE_GROUPS = ["value", "workload", "forms"]
+# Period at which the background writers write their batches of updates, in seconds
+UPDATE_TICK = 0.01
+# Base types of the event types the server can generate, their instances carrying a Payload (ByteString), a Sequence
+# number (UInt32, per event type) and the EmitTime (Double, UNIX time) at which the server triggered them
+EVENT_TYPES = {
+    "TestEvent": ua.ObjectIds.BaseEventType,
+    "TestSystemEvent": ua.ObjectIds.SystemEventType,
+    "TestAlarm": ua.ObjectIds.AlarmConditionType,
+}
 
-async def setup_server(name, uri, port):
+
+def event_severity(sequence):
+    """Severity of the generated event with the given sequence number: 100, 200, ..., 1000 in turn, so that a where
+    clause on the severity selects a known share of the events."""
+    return 100 * (sequence % 10 + 1)
+
+
+@uamethod
+async def sleep_work(parent, payload, work_ms, response_size):
+    """Method simulating I/O-bound work: yields to the server loop while "working".
+
+    Returns the response payload, and the server-side start and end times of the execution.
+    """
+    start_time = time.time()
+    await asyncio.sleep(work_ms / 1000)
+    return (b"\x00" * response_size, start_time, time.time())
+
+
+@uamethod
+def cpu_work(parent, payload, work_ms, response_size):
+    """Method simulating CPU-bound work: busy loop for work_ms milliseconds.
+
+    Returns the response payload, and the server-side start and end times of the execution.
+    """
+    start_time = time.time()
+    deadline = time.perf_counter() + work_ms / 1000
+    while time.perf_counter() < deadline:
+        pass
+    return (b"\x00" * response_size, start_time, time.time())
+
+
+async def add_test_methods(server, idx):
+    """Adds the TestMethods object exposing the method-call benchmark methods.
+
+    Both methods take (ByteString payload, Double work_ms, UInt32 response_size) and return
+    (ByteString response, Double server start time, Double server end time). The sleep method is a
+    coroutine run on the server loop, the CPU method a blocking function run in the server's executor.
+    """
+    root = server.get_objects_node()
+    methods = await root.add_object(ua.NodeId("TestMethods", idx), "TestMethods")
+    input_args = [
+        ua.VariantType.ByteString,
+        ua.VariantType.Double,
+        ua.VariantType.UInt32,
+    ]
+    output_args = [
+        ua.VariantType.ByteString,
+        ua.VariantType.Double,
+        ua.VariantType.Double,
+    ]
+    await methods.add_method(
+        ua.NodeId("TestMethods.SleepWork", idx),
+        "SleepWork",
+        sleep_work,
+        input_args,
+        output_args,
+    )
+    await methods.add_method(
+        ua.NodeId("TestMethods.CpuWork", idx),
+        "CpuWork",
+        cpu_work,
+        input_args,
+        output_args,
+    )
+
+
+async def add_history_nodes(server, idx, n_nodes, shard=0, n_shards=1):
+    """Adds the HistoryData object with n_nodes Double variables to historize, or with the variables of a shard.
+
+    Numeric node IDs are used since the SQLite history storage derives its table names from them.
+
+    Returns:
+        list: the variable nodes, with node IDs ns=idx;i=HISTORY_NODE_ID_OFFSET+i
+    """
+    root = server.get_objects_node()
+    history = await root.add_object(ua.NodeId("HistoryData", idx), "HistoryData")
+    return [
+        await history.add_variable(
+            ua.NodeId(HISTORY_NODE_ID_OFFSET + i, idx), f"Value{i}", 0.0
+        )
+        for i in range(shard, n_nodes, n_shards)
+    ]
+
+
+async def add_workload_nodes(server, idx, n_nodes, shard=0, n_shards=1):
+    """Adds the WorkloadData object with n_nodes writable 64 byte variables, to run workloads on large node sets, or
+    with the variables of a shard.
+
+    Returns:
+        list: the variable nodes, with node IDs ns=idx;i=WORKLOAD_NODE_ID_OFFSET+i
+    """
+    root = server.get_objects_node()
+    workload = await root.add_object(ua.NodeId("WorkloadData", idx), "WorkloadData")
+    variables = []
+    for i in range(shard, n_nodes, n_shards):
+        var = await workload.add_variable(
+            ua.NodeId(WORKLOAD_NODE_ID_OFFSET + i, idx),
+            f"Value{i}",
+            ua.ByteString(b"\x00" * 64),
+        )
+        await var.set_writable()
+        variables.append(var)
+    return variables
+
+
+async def add_form_nodes(server, idx, n_nodes):
+    """Adds the NodeIdForms object with n_nodes writable 64 byte variables, each addressable by a string node ID,
+    ns=idx;s=FORM_NODE_ID_PREFIX{i}, and by a numeric node ID, ns=idx;i=FORM_NODE_ID_OFFSET+i, to compare the cost of
+    both forms on the same nodes.
+
+    Returns:
+        list: the variable nodes, with their string node IDs
+    """
+    root = server.get_objects_node()
+    forms = await root.add_object(ua.NodeId("NodeIdForms", idx), "NodeIdForms")
+    variables = []
+    for i in range(n_nodes):
+        var = await forms.add_variable(
+            ua.NodeId(f"{FORM_NODE_ID_PREFIX}{i}", idx),
+            f"Value{i}",
+            ua.ByteString(b"\x00" * 64),
+        )
+        await var.set_writable()
+        # The numeric node ID is an alias of the same node in the address space
+        server.iserver.aspace[
+            ua.NodeId(FORM_NODE_ID_OFFSET + i, idx)
+        ] = server.iserver.aspace[var.nodeid]
+        variables.append(var)
+    return variables
+
+
+async def write_history_values(nodes, rate):
+    """Writes a new value with a source timestamp to each node, rate times per second."""
+    loop = asyncio.get_running_loop()
+    period = 1 / rate
+    next_write = loop.time()
+    value = 0.0
+    while True:
+        value += 1
+        source_timestamp = datetime.now(timezone.utc)
+        for node in nodes:
+            await node.write_value(
+                ua.DataValue(
+                    ua.Variant(value, ua.VariantType.Double),
+                    SourceTimestamp=source_timestamp,
+                )
+            )
+        next_write += period
+        await asyncio.sleep(max(0, next_write - loop.time()))
+
+
+def select_update_nodes(nodes_by_group, update_nodes):
+    """Selects the nodes updated by the background writers.
+
+    Args:
+        nodes_by_group: nodes of each of UPDATE_NODE_GROUPS
+        update_nodes: groups of nodes to update, "group" for all the nodes of a group, or "group:count" for its first
+            count nodes, e.g. ["value", "workload:1000"]
+
+    Raises:
+        ValueError: if a group is unknown or a count is invalid
+
+    Returns:
+        list: the nodes to update
+    """
+    nodes = []
+    for selection in update_nodes:
+        group, _, count = selection.partition(":")
+        if group not in UPDATE_NODE_GROUPS:
+            raise ValueError(
+                f"Unknown node group {group}, expected one of {UPDATE_NODE_GROUPS}"
+            )
+        try:
+            count = int(count) if count else None
+        except ValueError:
+            raise ValueError(f"Invalid number of nodes {count} of the group {group}")
+        nodes.extend(nodes_by_group[group][:count])
+    return nodes
+
+
+def update_value(sequence):
+    """64 byte value of an update, starting with its sequence number, so that every update changes the value."""
+    return ua.DataValue(
+        ua.Variant(
+            sequence.to_bytes(8, "little") + b"\x00" * 56, ua.VariantType.ByteString
+        ),
+        SourceTimestamp=datetime.now(timezone.utc),
+    )
+
+
+async def update_values(server, nodes, rate):
+    """Updates the nodes in turn, rate updates per second in total, each update writing a new value with its source
+    timestamp, as a device driver would.
+
+    The updates are written directly to the address space, which notifies the subscriptions, in batches every
+    UPDATE_TICK seconds: the writer yields to the server loop between batches, so that it does not starve the
+    sessions. Updates late by more than a second, when the loop is saturated, are skipped rather than written in a
+    burst.
+    """
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    written = 0
+    while True:
+        due = int((loop.time() - start) * rate)
+        written = max(written, due - int(rate))
+        for sequence in range(written, due):
+            node = nodes[sequence % len(nodes)]
+            await server.write_attribute_value(node.nodeid, update_value(sequence))
+        written = due
+        await asyncio.sleep(UPDATE_TICK)
+
+
+async def _update_values_remotely(url, node_ids, rate):
+    client = Client(url)
+    async with client:
+        nodes = [client.get_node(node_id) for node_id in node_ids]
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        written = 0
+        while True:
+            due = int((loop.time() - start) * rate)
+            written = max(written, due - int(rate))
+            if due > written:  # One Write request per batch
+                batch = range(written, due)
+                await client.write_values(
+                    [nodes[sequence % len(nodes)] for sequence in batch],
+                    [update_value(sequence) for sequence in batch],
+                )
+            written = due
+            await asyncio.sleep(UPDATE_TICK)
+
+
+def run_update_process(url, node_ids, rate):
+    """Updates the nodes from a child process, as an OPC UA client writing a batch of updates every UPDATE_TICK
+    seconds (see update_values), so that generating the updates does not load the server process.
+    """
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(_update_values_remotely(url, node_ids, rate))
+
+
+def start_update_processes(url, nodes, rate, n_processes):
+    """Starts n_processes update processes, sharing the nodes and the rate of updates.
+
+    Returns:
+        list: the processes, terminated with the server process
+    """
+    context = multiprocessing.get_context("spawn")  # No event loop inherited
+    processes = []
+    for i in range(n_processes):
+        node_ids = [node.nodeid.to_string() for node in nodes[i::n_processes]]
+        if len(node_ids) == 0:
+            continue
+        process = context.Process(
+            target=run_update_process,
+            args=(url, node_ids, rate * len(node_ids) / len(nodes)),
+            daemon=True,
+        )
+        process.start()
+        processes.append(process)
+    return processes
+
+
+async def add_event_generators(server, idx, event_types):
+    """Adds the custom event types, emitted by the Server object.
+
+    Returns:
+        list: the event generators, one per event type
+    """
+    generators = []
+    for event_type in event_types:
+        if event_type not in EVENT_TYPES:
+            raise ValueError(
+                f"Unknown event type {event_type}, expected one of {list(EVENT_TYPES)}"
+            )
+        etype = await server.create_custom_event_type(
+            idx,
+            event_type,
+            EVENT_TYPES[event_type],
+            [
+                ("Payload", ua.VariantType.ByteString),
+                ("Sequence", ua.VariantType.UInt32),
+                ("EmitTime", ua.VariantType.Double),
+            ],
+        )
+        generator = await server.get_event_generator(etype, ua.ObjectIds.Server)
+        generator.event.Message = ua.LocalizedText(event_type)
+        generators.append(generator)
+    return generators
+
+
+async def emit_events(generators, rate, size):
+    """Triggers an event of each type, with a payload of size bytes, rate times per second."""
+    loop = asyncio.get_running_loop()
+    period = 1 / rate
+    next_event = loop.time()
+    payload = b"\x00" * size
+    sequence = 0
+    while True:
+        for generator in generators:
+            generator.event.Payload = payload
+            generator.event.Sequence = sequence
+            generator.event.Severity = event_severity(sequence)
+            generator.event.EmitTime = time.time()
+            await generator.trigger()
+        sequence += 1
+        next_event += period
+        await asyncio.sleep(max(0, next_event - loop.time()))
+
+
+async def setup_server(
+    name,
+    uri,
+    port,
+    history_nodes=0,
+    history_rate=10.0,
+    history_db="history.sqlite",
+    history_max_response_size=10000,
+    workload_nodes=0,
+    form_nodes=0,
+    event_rate=0.0,
+    event_size=64,
+    event_types=("TestEvent",),
+    update_rate=0.0,
+    update_nodes=("value",),
+    update_processes=0,
+    shard=0,
+    n_shards=1,
+):
+    """Runs the test server indefinitely.
+
+    Args:
+        name: name of the server
+        uri: URI of the namespace of the test nodes
+        port: port of the endpoint
+        history_nodes: number of historized nodes to generate (ns=2;i=10000, ns=2;i=10001, ...), none by default
+        history_rate: number of values written per second to each historized node, 0 to write none
+        history_db: path of the SQLite history database
+        history_max_response_size: maximum number of values per HistoryRead response, before a continuation point is returned
+        workload_nodes: number of 64 byte read/write nodes to generate (ns=2;i=20000, ns=2;i=20001, ...), none by default
+        form_nodes: number of 64 byte read/write nodes addressable by a string and a numeric node ID (ns=2;i=30000, ns=2;i=30001, ...), none by default
+        event_rate: number of events of each type emitted per second by the Server object, none by default
+        event_size: size of the payload of the events, in bytes
+        event_types: types of the events to emit, among EVENT_TYPES
+        update_rate: number of value updates per second written by the background writers, none by default
+        update_nodes: groups of nodes updated by the background writers, see select_update_nodes
+        update_processes: number of child processes writing the updates through the Write service, 0 to write them from a task of the server loop
+        shard: index of the shard served by this server, in a sharded test server
+        n_shards: number of shards, the i-th historized and workload nodes being served by shard i % n_shards
+    """
     _logger = logging.getLogger(__name__)
     # Create OPC-UA server
     server = Server()
+    if history_nodes > 0:  # The storage is initialized with the server
+        server.iserver.history_manager.set_storage(
+            HistorySQLite(
+                history_db, max_history_data_response_size=history_max_response_size
+            )
+        )
     await server.init()
     server.set_endpoint(f"opc.tcp://localhost:{port}/freeopcua/server/")
     server.set_server_name(name)
@@ -23,11 +400,60 @@ async def setup_server(name, uri, port):
     )  # 64 byte data point
     await var.set_writable()
 
+    # Methods for the method-call experiment
+    await add_test_methods(server, idx)
+
+    # Historized nodes for the history-read experiment
+    history_variables = await add_history_nodes(
+        server, idx, history_nodes, shard, n_shards
+    )
+
+    # Large node set for the workload experiment
+    workload_variables = await add_workload_nodes(
+        server, idx, workload_nodes, shard, n_shards
+    )
+
+    # Nodes addressable by a string and a numeric node ID, for the node ID form experiment
+    form_variables = await add_form_nodes(server, idx, form_nodes)
+
+    # Nodes changing in the background, to measure under update load
+    update_variables = select_update_nodes(
+        {"value": [var], "workload": workload_variables, "forms": form_variables},
+        update_nodes,
+    )
+
+    # Event types for the event throughput experiment
+    event_generators = await add_event_generators(server, idx, event_types)
+
     # Start server
     # await server.start()
 
     async with server:
         _logger.info("Starting server")
+        if len(history_variables) > 0:
+            await server.historize_node_data_change(
+                history_variables, period=None, count=0
+            )
+            if history_rate > 0:  # Otherwise the history is only the initial values
+                history_writer = asyncio.create_task(
+                    write_history_values(history_variables, history_rate)
+                )
+        if event_rate > 0:
+            event_emitter = asyncio.create_task(
+                emit_events(event_generators, event_rate, event_size)
+            )
+        if update_rate > 0 and len(update_variables) > 0:
+            if update_processes > 0:
+                update_writers = start_update_processes(
+                    f"opc.tcp://localhost:{port}/freeopcua/server/",
+                    update_variables,
+                    update_rate,
+                    update_processes,
+                )
+            else:
+                update_writer = asyncio.create_task(
+                    update_values(server, update_variables, update_rate)
+                )
         # Run server indefinitely
         while True:
             await asyncio.sleep(1)
@@ -0,0 +1,65 @@
+from urllib.parse import urlparse
+
+from asyncua import ua
+
+from experiments.servers.test_server import (
+    FORM_NODE_ID_OFFSET,
+    HISTORY_NODE_ID_OFFSET,
+    WORKLOAD_NODE_ID_OFFSET,
+)
+
+
+def shard_of_index(index, n_shards):
+    """Shard serving the index-th generated node (historized or workload node) of a sharded test server."""
+    return index % n_shards
+
+
+class ShardRouter:
+    """Routes the requests of the clients to the shards of a sharded test server.
+
+    The shards listen on consecutive ports from the port of the server URL. The generated nodes (historized and
+    workload nodes) are spread over the shards by their index, every other node (data point, methods, node ID form
+    nodes) is served by each shard.
+    """
+
+    def __init__(self, server_url, n_shards=1):
+        """
+        Args:
+            server_url: URL of the first shard
+            n_shards: number of shards
+        """
+        self.server_url = server_url
+        self.n_shards = int(n_shards)
+        self._address = urlparse(server_url)
+
+    def shard_url(self, shard):
+        port = (self._address.port or 4840) + shard
+        return self._address._replace(
+            netloc=f"{self._address.hostname}:{port}"
+        ).geturl()
+
+    def shard_of(self, node_id):
+        """Returns the shard serving a node, None if the node is served by every shard.
+
+        Args:
+            node_id: node ID string, e.g. "ns=2;i=20001"
+        """
+        node_id = ua.NodeId.from_string(node_id)
+        if node_id.NamespaceIndex != 2 or not isinstance(node_id.Identifier, int):
+            return None
+        if node_id.Identifier >= FORM_NODE_ID_OFFSET:  # Node ID form nodes
+            return None
+        for offset in [WORKLOAD_NODE_ID_OFFSET, HISTORY_NODE_ID_OFFSET]:
+            if node_id.Identifier >= offset:
+                return shard_of_index(node_id.Identifier - offset, self.n_shards)
+        return None
+
+    def client_shard(self, client_id):
+        """Returns the shard a client connects to for the nodes served by every shard."""
+        return client_id % self.n_shards
+
+    def shard_nodes(self, node_ids, shard):
+        """Returns the nodes of node_ids served by a shard."""
+        return [
+            node_id for node_id in node_ids if self.shard_of(node_id) in [None, shard]
+        ]
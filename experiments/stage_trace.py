@@ -0,0 +1,213 @@
+import contextvars
+import time
+from pathlib import Path
+
+import pandas as pd
+import asyncua.client.ua_client as ua_client
+import asyncua.client.ua_session as ua_session
+from asyncua.common.connection import SecureConnection
+
+# Timestamps recorded during a request, in order, each one ending the stage of the same index:
+# - acquired: the request may be sent (queue: wait for the request semaphore of the client)
+# - encoded: the request is encoded in binary (encode)
+# - secured: the secure channel has chunked, signed or encrypted the message (secure_send)
+# - written: the message is written to the socket transport (socket_write)
+# - received: the last bytes of the response are received (server: network and server processing)
+# - unsecured: the secure channel has reassembled, verified or decrypted the response (secure_receive)
+# - resumed: the task of the request resumes with the response (dispatch: wait for the event loop)
+# - decoded: the response is decoded (decode)
+STAMPS = [
+    "acquired",
+    "encoded",
+    "secured",
+    "written",
+    "received",
+    "unsecured",
+    "resumed",
+    "decoded",
+]
+STAGES = [
+    "queue",
+    "encode",
+    "secure_send",
+    "socket_write",
+    "server",
+    "secure_receive",
+    "dispatch",
+    "decode",
+]
+# Columns of a stage trace: one request per row, its stamps in nanoseconds from the start of the request
+STAGE_TRACE_COLUMNS = [
+    "timestamp",
+    "experiment",
+    "client_id",
+    "service",
+    "request_handle",
+    "request_id",
+] + [f"{stamp}_ns" for stamp in STAMPS]
+
+# Request being sent or decoded by the current task
+_request = contextvars.ContextVar("stage_trace_request", default=None)
+
+
+class StageTracer:
+    """Records when each request of the OPC UA clients of the process goes through each stage of the asyncua stack
+    (see STAMPS), to break its response time down into encoding, secure channel, socket, server and decoding times.
+
+    Tracing hooks the send and receive paths of the asyncua client while it is started, and correlates the stamps of
+    a request by its request ID on its connection. When it is not started, asyncua runs unmodified. Only one tracer
+    can be started at a time.
+    """
+
+    _originals = None
+
+    def __init__(self):
+        self.requests = []
+        self._client_ids = {}
+        self._pending = {}  # requests awaiting a response, by connection and request ID
+        self._sending = None  # request being sent by a socket protocol
+        self._arrival = None  # time of the last data received by a socket protocol
+
+    def start(self):
+        if StageTracer._originals is not None:
+            raise RuntimeError("A stage tracer is already started.")
+        originals = {
+            "client_send_request": ua_client.UaClient._send_request,
+            "protocol_send_request": ua_client.UASocketProtocol._send_request,
+            "data_received": ua_client.UASocketProtocol.data_received,
+            "call_callback": ua_client.UASocketProtocol._call_callback,
+            "message_to_binary": SecureConnection.message_to_binary,
+            "struct_to_binary": ua_client.struct_to_binary,
+            "struct_from_binary": ua_session.struct_from_binary,
+        }
+        tracer = self
+
+        async def client_send_request(client, request, *args, **kwargs):
+            record = {
+                "start": time.perf_counter_ns(),
+                "timestamp": time.time(),
+                "client_id": tracer._client_ids.setdefault(
+                    id(client), len(tracer._client_ids)
+                ),
+                "service": type(request).__name__.removesuffix("Request"),
+            }
+            _request.set(record)
+            try:
+                data = await originals["client_send_request"](
+                    client, request, *args, **kwargs
+                )
+            except BaseException:
+                _request.set(None)
+                raise
+            # The response is decoded by the session right after, in the same task
+            record["resumed"] = time.perf_counter_ns()
+            return data
+
+        def protocol_send_request(protocol, request, *args, **kwargs):
+            record = _request.get()
+            if record is None or "acquired" in record:
+                # Not sent by a client request, e.g. the opening of a secure channel
+                return originals["protocol_send_request"](
+                    protocol, request, *args, **kwargs
+                )
+            record["acquired"] = time.perf_counter_ns()
+            tracer._sending = record
+            try:
+                future = originals["protocol_send_request"](
+                    protocol, request, *args, **kwargs
+                )
+            finally:
+                tracer._sending = None
+            record["written"] = time.perf_counter_ns()
+            record["request_handle"] = request.RequestHeader.RequestHandle
+            record["request_id"] = protocol._request_id
+            tracer._pending[(id(protocol), protocol._request_id)] = record
+            return future
+
+        def struct_to_binary(obj):
+            data = originals["struct_to_binary"](obj)
+            if tracer._sending is not None:
+                tracer._sending["encoded"] = time.perf_counter_ns()
+            return data
+
+        def message_to_binary(connection, *args, **kwargs):
+            data = originals["message_to_binary"](connection, *args, **kwargs)
+            if tracer._sending is not None:
+                tracer._sending["secured"] = time.perf_counter_ns()
+            return data
+
+        def data_received(protocol, data):
+            tracer._arrival = time.perf_counter_ns()
+            return originals["data_received"](protocol, data)
+
+        def call_callback(protocol, request_id, body):
+            record = tracer._pending.pop((id(protocol), request_id), None)
+            if record is not None:
+                record["received"] = tracer._arrival
+                record["unsecured"] = time.perf_counter_ns()
+            return originals["call_callback"](protocol, request_id, body)
+
+        def struct_from_binary(objtype, data):
+            record = _request.get()
+            if record is None or "resumed" not in record:
+                return originals["struct_from_binary"](objtype, data)
+            _request.set(None)
+            response = originals["struct_from_binary"](objtype, data)
+            record["decoded"] = time.perf_counter_ns()
+            tracer.record(record)
+            return response
+
+        StageTracer._originals = originals
+        ua_client.UaClient._send_request = client_send_request
+        ua_client.UASocketProtocol._send_request = protocol_send_request
+        ua_client.UASocketProtocol.data_received = data_received
+        ua_client.UASocketProtocol._call_callback = call_callback
+        SecureConnection.message_to_binary = message_to_binary
+        ua_client.struct_to_binary = struct_to_binary
+        ua_session.struct_from_binary = struct_from_binary
+
+    def stop(self):
+        originals = StageTracer._originals
+        if originals is None:
+            return
+        ua_client.UaClient._send_request = originals["client_send_request"]
+        ua_client.UASocketProtocol._send_request = originals["protocol_send_request"]
+        ua_client.UASocketProtocol.data_received = originals["data_received"]
+        ua_client.UASocketProtocol._call_callback = originals["call_callback"]
+        SecureConnection.message_to_binary = originals["message_to_binary"]
+        ua_client.struct_to_binary = originals["struct_to_binary"]
+        ua_session.struct_from_binary = originals["struct_from_binary"]
+        StageTracer._originals = None
+        self._pending.clear()
+
+    def record(self, record):
+        """Records the stamps of a decoded request, relative to its start, if it went through every stage."""
+        if any(record.get(stamp) is None for stamp in STAMPS):
+            return
+        start = record["start"]
+        self.requests.append(
+            {
+                "timestamp": record["timestamp"],
+                "client_id": record["client_id"],
+                "service": record["service"],
+                "request_handle": record["request_handle"],
+                "request_id": record["request_id"],
+                **{f"{stamp}_ns": record[stamp] - start for stamp in STAMPS},
+            }
+        )
+
+    def save(self, path, experiment=None):
+        """Appends the requests recorded since the last save to a CSV file, so that the requests of every run of a
+        session are kept.
+
+        Args:
+            path: path of the CSV file
+            experiment: name of the experiment that sent the requests
+        """
+        requests, self.requests = self.requests, []
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        frame = pd.DataFrame(requests, columns=STAGE_TRACE_COLUMNS)
+        frame["experiment"] = experiment
+        frame.to_csv(path, mode="a", header=not path.exists(), index=False)
+        print(f"\t➡️ {len(requests)} request stage traces written to {str(path)}")
@@ -0,0 +1,366 @@
+import json
+import re
+import sqlite3
+import time
+from pathlib import Path
+
+import pandas as pd
+
+DEFAULT_STORE = "data/results.sqlite"
+
+# Indexed fields of a result file, in addition to its parameters
+RESULT_COLUMNS = [
+    "path",
+    "session",
+    "run",
+    "experiment",
+    "kind",
+    "target",
+    "mode",
+    "n_clients",
+    "client_id",
+    "rows",
+    "created",
+]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    session TEXT NOT NULL,
+    run TEXT NOT NULL,
+    experiment TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    target TEXT,
+    mode TEXT,
+    n_clients INTEGER,
+    client_id INTEGER,
+    rows INTEGER,
+    created REAL
+);
+CREATE TABLE IF NOT EXISTS parameters (
+    result_id INTEGER NOT NULL REFERENCES results(id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value,
+    PRIMARY KEY (result_id, key)
+);
+CREATE INDEX IF NOT EXISTS results_session ON results(session);
+CREATE INDEX IF NOT EXISTS results_run ON results(run);
+CREATE INDEX IF NOT EXISTS results_experiment ON results(experiment, mode);
+CREATE INDEX IF NOT EXISTS results_target ON results(target);
+CREATE INDEX IF NOT EXISTS results_clients ON results(n_clients, client_id);
+CREATE INDEX IF NOT EXISTS parameters_value ON parameters(key, value);
+"""
+
+# File names of the sessions recorded before the store, the metadata being encoded in the names
+_LEGACY_FILENAMES = [
+    (
+        re.compile(
+            r"ScalabilityEvolutionExperiment_(?P<n_clients>\d+)_ScalabilityExperiment_(?P<client_id>\d+)_ResponsivenessJitterThroughputExperiment_(?P<mode>\w+)"
+        ),
+        "ScalabilityEvolutionExperiment",
+    ),
+    (
+        re.compile(
+            r"ScalabilityExperiment_(?P<client_id>\d+)_ResponsivenessJitterThroughputExperiment_(?P<mode>\w+)"
+        ),
+        "ScalabilityExperiment",
+    ),
+    (re.compile(r"(?P<experiment>RecoveryExperiment)_(?P<mode>\w+)_requests"), None),
+    (re.compile(r"(?P<experiment>\w+Experiment)(_(?P<mode>\w+))?"), None),
+]
+
+
+def _parameter_value(value):
+    # Numbers and strings are stored as is to be compared natively, other values as JSON
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return json.dumps(value)
+
+
+def _condition(column, value):
+    """SQL condition of a filter: no condition for None, IN for a list of values, equality otherwise."""
+    if value is None:
+        return None, []
+    if isinstance(value, (list, tuple, set)):
+        value = list(value)
+        return f"{column} IN ({', '.join('?' * len(value))})", value
+    return f"{column} = ?", [value]
+
+
+class ResultStore:
+    """Index of the result files of every session, with their metadata as indexed fields.
+
+    The measurements stay in the CSV files of the session folders, the store records for each file the session,
+    run, experiment, target, mode, number of clients, client ID and parameters it was recorded with, so that the
+    results of hundreds of runs are found with an indexed query rather than by parsing file and folder names.
+
+    The store holds a connection to the database until it is closed, use it as a context manager
+    (with ResultStore() as store: ...) to close it once done.
+    """
+
+    def __init__(self, path=DEFAULT_STORE):
+        """
+        Args:
+            path: path of the SQLite database, shared by every session
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path, timeout=30)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def register(
+        self,
+        path,
+        run,
+        experiment,
+        mode=None,
+        kind="measurements",
+        n_clients=None,
+        client_id=None,
+        parameters=None,
+        session=None,
+        target=None,
+        rows=None,
+    ):
+        """Indexes a result file, replacing its previous entry if it was already indexed.
+
+        Args:
+            path: path of the result file
+            run: name of the run, i.e. the folder of the file in data/
+            experiment: experiment class that recorded the file, e.g. "ScalabilityExperiment"
+            mode: mode of the experiment, e.g. "read", "write", the called work or the replayed profile
+            kind: content of the file, "measurements" by default
+            n_clients: number of concurrent clients of the experiment
+            client_id: client that recorded the file, for the experiments with one file per client
+            parameters: dict of the other parameters of the experiment, e.g. {"num_requests": 1000}
+            session: session of the run, the run itself by default (see tag for multi-target sessions)
+            target: name of the target of the run in a multi-target session
+            rows: number of rows of the file
+        """
+        with self.connection:
+            result_id = self.connection.execute(
+                """INSERT INTO results (path, session, run, experiment, kind, target, mode, n_clients, client_id,
+                                        rows, created)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT (path) DO UPDATE SET
+                       session = excluded.session, run = excluded.run, experiment = excluded.experiment,
+                       kind = excluded.kind, target = excluded.target, mode = excluded.mode,
+                       n_clients = excluded.n_clients, client_id = excluded.client_id, rows = excluded.rows,
+                       created = excluded.created
+                   RETURNING id""",
+                (
+                    str(path),
+                    session or run,
+                    run,
+                    experiment,
+                    kind,
+                    target,
+                    None if mode is None else str(mode),
+                    None if n_clients is None else int(n_clients),
+                    None if client_id is None else int(client_id),
+                    None if rows is None else int(rows),
+                    time.time(),
+                ),
+            ).fetchone()[0]
+            self.connection.execute(
+                "DELETE FROM parameters WHERE result_id = ?", (result_id,)
+            )
+            self.connection.executemany(
+                "INSERT INTO parameters (result_id, key, value) VALUES (?, ?, ?)",
+                [
+                    (result_id, key, _parameter_value(value))
+                    for key, value in (parameters or {}).items()
+                ],
+            )
+
+    def save(self, frame, path, run, experiment, **metadata):
+        """Writes the results of an experiment to a CSV file and indexes it (see register for the metadata)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        frame.to_csv(path, index=False)
+        self.register(path, run, experiment, rows=len(frame), **metadata)
+
+    def tag(self, run, session=None, target=None, parameters=None):
+        """Sets the session, target and additional parameters of the files of a run, e.g. once a run of a
+        multi-target session is over."""
+        with self.connection:
+            if session is not None:
+                self.connection.execute(
+                    "UPDATE results SET session = ? WHERE run = ?", (session, run)
+                )
+            if target is not None:
+                self.connection.execute(
+                    "UPDATE results SET target = ? WHERE run = ?", (target, run)
+                )
+            self.connection.executemany(
+                """INSERT OR REPLACE INTO parameters (result_id, key, value)
+                   SELECT id, ?, ? FROM results WHERE run = ?""",
+                [
+                    (key, _parameter_value(value), run)
+                    for key, value in (parameters or {}).items()
+                ],
+            )
+
+    def query(
+        self,
+        session=None,
+        run=None,
+        experiment=None,
+        kind=None,
+        target=None,
+        mode=None,
+        n_clients=None,
+        client_id=None,
+        parameters=None,
+        run_prefix=None,
+    ):
+        """Looks up the indexed result files. Each filter is ignored when None, and matches any of the values when
+        given a list. The runs given by name are indexed first if they were recorded before the store.
+
+        Args:
+            parameters: dict of parameter filters, e.g. {"data_size": 64}
+            run_prefix: beginning of the names of the runs, e.g. the common prefix of the sessions of a study
+
+        Returns:
+            pd.DataFrame: one row per result file, with the indexed fields and one column per parameter
+        """
+        if run is not None:
+            self._index_runs(run)
+        conditions = []
+        values = []
+        for column, value in [
+            ("session", session),
+            ("run", run),
+            ("experiment", experiment),
+            ("kind", kind),
+            ("target", target),
+            ("mode", mode),
+            ("n_clients", n_clients),
+            ("client_id", client_id),
+        ]:
+            condition, condition_values = _condition(f"results.{column}", value)
+            if condition is not None:
+                conditions.append(condition)
+                values += condition_values
+        if run_prefix is not None:
+            # Compared as a substring rather than with LIKE, whose wildcards (_, %) are common in run names
+            conditions.append("substr(results.run, 1, ?) = ?")
+            values += [len(run_prefix), run_prefix]
+        for key, value in (parameters or {}).items():
+            if isinstance(value, (list, tuple, set)):
+                value = [_parameter_value(v) for v in value]
+            else:
+                value = _parameter_value(value)
+            condition, condition_values = _condition("value", value)
+            conditions.append(
+                f"EXISTS (SELECT 1 FROM parameters WHERE result_id = results.id AND key = ? AND {condition})"
+            )
+            values += [key] + condition_values
+
+        where = f"WHERE {' AND '.join(conditions)}" if len(conditions) > 0 else ""
+        results = pd.read_sql_query(
+            f"SELECT id, {', '.join(RESULT_COLUMNS)} FROM results {where} ORDER BY id",
+            self.connection,
+            params=values,
+        )
+        results = results.astype(
+            {"n_clients": "Int64", "client_id": "Int64", "rows": "Int64"}
+        )
+        if len(results) == 0:
+            return results.drop(columns="id")
+        result_parameters = pd.read_sql_query(
+            f"SELECT result_id, key, value FROM parameters WHERE result_id IN ({', '.join('?' * len(results))})",
+            self.connection,
+            params=[int(result_id) for result_id in results["id"]],
+        )
+        if len(result_parameters) > 0:
+            # Parameters named after an indexed field, e.g. a "mode" tag, are suffixed with "_parameter"
+            results = results.join(
+                result_parameters.pivot(
+                    index="result_id", columns="key", values="value"
+                ),
+                on="id",
+                rsuffix="_parameter",
+            )
+        return results.drop(columns="id")
+
+    def load(self, **filters):
+        """Loads the result files matching the filters of query in a single frame.
+
+        Returns:
+            pd.DataFrame: the rows of the files, with the run, target, mode, n_clients and client_id of their file
+        """
+        results = self.query(**filters)
+        frames = []
+        for result in results.itertuples():
+            if not Path(result.path).exists():  # Removed since it was indexed
+                continue
+            frames.append(
+                pd.read_csv(result.path).assign(
+                    run=result.run,
+                    target=result.target,
+                    mode=result.mode,
+                    n_clients=result.n_clients,
+                    client_id=result.client_id,
+                )
+            )
+        if len(frames) == 0:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def index_run(self, run):
+        """Indexes the result files of a run recorded before the store, parsing the metadata encoded in their names.
+
+        Returns:
+            int: number of files indexed
+        """
+        files = []
+        for path in sorted(Path(f"data/{run}").glob("*Experiment*.csv")):
+            for pattern, experiment in _LEGACY_FILENAMES:
+                match = pattern.fullmatch(path.stem)
+                if match is not None:
+                    fields = match.groupdict()
+                    files.append(
+                        {
+                            "path": path,
+                            "experiment": experiment or fields["experiment"],
+                            "kind": "requests"
+                            if path.stem.endswith("_requests")
+                            else "measurements",
+                            "mode": fields.get("mode"),
+                            "n_clients": fields.get("n_clients"),
+                            "client_id": fields.get("client_id"),
+                        }
+                    )
+                    break
+        for file in files:
+            if file["experiment"] == "ScalabilityExperiment":
+                file["n_clients"] = sum(
+                    other["experiment"] == "ScalabilityExperiment"
+                    and other["mode"] == file["mode"]
+                    for other in files
+                )
+            with open(file["path"]) as f:
+                rows = max(0, sum(1 for _ in f) - 1)
+            self.register(run=run, rows=rows, **file)
+        return len(files)
+
+    def _index_runs(self, runs):
+        # Runs recorded before the store are indexed the first time they are looked up
+        for run in [runs] if isinstance(runs, str) else runs:
+            indexed = self.connection.execute(
+                "SELECT 1 FROM results WHERE run = ? LIMIT 1", (run,)
+            ).fetchone()
+            if indexed is None:
+                self.index_run(run)
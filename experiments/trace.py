@@ -0,0 +1,150 @@
+import time
+from pathlib import Path
+
+import pandas as pd
+from asyncua import ua
+from asyncua.client.ua_client import UASocketProtocol
+
+from experiments.wire import payload_size as _payload_size
+
+# Columns of a workload trace: one timestamped operation per row
+TRACE_COLUMNS = ["timestamp", "client_id", "service", "node_ids", "payload_size"]
+# Separator of the node IDs of an operation (node IDs themselves contain ";")
+NODE_ID_SEPARATOR = "|"
+SERVICES = ["read", "write", "call"]
+
+
+class TraceRecorder:
+    """Records the Read, Write and Call requests sent by every OPC UA client of the process as a workload trace.
+
+    Recording hooks the send path of the asyncua socket protocol, so that any experiment can be recorded
+    without modification. Only one recorder can be started at a time.
+    """
+
+    _original_send_request = None
+
+    def __init__(self):
+        self.operations = []
+        self._client_ids = {}
+
+    def start(self):
+        if TraceRecorder._original_send_request is not None:
+            raise RuntimeError("A trace recorder is already started.")
+        original_send_request = UASocketProtocol.send_request
+        recorder = self
+
+        async def send_request(protocol, request, *args, **kwargs):
+            recorder.record(protocol, request)
+            return await original_send_request(protocol, request, *args, **kwargs)
+
+        TraceRecorder._original_send_request = original_send_request
+        UASocketProtocol.send_request = send_request
+
+    def stop(self):
+        if TraceRecorder._original_send_request is not None:
+            UASocketProtocol.send_request = TraceRecorder._original_send_request
+            TraceRecorder._original_send_request = None
+
+    def record(self, protocol, request):
+        """Records a request if it is a Read, Write or Call request, sent by the client owning protocol."""
+        if isinstance(request, ua.ReadRequest):
+            service = "read"
+            node_ids = [r.NodeId for r in request.Parameters.NodesToRead]
+            payload_size = 0
+        elif isinstance(request, ua.WriteRequest):
+            service = "write"
+            node_ids = [w.NodeId for w in request.Parameters.NodesToWrite]
+            payload_size = sum(
+                _payload_size(w.Value.Value) for w in request.Parameters.NodesToWrite
+            )
+        elif isinstance(request, ua.CallRequest):
+            service = "call"
+            node_ids = []
+            payload_size = 0
+            for method in request.Parameters:  # object and method of each call
+                node_ids.extend([method.ObjectId, method.MethodId])
+                payload_size += sum(_payload_size(a) for a in method.InputArguments)
+        else:
+            return
+        client_id = self._client_ids.setdefault(id(protocol), len(self._client_ids))
+        self.operations.append(
+            {
+                "timestamp": time.time(),
+                "client_id": client_id,
+                "service": service,
+                "node_ids": NODE_ID_SEPARATOR.join(n.to_string() for n in node_ids),
+                "payload_size": payload_size,
+            }
+        )
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pd.DataFrame(self.operations, columns=TRACE_COLUMNS).to_csv(path, index=False)
+        print(f"\t➡️ Trace of {len(self.operations)} operations written to {str(path)}")
+
+
+def load_trace(path):
+    """Loads a workload trace, sorted by timestamp.
+
+    Raises:
+        ValueError: if the file misses trace columns
+    """
+    trace = pd.read_csv(path)
+    missing = [c for c in TRACE_COLUMNS if c not in trace.columns]
+    if len(missing) != 0:
+        raise ValueError(f"Trace {path} misses the columns {missing}.")
+    return trace.sort_values(by="timestamp", kind="stable").reset_index(drop=True)
+
+
+def import_csv_log(
+    path,
+    timestamp_column="timestamp",
+    client_column="client",
+    service_column="service",
+    node_column="node_id",
+    size_column=None,
+    node_separator=NODE_ID_SEPARATOR,
+):
+    """Converts a CSV log of client operations to a workload trace.
+
+    Timestamps may be UNIX timestamps in seconds or date strings. Clients are numbered in order of appearance,
+    and service names are matched case-insensitively (e.g. "Read", "WriteRequest" or "Call"); rows of other
+    services are dropped.
+
+    Args:
+        path: path of the CSV log
+        timestamp_column: column of the operation timestamps
+        client_column: column identifying the client (e.g. session ID or IP address), None if all rows come from one client
+        service_column: column of the service names
+        node_column: column of the node IDs, separated by node_separator if an operation targets several nodes
+        size_column: column of the payload sizes in bytes, None if the log has none
+        node_separator: separator of the node IDs in node_column
+
+    Returns:
+        pd.DataFrame: the trace
+    """
+    log = pd.read_csv(path)
+    trace = pd.DataFrame()
+
+    timestamps = log[timestamp_column]
+    if pd.api.types.is_numeric_dtype(timestamps):
+        trace["timestamp"] = timestamps.astype(float)
+    else:
+        trace["timestamp"] = (
+            pd.to_datetime(timestamps, utc=True) - pd.Timestamp(0, tz="UTC")
+        ).dt.total_seconds()
+    trace["client_id"] = (
+        pd.factorize(log[client_column])[0] if client_column is not None else 0
+    )
+    trace["service"] = log[service_column].str.lower().str.removesuffix("request")
+    trace["node_ids"] = (
+        log[node_column]
+        .astype(str)
+        .str.split(node_separator)
+        .str.join(NODE_ID_SEPARATOR)
+    )
+    trace["payload_size"] = log[size_column] if size_column is not None else 0
+
+    trace = trace[trace["service"].isin(SERVICES)]
+    return trace.sort_values(by="timestamp", kind="stable").reset_index(drop=True)
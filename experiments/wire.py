@@ -0,0 +1,91 @@
+import struct
+
+from asyncua.ua.ua_binary import variant_to_binary
+
+# Counts of a connection: bytes, message chunks and messages sent and received on the wire
+WIRE_COLUMNS = [
+    "wire_bytes_sent",
+    "wire_bytes_received",
+    "chunks_sent",
+    "chunks_received",
+    "messages_sent",
+    "messages_received",
+]
+# Size of an OPC UA TCP chunk header: message type (3 bytes), chunk type (1 byte) and chunk size (4 bytes)
+CHUNK_HEADER_SIZE = 8
+
+
+def payload_size(value):
+    """Size in bytes of the payload of a Variant: its length for bytes, its binary encoding otherwise."""
+    if isinstance(value.Value, (bytes, bytearray)):
+        return len(value.Value)
+    return len(variant_to_binary(value))
+
+
+class _CountingTransport:
+    """Socket transport counting the bytes, chunks and messages written to it, each write being a whole message."""
+
+    def __init__(self, transport, counts):
+        self._transport = transport
+        self._counts = counts
+
+    def write(self, data):
+        self._counts["wire_bytes_sent"] += len(data)
+        self._counts["messages_sent"] += 1
+        offset = 0
+        while offset + CHUNK_HEADER_SIZE <= len(data):
+            chunk_size = struct.unpack_from("<I", data, offset + 4)[0]
+            if chunk_size < CHUNK_HEADER_SIZE:
+                break
+            self._counts["chunks_sent"] += 1
+            offset += chunk_size
+        self._transport.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._transport, name)
+
+
+class WireCounter:
+    """Counts the bytes, message chunks and messages that a connected asyncua client sends and receives on the wire,
+    i.e. with their headers, signatures and padding, to tell the traffic of each request from its payload.
+
+    The counter wraps the socket transport of the client, and the reassembly of the chunks it receives. It must be
+    attached once the client is connected, and counts until the client reconnects.
+    """
+
+    def __init__(self, client):
+        """
+        Args:
+            client: connected asyncua client
+        """
+        self.counts = dict.fromkeys(WIRE_COLUMNS, 0)
+        self._last_counts = dict(self.counts)
+        protocol = client.uaclient.protocol
+        protocol.transport = _CountingTransport(protocol.transport, self.counts)
+        receive_from_header_and_body = protocol._connection.receive_from_header_and_body
+        counts = self.counts
+
+        def counting_receive_from_header_and_body(header, body):
+            message = receive_from_header_and_body(header, body)
+            counts["wire_bytes_received"] += header.packet_size
+            counts["chunks_received"] += 1
+            if message is not None:  # None for the intermediate chunks of a message
+                counts["messages_received"] += 1
+            return message
+
+        protocol._connection.receive_from_header_and_body = (
+            counting_receive_from_header_and_body
+        )
+
+    def delta(self):
+        """Counts since the previous call, or since the counter was attached.
+
+        Returns:
+            dict: count of each of WIRE_COLUMNS
+        """
+        delta = {
+            column: self.counts[column] - self._last_counts[column]
+            for column in WIRE_COLUMNS
+        }
+        self._last_counts = dict(self.counts)
+        return delta
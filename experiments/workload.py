@@ -0,0 +1,181 @@
+import numpy as np
+import yaml
+
+SERVICES = ["read", "write", "call"]
+NODE_DISTRIBUTIONS = ["uniform", "zipf"]
+BATCH_DISTRIBUTIONS = ["constant", "uniform", "geometric"]
+
+# Settings of a profile, each of them can be overridden by the phases of the profile
+DEFAULT_SETTINGS = {
+    "operations": {"read": 1.0},  # weights of the services in the mix
+    "node_distribution": "uniform",
+    "zipf_exponent": 0.99,
+    "batch_size": {"distribution": "constant", "value": 1},
+    "data_size": 64,  # bytes written per node, and size of the method call payloads
+    "call_work_ms": 0.0,  # simulated work of the test server method called
+    "rate": None,  # operations per second per client, None for a closed loop
+}
+
+
+def node_range(namespace, first, count):
+    """Returns count consecutive numeric node IDs, e.g. the workload nodes of the test server."""
+    return [f"ns={namespace};i={first + i}" for i in range(count)]
+
+
+class Phase:
+    """Period of a workload profile with fixed settings."""
+
+    def __init__(self, duration, settings):
+        """
+        Args:
+            duration: duration of the phase, in seconds
+            settings: settings of the phase (see DEFAULT_SETTINGS)
+
+        Raises:
+            ValueError: if a setting is invalid
+        """
+        self.duration = float(duration)
+        services = list(settings["operations"].keys())
+        if any(service not in SERVICES for service in services):
+            raise ValueError(
+                f"Invalid operations {services}, the services are {SERVICES}"
+            )
+        weights = np.array([settings["operations"][s] for s in services], dtype=float)
+        if weights.sum() <= 0:
+            raise ValueError("The operation weights of a phase must not all be 0")
+        self.services = services
+        self.service_probabilities = weights / weights.sum()
+        if settings["node_distribution"] not in NODE_DISTRIBUTIONS:
+            raise ValueError(
+                f'Invalid node distribution {settings["node_distribution"]}, expected one of {NODE_DISTRIBUTIONS}'
+            )
+        self.node_distribution = settings["node_distribution"]
+        self.zipf_exponent = float(settings["zipf_exponent"])
+        self.batch_size = dict(settings["batch_size"])
+        if self.batch_size.get("distribution") not in BATCH_DISTRIBUTIONS:
+            raise ValueError(
+                f'Invalid batch size distribution {self.batch_size.get("distribution")}, expected one of {BATCH_DISTRIBUTIONS}'
+            )
+        self.data_size = int(settings["data_size"])
+        self.call_work_ms = float(settings["call_work_ms"])
+        self.rate = float(settings["rate"]) if settings["rate"] else None
+
+
+class Profile:
+    """YCSB-style workload profile: a mix of read, write and call operations on nodes selected uniformly or
+    following a Zipf distribution, with a distribution of batch sizes. The settings can change over time, from one
+    phase of the profile to the next.
+    """
+
+    def __init__(self, name, definition, defaults=None):
+        """
+        Args:
+            name: name of the profile
+            definition: settings of the profile, with a duration (in seconds) or a list of phases, each phase having
+                a duration and the settings it overrides
+            defaults: settings overriding DEFAULT_SETTINGS for the settings the profile does not define
+
+        Raises:
+            ValueError: if the definition is invalid
+        """
+        self.name = name
+        settings = {**DEFAULT_SETTINGS, **(defaults or {}), **definition}
+        self.nodes = definition.get("nodes")
+        phases = definition.get("phases")
+        if phases is None:
+            if "duration" not in definition:
+                raise ValueError(f"Profile {name} has neither a duration nor phases")
+            phases = [{"duration": definition["duration"]}]
+        self.phases = [
+            Phase(phase["duration"], {**settings, **phase}) for phase in phases
+        ]
+
+    @property
+    def duration(self):
+        return sum(phase.duration for phase in self.phases)
+
+    def node_ids(self, default_node_ids):
+        """Returns the node IDs the profile operates on.
+
+        Args:
+            default_node_ids: node IDs used if the profile does not define its own node set
+
+        Returns:
+            list: node IDs, in decreasing order of popularity for a Zipf distribution
+        """
+        if self.nodes is None:
+            return default_node_ids
+        if isinstance(self.nodes, list):
+            return self.nodes
+        return node_range(
+            self.nodes.get("namespace", 2), self.nodes["first"], self.nodes["count"]
+        )
+
+
+class OperationGenerator:
+    """Draws the operations of a phase: their service and the batch of nodes they query."""
+
+    def __init__(self, phase, n_nodes, seed=None):
+        self.phase = phase
+        self.n_nodes = n_nodes
+        self.rng = np.random.default_rng(seed)
+        if phase.node_distribution == "zipf":
+            # Node i is the (i+1)-th most popular node
+            weights = 1 / np.arange(1, n_nodes + 1) ** phase.zipf_exponent
+            self.node_cdf = np.cumsum(weights / weights.sum())
+
+    def batch_size(self):
+        batch = self.phase.batch_size
+        if batch["distribution"] == "constant":
+            size = int(batch["value"])
+        elif batch["distribution"] == "uniform":
+            size = int(self.rng.integers(batch["min"], batch["max"] + 1))
+        else:
+            size = int(self.rng.geometric(1 / batch["mean"]))
+        return max(1, min(size, self.n_nodes))
+
+    def nodes(self, size):
+        """Draws size node indices. Zipf draws are made with replacement, so that a batch may contain fewer distinct
+        nodes than its size: a node drawn several times is only queried once."""
+        if self.phase.node_distribution == "uniform":
+            return self.rng.choice(self.n_nodes, size=size, replace=False)
+        draws = np.searchsorted(self.node_cdf, self.rng.random(size))
+        return np.unique(np.minimum(draws, self.n_nodes - 1))
+
+    def next(self):
+        """Draws the next operation.
+
+        Returns:
+            str: service of the operation
+            list: indices of the nodes of the operation (empty for calls)
+        """
+        service = self.rng.choice(
+            self.phase.services, p=self.phase.service_probabilities
+        )
+        if service == "call":
+            return service, []
+        return service, self.nodes(self.batch_size())
+
+
+def load_profiles(path, names=None, defaults=None):
+    """Loads workload profiles from a YAML file.
+
+    Args:
+        path: path of the YAML file, mapping profile names to their definitions under a "profiles" key
+        names: names of the profiles to load, by default all profiles of the file
+        defaults: settings of the profiles that do not define them (see Profile)
+
+    Raises:
+        ValueError: if a profile does not exist or is invalid
+
+    Returns:
+        list: the Profile objects, in the order of names (or of the file)
+    """
+    with open(path) as f:
+        definitions = yaml.safe_load(f)["profiles"]
+    if names is None:
+        names = list(definitions.keys())
+    for name in names:
+        if name not in definitions:
+            raise ValueError(f"Profile {name} not found in {path}")
+    return [Profile(name, definitions[name], defaults) for name in names]
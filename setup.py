@@ -12,5 +12,6 @@ setup(
         "click",
         "matplotlib",
     ],
+    extras_require={"uvloop": ["uvloop"], "test": ["pytest"]},
     packages=find_packages(),
 )
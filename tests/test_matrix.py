@@ -0,0 +1,108 @@
+import click
+import pytest
+
+from experiments.matrix import command_args, expand_matrix
+
+
+@click.command("run-experiment")
+@click.option("-nc", "--nclients", "nclients")
+@click.option("-lc", "--listclients", "listclients")
+@click.option("-p", "--post-process", "post_process", is_flag=True)
+@click.option("-tg", "--tag", "tags", multiple=True)
+def command(nclients, listclients, post_process, tags):
+    pass
+
+
+def spec(matrix, exclude=(), repetitions=1):
+    return {"matrix": matrix, "exclude": list(exclude), "repetitions": repetitions}
+
+
+def test_expand_matrix_combines_the_dimensions_in_order():
+    cells = expand_matrix(spec({"nnodes": [1, 10], "mode": ["read", "write"]}))
+
+    assert [cell["parameters"] for cell in cells] == [
+        {"nnodes": 1, "mode": "read"},
+        {"nnodes": 1, "mode": "write"},
+        {"nnodes": 10, "mode": "read"},
+        {"nnodes": 10, "mode": "write"},
+    ]
+    assert cells[0]["name"] == "nnodes-1_mode-read"
+    assert {cell["repetition"] for cell in cells} == {1}
+
+
+def test_expand_matrix_excludes_partial_combinations():
+    cells = expand_matrix(
+        spec(
+            {"nnodes": [1, 10], "mode": ["read", "write"], "data_size": [64, 1024]},
+            exclude=[
+                {"mode": "read", "data_size": 1024},
+                {"nnodes": 10, "mode": "write"},
+            ],
+        )
+    )
+
+    assert [cell["name"] for cell in cells] == [
+        "nnodes-1_mode-read_data_size-64",
+        "nnodes-1_mode-write_data_size-64",
+        "nnodes-1_mode-write_data_size-1024",
+        "nnodes-10_mode-read_data_size-64",
+    ]
+
+
+def test_expand_matrix_repetitions():
+    cells = expand_matrix(spec({"mode": ["read", "write"]}, repetitions=2))
+
+    assert [cell["name"] for cell in cells] == [
+        "mode-read/run_1",
+        "mode-read/run_2",
+        "mode-write/run_1",
+        "mode-write/run_2",
+    ]
+    assert [cell["repetition"] for cell in cells] == [1, 2, 1, 2]
+
+
+def test_expand_matrix_cell_names_are_folder_names():
+    cells = expand_matrix(spec({"listclients": [[1, 5]], "impairment": ["latency=50"]}))
+
+    assert cells[0]["name"] == "listclients-1-5_impairment-latency-50"
+    assert cells[0]["parameters"]["listclients"] == [1, 5]
+
+
+def test_expand_matrix_without_dimensions():
+    assert [cell["name"] for cell in expand_matrix(spec({}))] == ["cell"]
+
+
+def test_command_args():
+    args = command_args(
+        command,
+        {
+            "nclients": 10,
+            "listclients": [1, 5, 10],
+            "post_process": True,
+            "tags": ["movement=true", "nodes_read=5"],
+        },
+    )
+
+    assert args == [
+        "--nclients",
+        "10",
+        "--listclients",
+        "1,5,10",
+        "--post-process",
+        "--tag",
+        "movement=true",
+        "--tag",
+        "nodes_read=5",
+    ]
+
+
+def test_command_args_flags_and_single_values_of_repeated_options():
+    assert command_args(command, {"post_process": False, "tags": "a=1"}) == [
+        "--tag",
+        "a=1",
+    ]
+
+
+def test_command_args_rejects_unknown_options():
+    with pytest.raises(ValueError):
+        command_args(command, {"nnodes": 10})
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from analysis.plotting import LogHistogram, downsample_series
+
+
+def test_histogram_moments_match_the_samples():
+    samples = np.random.default_rng(0).lognormal(-6, 1, 10000)
+    histogram = LogHistogram().add(samples)
+
+    assert histogram.count == len(samples)
+    assert histogram.mean == pytest.approx(samples.mean())
+    assert histogram.std == pytest.approx(samples.std(ddof=1))
+    assert histogram.min == samples.min()
+    assert histogram.max == samples.max()
+
+
+def test_histogram_quantiles_within_the_bin_width():
+    samples = np.random.default_rng(1).lognormal(-6, 1, 10000)
+    histogram = LogHistogram().add(samples)
+
+    for q in [0.5, 0.9, 0.99]:
+        assert histogram.quantile(q) == pytest.approx(np.quantile(samples, q), rel=0.05)
+    assert histogram.quantile(0) == samples.min()
+    assert histogram.quantile(1) == samples.max()
+
+
+def test_histogram_ignores_nan_and_clips_out_of_range_values():
+    histogram = LogHistogram(min_value=1e-3, max_value=1).add([np.nan, 1e-5, 0.5, 10])
+
+    assert histogram.count == 3
+    assert histogram.counts[0] == 1
+    assert histogram.counts[-1] == 1
+    # The moments and extremes are those of the values, not of their bins
+    assert histogram.mean == pytest.approx((1e-5 + 0.5 + 10) / 3)
+    assert histogram.max == 10
+
+
+def test_merged_histogram_equals_the_histogram_of_all_samples():
+    rng = np.random.default_rng(2)
+    runs = [rng.lognormal(-5, 0.5, 1000), rng.lognormal(-4, 1, 3000)]
+    merged = LogHistogram()
+    for run in runs:
+        merged.merge(LogHistogram().add(run))
+    whole = LogHistogram().add(np.concatenate(runs))
+
+    np.testing.assert_array_equal(merged.counts, whole.counts)
+    assert merged.total == pytest.approx(whole.total)
+    assert merged.total_squares == pytest.approx(whole.total_squares)
+    assert merged.std == pytest.approx(np.concatenate(runs).std(ddof=1))
+    assert (merged.min, merged.max) == (whole.min, whole.max)
+
+
+def test_merge_rejects_different_bins():
+    with pytest.raises(ValueError):
+        LogHistogram().merge(LogHistogram(bins_per_decade=10))
+
+
+def test_empty_histogram():
+    histogram = LogHistogram().add([])
+
+    assert histogram.count == 0
+    assert np.isnan(histogram.mean)
+    assert np.isnan(histogram.std)
+    assert np.isnan(histogram.quantile(0.5))
+
+
+def test_downsample_series_buckets():
+    x = np.arange(100, dtype=float)
+    y = x % 10
+    centers, low, median, high = downsample_series(x, y, max_points=10)
+
+    assert len(centers) == 10
+    np.testing.assert_allclose(centers, np.arange(10) * 9.9 + 4.95)
+    assert set(low) == {0}
+    assert set(high) == {9}
+    assert np.all((low <= median) & (median <= high))
+
+
+def test_downsample_series_skips_empty_buckets_and_unsorted_input():
+    x = np.array([9.0, 0.0, 10.0, 1.0, 0.5])
+    y = np.array([3.0, 1.0, 4.0, 5.0, 2.0])
+    centers, low, median, high = downsample_series(x, y, max_points=5)
+
+    # Buckets [0, 2) and [8, 10], the others being empty
+    np.testing.assert_allclose(centers, [1.0, 9.0])
+    np.testing.assert_allclose(low, [1.0, 3.0])
+    np.testing.assert_allclose(median, [2.0, 3.0])
+    np.testing.assert_allclose(high, [5.0, 4.0])
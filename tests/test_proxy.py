@@ -0,0 +1,48 @@
+import pytest
+
+from experiments.proxy import (
+    IMPAIRMENT_PROFILES,
+    IMPAIRMENTS,
+    format_impairment,
+    parse_impairment,
+)
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        "",
+        "wan",
+        "edge,loss=0.01,reset_interval=30",
+        "bandwidth=12345678.0",
+        "latency=0.1,jitter=1e-05,bandwidth=123456789.125,seed=7",
+    ],
+)
+def test_format_impairment_round_trips(spec):
+    settings = parse_impairment(spec)
+
+    assert parse_impairment(format_impairment(settings)) == settings
+
+
+def test_format_impairment_keeps_the_impaired_settings_only():
+    assert format_impairment(dict(IMPAIRMENTS)) == ""
+    assert format_impairment(parse_impairment("bandwidth=12345678")) == (
+        "bandwidth=12345678.0"
+    )
+
+
+def test_parse_impairment_applies_profiles_and_settings_in_order():
+    settings = parse_impairment("wan,latency=5")
+
+    assert settings["latency"] == 5
+    for key, value in IMPAIRMENT_PROFILES["wan"].items():
+        if key != "latency":
+            assert settings[key] == value
+
+
+@pytest.mark.parametrize(
+    "spec", ["lan2", "delay=5", "loss=2", "latency=-1", "jitter=x"]
+)
+def test_parse_impairment_rejects_invalid_settings(spec):
+    with pytest.raises(ValueError):
+        parse_impairment(spec)
@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+
+from experiments.sampling import (
+    StoppingRule,
+    confidence_interval,
+    parse_statistic,
+    relative_width,
+)
+
+
+def test_parse_statistic():
+    assert parse_statistic("mean") is None
+    assert parse_statistic("p99") == pytest.approx(0.99)
+    assert parse_statistic("p99.9") == pytest.approx(0.999)
+    for statistic in ["median", "p", "p0", "p100", "pxx"]:
+        with pytest.raises(ValueError):
+            parse_statistic(statistic)
+
+
+def test_confidence_interval_of_the_mean():
+    samples = np.random.default_rng(0).normal(10, 1, 400)
+    estimate, lower, upper = confidence_interval(samples, "mean", 0.95)
+
+    assert estimate == pytest.approx(samples.mean())
+    # z * s / sqrt(n), with z = 1.96 at 95%
+    assert upper - lower == pytest.approx(
+        2 * 1.959964 * samples.std(ddof=1) / 20, rel=1e-5
+    )
+
+
+def test_confidence_interval_of_a_percentile_needs_enough_samples():
+    samples = np.arange(100, dtype=float)
+    estimate, lower, upper = confidence_interval(samples, "p99")
+    assert estimate == pytest.approx(98.01)
+    assert (lower, upper) == (None, None)
+
+    samples = np.random.default_rng(1).exponential(1, 5000)
+    estimate, lower, upper = confidence_interval(samples, "p99")
+    assert lower < estimate < upper
+
+
+def test_confidence_interval_without_samples():
+    assert confidence_interval([], "mean") == (None, None, None)
+    assert confidence_interval([1.0], "mean") == (1.0, None, None)
+
+
+def test_relative_width():
+    assert relative_width(10, 9, 11) == pytest.approx(0.2)
+    assert relative_width(10, None, 11) is None
+    assert relative_width(0, -1, 1) is None
+
+
+def test_stop_reason_caps():
+    rule = StoppingRule(target_width=0.01, batch_size=10, max_duration=5)
+
+    assert rule.stop_reason([1.0] * 100, 0, max_samples=100) == "max_samples"
+    assert rule.stop_reason([1.0, 2.0], 5, max_samples=100) == "max_duration"
+    # The sample cap takes precedence over the duration
+    assert rule.stop_reason([1.0] * 100, 10, max_samples=100) == "max_samples"
+
+
+def test_stop_reason_without_target_width_samples_the_maximum():
+    rule = StoppingRule(batch_size=10)
+
+    assert rule.stop_reason([1.0] * 10, 1e6, max_samples=20) is None
+    assert rule.stop_reason([1.0] * 20, 0, max_samples=20) == "max_samples"
+
+
+def test_stop_reason_converges_at_batch_boundaries_only():
+    rule = StoppingRule(target_width=0.05, batch_size=100)
+    samples = list(np.random.default_rng(2).normal(1, 0.1, 300))
+
+    assert rule.stop_reason(samples[:99], 0, max_samples=1000) is None
+    assert rule.stop_reason(samples[:100], 0, max_samples=1000) == "converged"
+    assert rule.stop_reason(samples[:101], 0, max_samples=1000) is None
+
+
+def test_stop_reason_keeps_sampling_while_the_interval_is_wide():
+    rule = StoppingRule(target_width=0.01, batch_size=100)
+    samples = list(np.random.default_rng(3).exponential(1, 200))
+
+    assert rule.stop_reason(samples, 0, max_samples=1000) is None
+
+
+def test_stop_reason_of_a_percentile_without_enough_samples():
+    # The interval of the p99 is undefined with 100 samples, however narrow the samples are
+    rule = StoppingRule(statistic="p99", target_width=0.5, batch_size=100)
+
+    assert rule.stop_reason([1.0] * 100, 0, max_samples=1000) is None
+
+
+def test_stopping_rule_rejects_invalid_settings():
+    with pytest.raises(ValueError):
+        StoppingRule(statistic="median")
+    with pytest.raises(ValueError):
+        StoppingRule(batch_size=0)
+
+
+def test_summary():
+    rule = StoppingRule(target_width=0.05)
+    summary = rule.summary([1.0, 2.0, 3.0], "max_samples")
+
+    assert summary["stop_reason"] == "max_samples"
+    assert summary["samples"] == 3
+    assert summary["estimate"] == pytest.approx(2.0)
+    assert summary["target_width"] == 0.05
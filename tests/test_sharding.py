@@ -0,0 +1,39 @@
+import pytest
+
+from experiments.servers.test_server import (
+    FORM_NODE_ID_OFFSET,
+    HISTORY_NODE_ID_OFFSET,
+    WORKLOAD_NODE_ID_OFFSET,
+)
+from experiments.sharding import ShardRouter
+
+
+@pytest.fixture
+def router():
+    return ShardRouter("opc.tcp://localhost:4840/freeopcua/server/", 3)
+
+
+def test_generated_nodes_are_spread_by_index(router):
+    assert router.shard_of(f"ns=2;i={HISTORY_NODE_ID_OFFSET + 4}") == 1
+    assert router.shard_of(f"ns=2;i={WORKLOAD_NODE_ID_OFFSET + 5}") == 2
+
+
+def test_nodes_served_by_every_shard(router):
+    assert router.shard_of(f"ns=2;i={FORM_NODE_ID_OFFSET + 5}") is None
+    assert router.shard_of("ns=2;s=NodeIdForms.Value5") is None
+    assert router.shard_of("ns=2;i=2") is None
+    assert router.shard_of(f"ns=3;i={WORKLOAD_NODE_ID_OFFSET}") is None
+
+
+def test_shard_nodes_keeps_the_nodes_served_by_every_shard(router):
+    node_ids = [f"ns=2;i={WORKLOAD_NODE_ID_OFFSET + i}" for i in range(3)] + [
+        f"ns=2;i={FORM_NODE_ID_OFFSET + i}" for i in range(3)
+    ]
+
+    assert router.shard_nodes(node_ids, 1) == [
+        f"ns=2;i={WORKLOAD_NODE_ID_OFFSET + 1}"
+    ] + [f"ns=2;i={FORM_NODE_ID_OFFSET + i}" for i in range(3)]
+
+
+def test_shard_url(router):
+    assert router.shard_url(2) == "opc.tcp://localhost:4842/freeopcua/server/"
@@ -0,0 +1,220 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from experiments.store import ResultStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # Legacy runs are looked up in data/ relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    with ResultStore(tmp_path / "data" / "results.sqlite") as store:
+        yield store
+
+
+def frame(rows=3):
+    return pd.DataFrame({"start_time": range(rows), "end_time": range(1, rows + 1)})
+
+
+def test_save_writes_and_indexes_the_file(store, tmp_path):
+    path = tmp_path / "data" / "run" / "ScalabilityExperiment_0_read.csv"
+    store.save(
+        frame(),
+        path,
+        "run",
+        "ScalabilityExperiment",
+        mode="read",
+        n_clients=2,
+        client_id=0,
+        parameters={"data_size": 64, "node_ids": ["ns=2;i=2"]},
+    )
+
+    assert pd.read_csv(path).shape == (3, 2)
+    results = store.query(run="run")
+    assert len(results) == 1
+    result = results.iloc[0]
+    assert result["path"] == str(path)
+    assert result["session"] == "run"
+    assert result["experiment"] == "ScalabilityExperiment"
+    assert result["mode"] == "read"
+    assert result["n_clients"] == 2
+    assert result["client_id"] == 0
+    assert result["rows"] == 3
+    assert result["data_size"] == 64
+    # Values other than numbers and strings are stored as JSON
+    assert result["node_ids"] == '["ns=2;i=2"]'
+
+
+def test_save_replaces_the_entry_of_a_file(store, tmp_path):
+    path = tmp_path / "data" / "run" / "HistoryReadExperiment.csv"
+    store.save(frame(), path, "run", "HistoryReadExperiment", parameters={"a": 1})
+    store.save(frame(5), path, "run", "HistoryReadExperiment", parameters={"b": 2})
+
+    results = store.query(run="run")
+    assert len(results) == 1
+    assert results.iloc[0]["rows"] == 5
+    assert "a" not in results.columns
+    assert results.iloc[0]["b"] == 2
+
+
+def test_query_filters(store, tmp_path):
+    for mode in ["read", "write"]:
+        for client_id in range(2):
+            store.save(
+                frame(),
+                tmp_path
+                / "data"
+                / "run"
+                / f"ScalabilityExperiment_{client_id}_{mode}.csv",
+                "run",
+                "ScalabilityExperiment",
+                mode=mode,
+                n_clients=2,
+                client_id=client_id,
+                parameters={"data_size": 64 * (client_id + 1)},
+            )
+    store.save(
+        frame(),
+        tmp_path / "data" / "other" / "MethodCallExperiment_cpu.csv",
+        "other",
+        "MethodCallExperiment",
+    )
+
+    assert len(store.query()) == 5
+    assert len(store.query(mode="read")) == 2
+    assert len(store.query(mode=["read", "write"], client_id=1)) == 2
+    assert len(store.query(experiment="MethodCallExperiment")) == 1
+    assert len(store.query(parameters={"data_size": 128})) == 2
+    assert len(store.query(parameters={"data_size": [64, 128]})) == 4
+    assert len(store.query(parameters={"data_size": 32})) == 0
+
+
+def test_tag_sets_the_session_target_and_parameters_of_a_run(store, tmp_path):
+    for mode in ["read", "write"]:
+        store.save(
+            frame(),
+            tmp_path
+            / "data"
+            / "session"
+            / "a"
+            / f"ResponsivenessJitterThroughputExperiment_{mode}.csv",
+            "session/a",
+            "ResponsivenessJitterThroughputExperiment",
+            mode=mode,
+        )
+    store.save(
+        frame(),
+        tmp_path
+        / "data"
+        / "session"
+        / "b"
+        / "ResponsivenessJitterThroughputExperiment_read.csv",
+        "session/b",
+        "ResponsivenessJitterThroughputExperiment",
+        mode="read",
+    )
+
+    store.tag("session/a", session="session", target="a", parameters={"movement": True})
+
+    tagged = store.query(session="session")
+    assert len(tagged) == 2
+    assert set(tagged["target"]) == {"a"}
+    assert set(tagged["movement"]) == {True}
+    assert len(store.query(parameters={"movement": True})) == 2
+    assert store.query(run="session/b").iloc[0]["session"] == "session/b"
+
+
+def test_tag_parameter_named_after_an_indexed_field(store, tmp_path):
+    store.save(
+        frame(),
+        tmp_path / "data" / "run" / "ReplayExperiment.csv",
+        "run",
+        "ReplayExperiment",
+        mode="trace",
+    )
+    store.tag("run", parameters={"mode": "tagged"})
+
+    result = store.query(run="run").iloc[0]
+    assert result["mode"] == "trace"
+    assert result["mode_parameter"] == "tagged"
+
+
+def test_query_indexes_legacy_runs_from_their_filenames(store, tmp_path):
+    run_dir = tmp_path / "data" / "legacy"
+    run_dir.mkdir(parents=True)
+    filenames = [
+        "ScalabilityExperiment_0_ResponsivenessJitterThroughputExperiment_read",
+        "ScalabilityExperiment_1_ResponsivenessJitterThroughputExperiment_read",
+        "ScalabilityExperiment_0_ResponsivenessJitterThroughputExperiment_write",
+        "ScalabilityEvolutionExperiment_3_ScalabilityExperiment_2_ResponsivenessJitterThroughputExperiment_write",
+        "RecoveryExperiment_restart_requests",
+        "ResponsivenessJitterThroughputExperiment_read",
+        "HistoryReadExperiment",
+    ]
+    for filename in filenames:
+        frame(4).to_csv(run_dir / f"{filename}.csv", index=False)
+
+    results = store.query(run="legacy").set_index("path")
+    assert len(results) == len(filenames)
+
+    def result(filename):
+        return results.loc[str(run_dir.relative_to(tmp_path) / f"{filename}.csv")]
+
+    scalability = result(filenames[1])
+    assert scalability["experiment"] == "ScalabilityExperiment"
+    assert scalability["mode"] == "read"
+    assert scalability["client_id"] == 1
+    # The number of clients of a legacy scalability run is the number of files of its mode
+    assert scalability["n_clients"] == 2
+    assert result(filenames[2])["n_clients"] == 1
+    evolution = result(filenames[3])
+    assert evolution["experiment"] == "ScalabilityEvolutionExperiment"
+    assert (evolution["n_clients"], evolution["client_id"]) == (3, 2)
+    assert evolution["mode"] == "write"
+    recovery = result(filenames[4])
+    assert (recovery["experiment"], recovery["mode"], recovery["kind"]) == (
+        "RecoveryExperiment",
+        "restart",
+        "requests",
+    )
+    assert result(filenames[5])["mode"] == "read"
+    history = result(filenames[6])
+    assert history["experiment"] == "HistoryReadExperiment"
+    assert pd.isna(history["mode"])
+    assert history["rows"] == 4
+
+
+def test_closed_on_exit(tmp_path):
+    with ResultStore(tmp_path / "results.sqlite") as store:
+        pass
+    with pytest.raises(sqlite3.ProgrammingError):
+        store.connection.execute("SELECT 1")
+
+
+def test_query_run_prefix(store, tmp_path):
+    for run in [
+        "wfl_21_june_a",
+        "wfl_21_june_b/target",
+        "wfl_21_july_a",
+        "wflx21_june_a",
+    ]:
+        store.save(
+            frame(),
+            tmp_path
+            / "data"
+            / run
+            / "ResponsivenessJitterThroughputExperiment_read.csv",
+            run,
+            "ResponsivenessJitterThroughputExperiment",
+            mode="read",
+        )
+
+    # The underscores of the prefix are not wildcards
+    assert sorted(store.query(run_prefix="wfl_21_june_")["run"]) == [
+        "wfl_21_june_a",
+        "wfl_21_june_b/target",
+    ]
+    assert len(store.query(run_prefix="wfl_21_june_", mode="write")) == 0
+    assert len(store.query(run_prefix="")) == 4
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.traffic import server_throughput
+
+
+def client(start_times, duration=0.005, data_size=64):
+    start_times = np.asarray(start_times, dtype=float)
+    return pd.DataFrame(
+        {
+            "start_time": start_times,
+            "end_time": start_times + duration,
+            "data_size": data_size,
+        }
+    )
+
+
+def test_ramp_up_and_ramp_down_are_trimmed():
+    # 3 clients at 100 requests/s, client i running from i s to i + 10 s
+    clients = [client(i + np.arange(0, 10, 0.01)) for i in range(3)]
+    throughput = server_throughput(clients)
+
+    assert throughput["steady_start"] == 2
+    assert throughput["steady_duration"] == pytest.approx(7.995)
+    assert throughput["ops_per_second"] == pytest.approx(300)
+    assert throughput["ops_per_second_min"] == pytest.approx(300)
+    assert throughput["ops_per_second_max"] == pytest.approx(300)
+    assert throughput["bytes_per_second"] == pytest.approx(300 * 64)
+    assert "wire_bytes_per_second" not in throughput
+
+
+def test_window_edges():
+    # Requests completed at 1, 2, 3 and 4 s, the steady state spanning (0, 4]
+    requests = pd.DataFrame(
+        {"start_time": [0.0, 1.0, 2.0, 3.0], "end_time": [1.0, 2.0, 3.0, 4.0]}
+    ).assign(data_size=10)
+    throughput = server_throughput([requests], window=2, step=1)
+
+    # Windows (0, 2], (1, 3] and (2, 4]: a request completed at the end of a window is counted in it, and the last
+    # request of the steady state in the last window
+    assert throughput["windows"] == 3
+    assert throughput["ops_per_second"] == pytest.approx(1)
+    assert throughput["ops_per_second_min"] == pytest.approx(1)
+    assert throughput["steady_requests"] == 4
+
+
+def test_window_not_fitting_the_step():
+    requests = client(np.arange(0, 10, 0.5), duration=0.5)
+    throughput = server_throughput([requests], window=1, step=0.75)
+
+    # Windows starting at 0, 0.75, ..., 9, the last one ending before the end of the steady state, at 10 s
+    assert throughput["windows"] == 13
+    assert throughput["ops_per_second_min"] == pytest.approx(2)
+    assert throughput["ops_per_second_max"] == pytest.approx(2)
+
+
+def test_steady_state_shorter_than_a_window():
+    clients = [client([0.0, 0.1, 0.2]), client([0.1, 0.2, 0.3])]
+    throughput = server_throughput(clients, window=1, step=0.25)
+
+    # A single window over (0.1, 0.205], in which 2 requests of each client complete
+    assert throughput["windows"] == 1
+    assert throughput["window"] == pytest.approx(0.105)
+    assert throughput["steady_requests"] == 4
+    assert throughput["ops_per_second"] == pytest.approx(4 / 0.105)
+
+
+def test_wire_bytes():
+    requests = client(np.arange(0, 4, 0.1)).assign(
+        wire_bytes_sent=100,
+        wire_bytes_received=200,
+        chunks_sent=1,
+        chunks_received=1,
+        messages_sent=1,
+        messages_received=1,
+    )
+    throughput = server_throughput([requests], window=1, step=1)
+
+    assert throughput["wire_bytes_per_second"] == pytest.approx(10 * 300)
+
+
+def test_clients_not_overlapping():
+    clients = [client(np.arange(0, 1, 0.1)), client(np.arange(2, 3, 0.1))]
+
+    assert server_throughput(clients) is None
+    assert server_throughput([]) is None
+    assert server_throughput([client([])]) is None
+
+
+def test_clients_without_requests_are_ignored():
+    clients = [client(np.arange(0, 4, 0.01)), client([])]
+
+    assert server_throughput(clients)["ops_per_second"] == pytest.approx(100)
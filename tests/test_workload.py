@@ -0,0 +1,25 @@
+import pytest
+
+from experiments.workload import Profile
+
+
+def test_profile_defaults_apply_to_the_settings_it_does_not_set():
+    profile = Profile(
+        "mixed",
+        {
+            "data_size": 32,
+            "phases": [{"duration": 1}, {"duration": 1, "data_size": 1024}],
+        },
+        defaults={"data_size": 128, "rate": 10},
+    )
+
+    assert [phase.data_size for phase in profile.phases] == [32, 1024]
+    assert [phase.rate for phase in profile.phases] == [10, 10]
+
+
+def test_profile_without_defaults():
+    profile = Profile("read", {"duration": 2}, defaults={"data_size": 128})
+
+    assert profile.phases[0].data_size == 128
+    assert Profile("read", {"duration": 2}).phases[0].data_size == 64
+    assert profile.duration == pytest.approx(2)